@@ -3,95 +3,437 @@ groq_api.py
 Wrapper for the Groq LLM API integration.
 """
 
+import logging
+import math
 import os
-from typing import Dict, Any
-from groq import Groq
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 from dotenv import load_dotenv
 
+from llm_cache import ResponseCache
+from tool_utils.ratelimit import GROQ, get_governor
+
 load_dotenv()
 
-# Initialize Groq client
 api_key = os.environ.get("GROQ_API_KEY")
-if not api_key:
-    raise ValueError("GROQ_API_KEY environment variable is not set.")
-
 model_id = os.environ.get("GROQ_MODEL_ID", "llama2-70b-4096")
-client = Groq(api_key=api_key)
 
-def generate_response(prompt: str, context: Dict[str, Any]) -> str:
+# Groq clients are created on first use, so importing this module neither
+# loads the SDK nor requires GROQ_API_KEY.
+# asyncio itself is only imported by the async functions that need it.
+_client = None
+
+SYSTEM_MESSAGE = "You are a helpful personal assistant using the Model Context Protocol (MCP)."
+TEMPERATURE = 0.7
+MAX_TOKENS = 1000
+# Rough characters per token, for estimating usage against the TPM limit
+CHARS_PER_TOKEN = 4
+# Default number of completions in flight at once for generate_many
+MAX_CONCURRENCY = 4
+
+# Persistent cache of completions, keyed by model, messages and sampling settings
+response_cache = ResponseCache()
+
+logger = logging.getLogger(__name__)
+
+FORMAT_ERROR_MESSAGE = "I apologize, but I'm having trouble understanding the context right now. Please try again."
+MISSING_KEY_MESSAGE = "I apologize, but I'm having trouble accessing some information right now. Could you try again or rephrase your question?"
+API_ERROR_MESSAGE = "I apologize, but I encountered an error. Please try again in a moment."
+# Fallback texts returned in place of a completion
+ERROR_MESSAGES = (FORMAT_ERROR_MESSAGE, MISSING_KEY_MESSAGE, API_ERROR_MESSAGE)
+
+def _require_api_key() -> str:
+    if not api_key:
+        raise ValueError("GROQ_API_KEY environment variable is not set.")
+    return api_key
+
+def get_client():
+    """Return the shared Groq client, creating it on first use."""
+    global _client
+    if _client is None:
+        from groq import Groq
+        # Retries are left to the rate-limit governor
+        _client = Groq(api_key=_require_api_key(), max_retries=0)
+    return _client
+
+# Fallback values for plain-string prompts; registered templates carry their own
+LEGACY_DEFAULTS = {
+    "date": "No date available",
+    "weather": "Weather unavailable",
+    "calendar_events": "[]",
+    "notes": "[]",
+    "todos": "[]",
+    "servers": "[]",
+    "capabilities": "{}"
+}
+
+# template id -> {"calls", "cache_hits", "api_seconds"}
+_template_stats: Dict[str, Dict[str, float]] = {}
+_stats_lock = threading.Lock()
+
+def _template_id(prompt: str) -> str:
+    return getattr(prompt, "template_id", None) or "adhoc"
+
+def _record_call(template_id: str, cache_hit: bool = False, api_seconds: float = 0.0) -> None:
+    with _stats_lock:
+        stats = _template_stats.setdefault(template_id, {"calls": 0, "cache_hits": 0, "api_seconds": 0.0})
+        stats["calls"] += 1
+        stats["cache_hits"] += int(cache_hit)
+        stats["api_seconds"] += api_seconds
+
+def _format_prompt(prompt: str, context: Dict[str, Any]) -> str:
+    """
+    Fill a prompt with context.
+    Registered templates render themselves in a single pass; plain strings
+    are filled with string-cleaned context and LEGACY_DEFAULTS.
+    """
+    if hasattr(prompt, "render"):
+        return prompt.render(context)
+
+    clean_context = dict(LEGACY_DEFAULTS)
+    for key, value in context.items():
+        if isinstance(value, (list, dict)):
+            clean_context[key] = str(value).replace('{', '').replace('}', '')
+        else:
+            clean_context[key] = str(value)
+    return prompt.format(context=clean_context)
+
+def _messages(formatted_prompt: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": SYSTEM_MESSAGE},
+        {"role": "user", "content": formatted_prompt}
+    ]
+
+def _estimated_tokens(formatted_prompt: str) -> int:
+    """Tokens a completion may use against the TPM limit: the prompt plus a full completion."""
+    return math.ceil((len(SYSTEM_MESSAGE) + len(formatted_prompt)) / CHARS_PER_TOKEN) + MAX_TOKENS
+
+def _refund_unused(estimate: int, usage: Any, counted: Optional[int] = None) -> None:
+    """Give back the reserved tokens a request did not use, by reported usage or else counted tokens."""
+    used = getattr(usage, "total_tokens", None)
+    if not isinstance(used, int):
+        used = counted
+    if used is not None:
+        get_governor(GROQ).refund_tokens(estimate - used)
+
+def _refund_failed(estimate: int) -> None:
+    """Give back the whole reservation of a request that was never answered."""
+    get_governor(GROQ).refund_tokens(estimate)
+
+def _cache_key(formatted_prompt: str, template_id: str) -> str:
+    return ResponseCache.make_key(model_id, SYSTEM_MESSAGE, formatted_prompt,
+                                  TEMPERATURE, MAX_TOKENS, namespace=template_id)
+
+def generate_response(prompt: str, context: Dict[str, Any], use_cache: bool = True,
+                      cache_ttl: Optional[float] = None) -> str:
     """
     Generate a response using the Groq LLM API.
+    Identical requests are answered from the persistent response cache.
     Args:
         prompt (str): The prompt template
         context (dict): Context data to fill the template
+        use_cache (bool): Set False to always call the API, e.g. when a fresh
+            sample is wanted
+        cache_ttl (float, optional): Lifetime of the cached response in seconds
     Returns:
         str: Generated response
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    
+    template_id = _template_id(prompt)
     try:
-        # Ensure context is a dictionary with clean string values
-        clean_context = {}
-        for key, value in context.items():
-            if isinstance(value, (list, dict)):
-                clean_context[key] = str(value).replace('{', '').replace('}', '')
-            else:
-                clean_context[key] = str(value)
-                
-        # Ensure all required keys exist with defaults
-        defaults = {
-            "date": "No date available",
-            "weather": "Weather unavailable",
-            "calendar_events": "[]",
-            "notes": "[]",
-            "todos": "[]",
-            "servers": "[]",
-            "capabilities": "{}"
-        }
-        
-        for key, default in defaults.items():
-            if key not in clean_context:
-                clean_context[key] = default
-                
-        # Format the prompt with context wrapped in a dict
         try:
-            formatted_prompt = prompt.format(context=clean_context)
-            logger.info("Successfully formatted prompt")
+            formatted_prompt = _format_prompt(prompt, context)
+            logger.info(f"Successfully formatted prompt '{template_id}'")
         except Exception as e:
-            logger.error(f"Error formatting prompt: {str(e)}")
-            return "I apologize, but I'm having trouble understanding the context right now. Please try again."
-        
-        logger.info("Creating message list...")
-        messages = [
-            {"role": "system", "content": "You are a helpful personal assistant using the Model Context Protocol (MCP)."},
-            {"role": "user", "content": prompt.format(context=clean_context)}
-        ]
+            logger.error(f"Error formatting prompt '{template_id}': {str(e)}")
+            return FORMAT_ERROR_MESSAGE
         
         logger.info(f"Calling Groq API with model: {model_id}")
         
         if not api_key:
             raise ValueError("GROQ_API_KEY is not set! Please check your .env file.")
             
+        cache_key = _cache_key(formatted_prompt, template_id)
+        if use_cache:
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Returning cached response for '{template_id}'")
+                _record_call(template_id, cache_hit=True)
+                return cached
+
         # Call Groq API
         logger.info("Making API call...")
-        response = client.chat.completions.create(
-            messages=messages,
-            model=model_id,
-            temperature=0.7,
-            max_tokens=1000
-        )
+        started = time.perf_counter()
+        estimate = _estimated_tokens(formatted_prompt)
+        try:
+            response = get_governor(GROQ).call(lambda: get_client().chat.completions.create(
+                messages=_messages(formatted_prompt),
+                model=model_id,
+                temperature=TEMPERATURE,
+                max_tokens=MAX_TOKENS
+            ), tokens=estimate)
+        except Exception:
+            _refund_failed(estimate)
+            raise
+        _refund_unused(estimate, getattr(response, "usage", None))
+        _record_call(template_id, api_seconds=time.perf_counter() - started)
         
         logger.info("Successfully received response from Groq API")
-        return response.choices[0].message.content
+        content = response.choices[0].message.content
+        if use_cache and content:
+            response_cache.put(cache_key, content, ttl=cache_ttl)
+        return content
         
     except KeyError as e:
         logger.error(f"Error formatting prompt: {str(e)}")
-        return f"I apologize, but I'm having trouble accessing some information right now. Could you try again or rephrase your question?"
+        return MISSING_KEY_MESSAGE
     except Exception as e:
-        import traceback
         error_msg = f"Error generating response: {str(e)}\nTraceback: {traceback.format_exc()}"
         logger.error(error_msg)
-        return "I apologize, but I encountered an error. Please try again in a moment."
+        return API_ERROR_MESSAGE
+
+def _stream_chunks(prompt: str, context: Dict[str, Any], use_cache: bool,
+                   cache_ttl: Optional[float]) -> Iterator[Tuple[str, bool]]:
+    """
+    Stream a response as (chunk, failed) pairs.
+    A failed chunk is a fallback message and is always the last one.
+    """
+    template_id = _template_id(prompt)
+    try:
+        formatted_prompt = _format_prompt(prompt, context)
+    except Exception as e:
+        logger.error(f"Error formatting prompt '{template_id}': {str(e)}")
+        yield FORMAT_ERROR_MESSAGE, True
+        return
+
+    cache_key = _cache_key(formatted_prompt, template_id)
+    if use_cache:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Returning cached response for '{template_id}'")
+            _record_call(template_id, cache_hit=True)
+            yield cached, False
+            return
+
+    started = time.perf_counter()
+    estimate = _estimated_tokens(formatted_prompt)
+    try:
+        logger.info(f"Streaming from Groq API with model: {model_id}")
+        # Rate limits reject the request before the stream starts, so only its creation is retried
+        stream = get_governor(GROQ).call(lambda: get_client().chat.completions.create(
+            messages=_messages(formatted_prompt),
+            model=model_id,
+            temperature=TEMPERATURE,
+            max_tokens=MAX_TOKENS,
+            stream=True
+        ), tokens=estimate)
+    except Exception as e:
+        _refund_failed(estimate)
+        logger.error(f"Error streaming response: {str(e)}\nTraceback: {traceback.format_exc()}")
+        yield API_ERROR_MESSAGE, True
+        return
+
+    chunks = []
+    usage = None
+    failed = False
+    try:
+        for chunk in stream:
+            # Groq reports the request's usage on the final chunk
+            usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                chunks.append(delta)
+                yield delta, False
+    except Exception as e:
+        logger.error(f"Error streaming response: {str(e)}\nTraceback: {traceback.format_exc()}")
+        failed = True
+    finally:
+        # Without reported usage, count the prompt and the text received so far
+        output_tokens = math.ceil(sum(len(delta) for delta in chunks) / CHARS_PER_TOKEN)
+        _refund_unused(estimate, usage, estimate - MAX_TOKENS + output_tokens)
+    if failed:
+        yield (API_ERROR_MESSAGE if not chunks else f"\n\n{API_ERROR_MESSAGE}"), True
+        return
+    _record_call(template_id, api_seconds=time.perf_counter() - started)
+
+    content = "".join(chunks)
+    if use_cache and content:
+        response_cache.put(cache_key, content, ttl=cache_ttl)
+
+def generate_response_stream(prompt: str, context: Dict[str, Any], use_cache: bool = True,
+                             cache_ttl: Optional[float] = None) -> Iterator[str]:
+    """
+    Stream a response from the Groq LLM API as it is generated.
+    A cached response is yielded as a single chunk; a completed stream is
+    stored in the cache like a regular response.
+    Args:
+        prompt (str): The prompt template
+        context (dict): Context data to fill the template
+        use_cache (bool): Set False to always call the API
+        cache_ttl (float, optional): Lifetime of the cached response in seconds
+    Yields:
+        str: Text chunks in order; joined they form the full response
+    """
+    for chunk, _ in _stream_chunks(prompt, context, use_cache, cache_ttl):
+        yield chunk
+
+class Completion(NamedTuple):
+    """Text of a completion, and whether it ended in a fallback error message."""
+    text: str
+    failed: bool = False
+
+def complete(prompt: str, context: Dict[str, Any], on_token: Optional[Callable[[str], None]] = None,
+             use_cache: bool = True, cache_ttl: Optional[float] = None) -> Completion:
+    """
+    Run a completion, streaming chunks to on_token when given.
+    Args:
+        prompt (str): The prompt template
+        context (dict): Context data to fill the template
+        on_token (callable, optional): Called with each text chunk, including
+            a trailing error message if the stream fails
+        use_cache (bool): Set False to always call the API
+        cache_ttl (float, optional): Lifetime of the cached response in seconds
+    Returns:
+        Completion: Full text and whether it failed; failed text must not be stored
+    """
+    if on_token is None:
+        text = generate_response(prompt, context, use_cache, cache_ttl)
+        return Completion(text, text in ERROR_MESSAGES)
+    chunks = []
+    failed = False
+    for chunk, failed in _stream_chunks(prompt, context, use_cache, cache_ttl):
+        chunks.append(chunk)
+        on_token(chunk)
+    return Completion("".join(chunks), failed)
+
+def _new_async_client():
+    """
+    Create an async Groq client with its own httpx connection pool.
+    Use it as an async context manager so the pool is closed afterwards.
+    """
+    from groq import AsyncGroq
+    return AsyncGroq(api_key=_require_api_key(), max_retries=0)
+
+async def agenerate_response(prompt: str, context: Dict[str, Any], use_cache: bool = True,
+                             cache_ttl: Optional[float] = None, client: Any = None) -> str:
+    """
+    Async variant of generate_response built on the async Groq client.
+    Cache lookups run in a worker thread so they never block the event loop.
+    Args:
+        prompt (str): The prompt template
+        context (dict): Context data to fill the template
+        use_cache (bool): Set False to always call the API
+        cache_ttl (float, optional): Lifetime of the cached response in seconds
+        client (AsyncGroq, optional): Open client to send the request with;
+            by default a client is opened and closed for this request
+    Returns:
+        str: Generated response
+    """
+    import asyncio
+    template_id = _template_id(prompt)
+    try:
+        formatted_prompt = _format_prompt(prompt, context)
+    except Exception as e:
+        logger.error(f"Error formatting prompt '{template_id}': {str(e)}")
+        return FORMAT_ERROR_MESSAGE
+
+    cache_key = _cache_key(formatted_prompt, template_id)
+    if use_cache:
+        cached = await asyncio.to_thread(response_cache.get, cache_key)
+        if cached is not None:
+            logger.info(f"Returning cached response for '{template_id}'")
+            _record_call(template_id, cache_hit=True)
+            return cached
+
+    started = time.perf_counter()
+    estimate = _estimated_tokens(formatted_prompt)
+
+    async def create(open_client):
+        try:
+            return await get_governor(GROQ).acall(lambda: open_client.chat.completions.create(
+                messages=_messages(formatted_prompt),
+                model=model_id,
+                temperature=TEMPERATURE,
+                max_tokens=MAX_TOKENS
+            ), tokens=estimate)
+        except Exception:
+            _refund_failed(estimate)
+            raise
+
+    try:
+        if client is not None:
+            response = await create(client)
+        else:
+            async with _new_async_client() as own_client:
+                response = await create(own_client)
+    except Exception as e:
+        logger.error(f"Error generating response: {str(e)}\nTraceback: {traceback.format_exc()}")
+        return API_ERROR_MESSAGE
+    _refund_unused(estimate, getattr(response, "usage", None))
+    _record_call(template_id, api_seconds=time.perf_counter() - started)
+
+    content = response.choices[0].message.content
+    if use_cache and content:
+        await asyncio.to_thread(response_cache.put, cache_key, content, ttl=cache_ttl)
+    return content
+
+async def agenerate_many(requests: Iterable[Tuple[str, Dict[str, Any]]],
+                         max_concurrency: int = MAX_CONCURRENCY, **kwargs) -> List[str]:
+    """
+    Run several completions concurrently, at most max_concurrency at a time.
+    All requests share one client and connection pool, closed when the batch is done.
+    A failed request yields a fallback message without affecting the others.
+    Args:
+        requests (iterable): (prompt, context) pairs
+        max_concurrency (int): Maximum number of requests in flight
+        kwargs: Passed through to agenerate_response
+    Returns:
+        list: Responses in the same order as requests
+    """
+    import asyncio
+    requests = list(requests)
+    try:
+        client = _new_async_client()
+    except Exception as e:
+        logger.error(f"Error creating async Groq client: {str(e)}")
+        return [API_ERROR_MESSAGE] * len(requests)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(prompt: str, context: Dict[str, Any]) -> str:
+        async with semaphore:
+            return await agenerate_response(prompt, context, client=client, **kwargs)
+
+    async with client:
+        return await asyncio.gather(*(run(prompt, context) for prompt, context in requests))
+
+def generate_many(requests: Iterable[Tuple[str, Dict[str, Any]]],
+                  max_concurrency: int = MAX_CONCURRENCY, **kwargs) -> List[str]:
+    """
+    Synchronous entry point for agenerate_many, e.g. for batch query processing.
+    Must not be called from inside a running event loop.
+    """
+    import asyncio
+    return asyncio.run(agenerate_many(requests, max_concurrency, **kwargs))
+
+def cache_stats() -> Dict[str, float]:
+    """Return response cache hit/miss counters and entry count."""
+    return response_cache.stats()
+
+def template_stats() -> Dict[str, Dict[str, float]]:
+    """Return per-template call counts, cache hits and seconds spent in the API."""
+    with _stats_lock:
+        return {template_id: dict(stats) for template_id, stats in _template_stats.items()}
 
-__all__ = ['generate_response']
\ No newline at end of file
+__all__ = [
+    'get_client',
+    'generate_response',
+    'generate_response_stream',
+    'Completion',
+    'complete',
+    'agenerate_response',
+    'agenerate_many',
+    'generate_many',
+    'cache_stats',
+    'template_stats'
+]
\ No newline at end of file
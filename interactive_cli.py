@@ -2,103 +2,211 @@
 Interactive CLI for the MCP Agent.
 Implements the Model Context Protocol (MCP) for a personal assistant.
 """
+import time
+_import_started = time.perf_counter()
+
+import argparse
 from datetime import datetime
 import sys
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from rich.console import Console
+from rich.live import Live
 from rich.markdown import Markdown
 from rich.prompt import Prompt, Confirm
+_rich_imported = time.perf_counter()
 
 from mcp import tools
-from mcp.agent import MCPAgent
-from mcp.memory import get_incomplete_todos, complete_todo, store_todo
+from mcp.agent import MCPAgent, configure_logging
+from mcp.circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, is_backend_failure
+from mcp.context import context_store
+from mcp.conversation import ConversationMemory
+from mcp.memory import get_incomplete_todos, complete_todo, get_store, search_memory, store_todo
 from mcp.instructions import get_general_prompt
-from groq_api import generate_response
+from mcp.router import (
+    ADD_TODO, CAPABILITIES, COMPLETE_TODO, LIST_EVENTS, LIST_NOTES, LIST_TODOS, SEARCH_MEMORY,
+    WEATHER, IntentRouter, Route
+)
+from mcp.serializer import format_event, format_note, format_todo
+from mcp.scheduler import BRIEFING_MAX_AGE, BRIEFING_TIME, REFRESH_INTERVAL, BriefingScheduler
+from groq_api import complete
+_import_finished = time.perf_counter()
+
+# Client libraries that should stay unloaded until first use
+DEFERRED_MODULES = ['groq', 'googleapiclient', 'notion_client', 'requests', 'numpy']
 
 console = Console()
 
+# Weather location shared by the interactive agent and the briefing scheduler
+DEFAULT_LOCATION = "New York"
+# Matches shown for a memory search
+SEARCH_RESULTS = 5
+# Most relevant notes and briefings put in a general prompt
+RELEVANT_NOTES = 5
+
 class MCPToolServer:
-    """Base class for MCP-compliant tool servers."""
+    """
+    Base class for MCP-compliant tool servers.
+    Every call goes through a circuit breaker for the server and one for the
+    tool or resource. While either is open the call fails fast, returning the
+    last good result of a cacheable tool or None, instead of waiting on a
+    dead backend. Bad requests, such as wrong arguments, return None without
+    counting against either breaker. Tools that fall back to a local mirror
+    guard the backend with their own breakers, which the server reports
+    alongside its own.
+    """
     
-    def __init__(self, name: str):
+    def __init__(self, name: str, backends: Iterable[CircuitBreaker] = ()):
         self.name = name
         self.tools = {}
         self.resources = {}
-        self.error_state = False
+        self.breaker = CircuitBreaker(name)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._backends = list(backends)
+        # (name, params) -> last good result of cacheable tools and resources
+        self._fallbacks: Dict[Tuple, Any] = {}
+        self._last_failed = False
+
+    @property
+    def error_state(self) -> bool:
+        """Whether the last call failed or the server's circuit is not closed."""
+        return self._last_failed or self.breaker.state != CLOSED
         
-    def register_tool(self, tool_name: str, tool_func, description: str):
-        """Register a tool with the server."""
+    def register_tool(self, tool_name: str, tool_func, description: str, cache_fallback: bool = False):
+        """Register a tool with the server. Read-only tools may serve their last result while failing fast."""
         self.tools[tool_name] = {
             "function": tool_func,
-            "description": description
+            "description": description,
+            "cache_fallback": cache_fallback
         }
     
     def register_resource(self, resource_name: str, resource_func, description: str):
         """Register a resource with the server."""
         self.resources[resource_name] = {
             "function": resource_func,
-            "description": description
+            "description": description,
+            "cache_fallback": True
         }
     
     def call_tool(self, tool_name: str, **params):
         """Execute a registered tool."""
-        try:
-            if tool_name in self.tools:
-                result = self.tools[tool_name]["function"](**params)
-                self.error_state = False
-                return result
-            raise ValueError(f"Tool {tool_name} not found")
-        except Exception as e:
-            self.error_state = True
-            console.print(f"[yellow]Warning: Error in {self.name} server tool {tool_name}: {str(e)}[/yellow]")
+        if tool_name not in self.tools:
+            self._last_failed = True
+            console.print(f"[yellow]Warning: Error in {self.name} server tool {tool_name}: Tool {tool_name} not found[/yellow]")
             return None
+        return self._invoke("tool", tool_name, self.tools[tool_name], params)
     
     def get_resource(self, resource_name: str, **params):
         """Get a registered resource."""
+        if resource_name not in self.resources:
+            self._last_failed = True
+            console.print(f"[yellow]Warning: Error in {self.name} server resource {resource_name}: Resource {resource_name} not found[/yellow]")
+            return None
+        return self._invoke("resource", resource_name, self.resources[resource_name], params)
+
+    def _invoke(self, kind: str, name: str, entry: Dict, params: Dict):
+        """Call a tool or resource through its circuit breakers."""
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = self._breakers.setdefault(name, CircuitBreaker(f"{self.name}.{name}"))
+        key = self._fallback_key(name, params) if entry["cache_fallback"] else None
+
+        if not breaker.allow():
+            return self._fail_fast(key)
+        if not self.breaker.allow():
+            breaker.cancel()
+            return self._fail_fast(key)
+
+        started = time.perf_counter()
         try:
-            if resource_name in self.resources:
-                result = self.resources[resource_name]["function"](**params)
-                self.error_state = False
-                return result
-            raise ValueError(f"Resource {resource_name} not found")
+            result = entry["function"](**params)
         except Exception as e:
-            self.error_state = True
-            console.print(f"[yellow]Warning: Error in {self.name} server resource {resource_name}: {str(e)}[/yellow]")
+            console.print(f"[yellow]Warning: Error in {self.name} server {kind} {name}: {str(e)}[/yellow]")
+            if not is_backend_failure(e):
+                # A bad request, e.g. wrong arguments, says nothing about the backend
+                breaker.cancel()
+                self.breaker.cancel()
+                return None
+            elapsed = time.perf_counter() - started
+            breaker.record(False, elapsed)
+            self.breaker.record(False, elapsed)
+            self._last_failed = True
+            return self._fallbacks.get(key) if key is not None else None
+
+        elapsed = time.perf_counter() - started
+        breaker.record(True, elapsed)
+        self.breaker.record(True, elapsed)
+        self._last_failed = False
+        if key is not None:
+            self._fallbacks[key] = result
+        return result
+
+    @staticmethod
+    def _fallback_key(name: str, params: Dict) -> Optional[Tuple]:
+        key = (name, tuple(sorted(params.items())))
+        try:
+            hash(key)
+        except TypeError:
             return None
+        return key
+
+    def _fail_fast(self, key: Optional[Tuple]):
+        self._last_failed = True
+        return self._fallbacks.get(key) if key is not None else None
+
+    def status(self) -> str:
+        """'available', 'degraded' (a tool is failing or the server is probing) or 'unavailable'."""
+        state = self.breaker.state
+        if state == OPEN:
+            return "unavailable"
+        breakers = list(self._breakers.values()) + self._backends
+        if state == HALF_OPEN or self._last_failed or any(breaker.state != CLOSED for breaker in breakers):
+            return "degraded"
+        return "available"
+
+    def open_circuits(self) -> List[str]:
+        """Names of tools, resources and backends that are currently failing fast."""
+        return ([name for name, breaker in self._breakers.items() if breaker.state == OPEN]
+                + [breaker.name for breaker in self._backends if breaker.state == OPEN])
 
 class CalendarServer(MCPToolServer):
     """MCP server for calendar operations."""
     
     def __init__(self):
-        super().__init__("calendar")
+        super().__init__("calendar", backends=[tools.calendar_breaker])
         self.register_tool("create_event", tools.create_calendar_event, 
             "Create a calendar event with title, start time, end time, and optional location/description")
         self.register_tool("list_events", tools.get_calendar_events,
-            "List calendar events for a given date range")
+            "List calendar events for a given date range", cache_fallback=True)
         self.register_tool("update_event", tools.update_calendar_event,
-            "Update an existing calendar event")
+            "Update an existing calendar event's summary, location, description or start/end time")
         self.register_tool("delete_event", tools.delete_calendar_event,
             "Delete a calendar event")
+        self.register_tool("batch_events", tools.batch_calendar_events,
+            "Create, update and delete many calendar events in one batched request")
 
 class NotesServer(MCPToolServer):
     """MCP server for note operations."""
     
     def __init__(self):
-        super().__init__("notes")
+        super().__init__("notes", backends=[tools.notes_breaker])
         self.register_tool("create_note", tools.create_note,
             "Create a new note with content, title, and optional tags")
         self.register_tool("get_notes", tools.get_notes,
-            "Get notes from a specific date")
+            "Get notes from a specific date", cache_fallback=True)
+        self.register_tool("find_relevant_notes", tools.get_relevant_notes,
+            "Find the notes and past briefings most similar to a question")
         self.register_tool("update_note", tools.update_note,
             "Update an existing note")
         self.register_tool("delete_note", tools.delete_note,
             "Delete a note")
+        self.register_tool("search_memory", search_memory,
+            "Full-text search over notes, todos and past briefings, best matches first")
 
 class WeatherServer(MCPToolServer):
     """MCP server for weather operations."""
     
     def __init__(self, location="New York"):
-        super().__init__("weather")
+        super().__init__("weather", backends=[tools.weather_breaker])
         self.location = location
         self.register_resource("current_weather", lambda: tools.get_weather(self.location),
             f"Get current weather for {self.location}")
@@ -112,6 +220,8 @@ class TodoServer(MCPToolServer):
             "Add a new todo item")
         self.register_tool("complete_todo", complete_todo,
             "Mark a todo as complete")
+        self.register_tool("search_memory", search_memory,
+            "Full-text search over todos, notes and past briefings, best matches first")
         self.register_resource("incomplete_todos", get_incomplete_todos,
             "Get list of incomplete todos")
 
@@ -122,17 +232,28 @@ class InteractiveMCPAgent:
     """
     
     def __init__(self):
-        self.agent = MCPAgent(location="New York")
-        self.conversation_history = []
+        self.agent = MCPAgent(location=DEFAULT_LOCATION)
+        # Today's conversation, resumed across restarts
+        self.conversation = ConversationMemory(get_store(), session=datetime.now().strftime("%Y-%m-%d"))
         
         # Initialize MCP servers
-        self.location = "New York"  # Could make this configurable
+        self.location = DEFAULT_LOCATION  # Could make this configurable
         self.servers = {
             "calendar": CalendarServer(),
             "notes": NotesServer(),
             "weather": WeatherServer(location=self.location),
             "todos": TodoServer()
         }
+        self.router = IntentRouter()
+        self._intent_handlers = {
+            WEATHER: self._weather,
+            LIST_EVENTS: self._list_events,
+            LIST_NOTES: self._list_notes,
+            LIST_TODOS: self._list_todos,
+            ADD_TODO: self._add_todo,
+            COMPLETE_TODO: self._complete_todo,
+            SEARCH_MEMORY: self._search_memory,
+        }
         
         # Initialize context with defaults
         self.context = {
@@ -144,42 +265,55 @@ class InteractiveMCPAgent:
             "todos": []
         }
     
-    def _update_context(self):
-        """Update context from all registered MCP servers."""
+    def _update_context(self, sources: Iterable[str]):
+        """
+        Update the given context sources from the registered MCP servers.
+        Reads go through the shared context snapshot store, so sources that
+        are still fresh (including ones the agent just fetched) are not refetched.
+        Args:
+            sources (iterable): Context sources the current turn needs
+        """
         today = datetime.now().strftime("%Y-%m-%d")
         self.context["date"] = today
-        
-        # Get resources from each server
-        # Weather
-        weather = self.servers["weather"].get_resource("current_weather")
-        if weather is not None:
-            self.context["weather"] = weather
-            
-        # Calendar
-        calendar = self.servers["calendar"].call_tool("list_events", start_date=today)
-        if calendar is not None:
-            self.context["calendar_events"] = calendar
-            
-        # Notes
-        notes = self.servers["notes"].call_tool("get_notes", from_date=today)
-        if notes is not None:
-            self.context["notes"] = notes
-            
-        # Todos
-        todos = self.servers["todos"].get_resource("incomplete_todos", date=today)
-        if todos is not None:
-            self.context["todos"] = todos
-    
-    def process_user_input(self, user_input: str) -> str:
-        """Process user input using MCP protocol."""
-        self._update_context()
-        
+
+        # Source -> (snapshot key, loader)
+        loaders = {
+            "weather": (self.location,
+                lambda: self.servers["weather"].get_resource("current_weather")),
+            "calendar_events": (today,
+                lambda: self.servers["calendar"].call_tool("list_events", start_date=today)),
+            "notes": (today,
+                lambda: self.servers["notes"].call_tool("get_notes", from_date=today)),
+            "todos": (today,
+                lambda: self.servers["todos"].get_resource("incomplete_todos", date=today)),
+        }
+        for source in sources:
+            key, loader = loaders[source]
+            value = context_store.get(source, key, loader)
+            if value is not None:
+                self.context[source] = value
+
+    def process_user_input(self, user_input: str,
+                           on_token: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Process user input using MCP protocol.
+        Direct commands matched by the intent router are answered by the MCP
+        servers without an LLM call; LLM-backed answers are streamed chunk by
+        chunk to on_token when given.
+        """
+        route = self.router.route(user_input)
+        if route is not None and route.intent in self._intent_handlers:
+            return self._handle_intent(route)
+
         # Generate capability information
         capabilities = {}
         for server_name, server in self.servers.items():
             capabilities[server_name] = {
-                "status": "available" if not server.error_state else "error"
+                "status": server.status()
             }
+            open_circuits = server.open_circuits()
+            if open_circuits:
+                capabilities[server_name]["failing"] = open_circuits
             if server.tools:
                 capabilities[server_name]["tools"] = {
                     name: info["description"] for name, info in server.tools.items()
@@ -192,39 +326,120 @@ class InteractiveMCPAgent:
         # Update context with capabilities
         self.context["capabilities"] = capabilities
         
-        # Add user input to context
+        # Add user input and the bounded conversation so far to context
         self.context["user_input"] = user_input
+        self.context["conversation"] = self.conversation.render()
         
-        # Handle different types of queries
-        if user_input.lower() in ['what can you do', 'help', 'capabilities', 'what are your tools']:
-            response = self.agent.get_capabilities()
-        
-        # Handle weather queries
-        elif any(word in user_input.lower() for word in ['weather', 'temperature', 'forecast']):
-            # Extract location if provided
-            import re
-            location_match = re.search(r'(?:in|at|for)\s+([A-Za-z\s]+)(?:\?|$)', user_input)
-            if location_match:
-                location = location_match.group(1).strip()
-                response = self.agent.get_weather(location)
-            else:
-                response = self.agent.get_weather()
+        # Handle different types of queries; each fetches only the sources its prompt uses
+        if route is not None and route.intent == CAPABILITIES:
+            response = self.agent.get_capabilities(capabilities)
         
         # Handle all other queries
         else:
             prompt = get_general_prompt()
-            response = generate_response(prompt, self.context)
+            self._update_context(prompt.sources - {"notes"})
+            # Only the notes relevant to the question, not every recent note
+            notes = self.servers["notes"].call_tool("find_relevant_notes", query=user_input,
+                                                    limit=RELEVANT_NOTES)
+            if notes is not None:
+                self.context["notes"] = notes
+            else:
+                self._update_context({"notes"})
+            response = complete(prompt, self.context, on_token).text
             
         return response
 
+    def _handle_intent(self, route: Route) -> str:
+        """Run a routed command against the MCP servers."""
+        return self._intent_handlers[route.intent](**route.slots)
+
+    def _weather(self, location: Optional[str] = None) -> str:
+        return self.agent.get_weather(location)
+
+    def _list_events(self, date: str) -> str:
+        events = self.servers["calendar"].call_tool("list_events", start_date=date)
+        if events is None:
+            return "Sorry, I couldn't reach your calendar right now."
+        if not events:
+            return f"No events on {date}."
+        return f"**Events on {date}:**\n" + "\n".join(f"- {format_event(event)}" for event in events)
+
+    def _list_notes(self, date: str) -> str:
+        notes = self.servers["notes"].call_tool("get_notes", from_date=date)
+        if notes is None:
+            return "Sorry, I couldn't reach your notes right now."
+        if not notes:
+            return f"No notes since {date}."
+        return f"**Notes since {date}:**\n" + "\n".join(f"- {format_note(note)}" for note in notes)
+
+    def _list_todos(self, date: str) -> str:
+        todos = self.servers["todos"].get_resource("incomplete_todos", date=date)
+        if todos is None:
+            return "Sorry, I couldn't load your todos right now."
+        if not todos:
+            return f"No open todos for {date}."
+        return f"**Open todos for {date}:**\n" + "\n".join(f"- {format_todo(todo)}" for todo in todos)
+
+    def _add_todo(self, text: str) -> str:
+        todo_id = self.servers["todos"].call_tool(
+            "add_todo", date=datetime.now().strftime("%Y-%m-%d"), todo=text)
+        if todo_id is None:
+            return "Sorry, I couldn't save that todo."
+        return f"Added todo #{todo_id}: {text}"
+
+    def _complete_todo(self, todo_id: str) -> str:
+        updated = self.servers["todos"].call_tool("complete_todo", todo_id=int(todo_id))
+        if updated is None:
+            return f"Sorry, I couldn't update todo #{todo_id}."
+        if not updated:
+            return f"There is no open todo #{todo_id}."
+        return f"Marked todo #{todo_id} as complete."
+
+    def _search_memory(self, query: str, recency: Optional[str] = None) -> str:
+        # "When did I last ..." wants the latest mention, not the best-matching one
+        results = self.servers["notes"].call_tool("search_memory", query=query, limit=SEARCH_RESULTS,
+                                                  newest_first=recency is not None)
+        if results is None:
+            return "Sorry, I couldn't search your history right now."
+        if not results:
+            return f"Nothing found for \"{query}\"."
+        lines = [f"- {result['date'] or 'undated'} {result['kind']}"
+                 f"{' ' + result['title'] if result['title'] else ''}: {result['snippet']}"
+                 for result in results]
+        return f"**Matches for \"{query}\":**\n" + "\n".join(lines)
+
+    def _render_streaming(self, produce: Callable[[Callable[[str], None]], str]) -> str:
+        """
+        Render a response incrementally as markdown while it streams in.
+        Args:
+            produce (callable): Takes an on_token callback and returns the full text
+        Returns:
+            str: Full response text
+        """
+        text = ""
+        with Live(Markdown(text), console=console, refresh_per_second=12,
+                  vertical_overflow="visible") as live:
+            def on_token(chunk: str):
+                nonlocal text
+                text += chunk
+                live.update(Markdown(text))
+
+            response = produce(on_token)
+            live.update(Markdown(response))
+        return response
+
     def run(self):
         """Main conversation loop."""
         try:
             # Start with morning briefing
             console.print("[bold blue]🤖 MCP Assistant[/bold blue]")
-            console.print("\nGenerating your morning briefing...")
-            briefing = self.agent.run_morning_briefing()
-            console.print(Markdown(briefing))
+            briefing = self.agent.get_prewarmed_briefing(BRIEFING_MAX_AGE)
+            if briefing is not None:
+                # Kept current by the briefing scheduler (--daemon)
+                console.print(Markdown(briefing))
+            else:
+                console.print("\nGenerating your morning briefing...")
+                self._render_streaming(self.agent.run_morning_briefing)
 
             # Main conversation loop
             while True:
@@ -234,16 +449,11 @@ class InteractiveMCPAgent:
                     console.print("\n[yellow]Goodbye! Have a great day![/yellow]")
                     break
 
-                # Process input and generate response
-                response = self.process_user_input(user_input)
-                self.conversation_history.append({
-                    "user": user_input,
-                    "assistant": response
-                })
-                
-                # Display response
+                # Process input and stream the response as it is generated
                 console.print()  # Print blank line
-                console.print(Markdown(response))
+                response = self._render_streaming(
+                    lambda on_token: self.process_user_input(user_input, on_token=on_token))
+                self.conversation.add_turn(user_input, response)
 
         except KeyboardInterrupt:
             console.print("\n[yellow]Exiting...[/yellow]")
@@ -252,9 +462,57 @@ class InteractiveMCPAgent:
             import traceback
             console.print(traceback.format_exc())
 
-def main():
+def print_startup_profile(phases: List[tuple]):
+    """Print how long each startup phase took and which client libraries are still unloaded."""
+    console.print("[bold blue]Startup profile[/bold blue]")
+    total = 0.0
+    for name, seconds in phases:
+        total += seconds
+        console.print(f"  {name:<28}{seconds * 1000:8.1f} ms")
+    console.print(f"  {'total':<28}{total * 1000:8.1f} ms")
+    deferred = [name for name in DEFERRED_MODULES if name not in sys.modules]
+    console.print(f"  Deferred until first use: {', '.join(deferred) or 'none'}")
+    console.print("  For a per-module breakdown run: python -X importtime interactive_cli.py --profile-startup")
+
+def main(argv: Optional[List[str]] = None):
     """Run the MCP-compliant interactive agent."""
+    parser = argparse.ArgumentParser(description="MCP personal assistant")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Report import and initialization time, then exit")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Keep the morning briefing and context pre-warmed in the background")
+    parser.add_argument("--briefing-time", default=BRIEFING_TIME, metavar="HH:MM",
+                        help=f"Time of day the daemon starts pre-warming the briefing (default {BRIEFING_TIME})")
+    parser.add_argument("--refresh-interval", type=float, default=REFRESH_INTERVAL, metavar="SECONDS",
+                        help=f"Seconds between daemon refreshes (default {REFRESH_INTERVAL})")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    configure_logging()
+    if args.daemon:
+        try:
+            scheduler = BriefingScheduler(MCPAgent(location=DEFAULT_LOCATION),
+                                          briefing_time=args.briefing_time,
+                                          refresh_interval=args.refresh_interval)
+        except ValueError:
+            parser.error(f"--briefing-time must be HH:MM, got {args.briefing_time!r}")
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            scheduler.stop()
+        return
+    logging_configured = time.perf_counter()
     agent = InteractiveMCPAgent()
+    initialized = time.perf_counter()
+
+    if args.profile_startup:
+        print_startup_profile([
+            ("import rich", _rich_imported - _import_started),
+            ("import mcp and groq_api", _import_finished - _rich_imported),
+            ("configure logging", logging_configured - started),
+            ("initialize agent", initialized - logging_configured),
+        ])
+        return
     agent.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,118 @@
+"""
+llm_cache.py
+Persistent SQLite-backed cache for LLM responses.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+CACHE_PATH = os.path.join(CACHE_DIR, 'llm_cache.db')
+
+# Default lifetime of a cached response, in seconds
+DEFAULT_TTL = 6 * 60 * 60
+# Least recently used entries beyond this count are evicted
+MAX_ENTRIES = 500
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache of LLM completions keyed by a hash of the request.
+    Entries expire after a TTL and survive restarts in an SQLite file.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = DEFAULT_TTL,
+                 max_entries: int = MAX_ENTRIES):
+        """
+        Args:
+            path (str): SQLite file path
+            ttl (float): Default entry lifetime in seconds
+            max_entries (int): Maximum number of cached responses
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, system: str, prompt: str,
+                 temperature: float, max_tokens: int, namespace: str = "") -> str:
+        """Hash the parameters that determine a completion, scoped to a namespace such as a template id."""
+        payload = json.dumps([namespace, model, system, prompt, temperature, max_tokens])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            cache_dir = os.path.dirname(self.path)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('''CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a live cached response and mark it recently used."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute('SELECT response FROM responses WHERE key = ? AND expires_at > ?',
+                               (key, now)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            with conn:
+                conn.execute('UPDATE responses SET last_used = ? WHERE key = ?', (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str, ttl: Optional[float] = None) -> None:
+        """Store a response, then drop expired and least recently used entries."""
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO responses (key, response, expires_at, last_used) '
+                             'VALUES (?, ?, ?, ?)', (key, response, expires_at, now))
+                conn.execute('DELETE FROM responses WHERE expires_at <= ?', (now,))
+                conn.execute('DELETE FROM responses WHERE key IN (SELECT key FROM responses '
+                             'ORDER BY last_used DESC, rowid DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute('DELETE FROM responses')
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the current entry count."""
+        with self._lock:
+            entries = self._connection().execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+            }
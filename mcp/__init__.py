@@ -9,6 +9,7 @@ from .tools import (
     create_calendar_event,
     update_calendar_event,
     delete_calendar_event,
+    batch_calendar_events,
     get_notes,
     create_note,
     update_note,
@@ -18,9 +19,13 @@ from .tools import (
 from .memory import (
     store_briefing,
     get_briefing,
+    get_latest_briefing,
     store_todo,
+    store_todos,
+    store_briefing_with_todos,
     get_incomplete_todos,
-    complete_todo
+    complete_todo,
+    search_memory
 )
 
 __all__ = [
@@ -29,6 +34,7 @@ __all__ = [
     'create_calendar_event',
     'update_calendar_event',
     'delete_calendar_event',
+    'batch_calendar_events',
     'get_notes',
     'create_note',
     'update_note',
@@ -36,7 +42,11 @@ __all__ = [
     'get_weather',
     'store_briefing',
     'get_briefing',
+    'get_latest_briefing',
     'store_todo',
+    'store_todos',
+    'store_briefing_with_todos',
     'get_incomplete_todos',
-    'complete_todo'
+    'complete_todo',
+    'search_memory'
 ]
@@ -7,71 +7,94 @@ Implements Model-Context Protocol (MCP) with Instructions, Tools, Memory, and Ch
 from datetime import datetime, timedelta
 import logging
 import os
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional
 
 from . import tools
 from . import memory
 from . import instructions
-from groq_api import generate_response
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('mcp_agent.log'),
-        logging.StreamHandler()
-    ]
-)
+from .context import ContextGatherer, FRESH, context_store
+from .serializer import serialize_context
+from groq_api import complete, generate_response
+
 logger = logging.getLogger(__name__)
 
+def configure_logging(log_file: str = 'mcp_agent.log') -> None:
+    """
+    Configure application logging. Called by entry points rather than at
+    import, so importing the package opens no log file.
+    Args:
+        log_file (str): Path of the log file
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ]
+    )
+
 class MCPAgent:
     def __init__(self, location: str = "New York"):
         """Initialize the MCP agent with default location for weather."""
         self.location = location
-        self.today = datetime.now().strftime("%Y-%m-%d")
-        self.yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+        self.set_date(datetime.now())
+        self._gatherer = ContextGatherer(
+            sources={
+                "calendar_events": lambda: context_store.get(
+                    "calendar_events", self.today,
+                    lambda: tools.get_calendar_events(start_date=self.today)),
+                "notes": lambda: context_store.get(
+                    "notes", self.yesterday,
+                    lambda: tools.get_notes(from_date=self.yesterday)),
+                "weather": lambda: context_store.get(
+                    "weather", self.location,
+                    lambda: tools.get_weather(self.location)),
+                "todos": lambda: context_store.get(
+                    "todos", self.yesterday,
+                    lambda: memory.get_incomplete_todos(self.yesterday)),
+            },
+            defaults={
+                "calendar_events": [],
+                "notes": [],
+                "weather": "Weather unavailable",
+                "todos": [],
+            }
+        )
         logger.info(f"Initialized MCPAgent with location: {location}")
 
-    def _get_context(self) -> Dict:
+    def set_date(self, now: datetime) -> None:
+        """
+        Set the day the agent works on, e.g. when a long-running process crosses midnight.
+        Args:
+            now (datetime): Current local time
+        """
+        self.today = now.strftime("%Y-%m-%d")
+        self.yesterday = (now - timedelta(days=1)).strftime("%Y-%m-%d")
+
+    def _get_context(self, sources: Optional[Iterable[str]] = None) -> Dict:
         """
-        Gather context from all tools for the briefing.
+        Gather context from the tools.
+        Sources run concurrently, each with its own deadline; a source that fails
+        or times out contributes its last good value or a default instead.
+        Args:
+            sources (iterable, optional): Sources to fetch, e.g. a template's
+                sources. Defaults to all of them.
         Returns:
-            dict: Combined context from all tools
+            dict: Combined context from all tools, with per-source status
+                  under "source_status"
         """
         logger.debug("Gathering context from tools...")
-        
-        try:
-            # Get today's calendar events
-            calendar_events = tools.get_calendar_events(start_date=self.today)
-            logger.debug(f"Retrieved {len(calendar_events)} calendar events")
-
-            # Get yesterday's notes
-            yesterday_notes = tools.get_notes(from_date=self.yesterday)
-            logger.debug(f"Retrieved {len(yesterday_notes)} notes from yesterday")
-
-            # Get weather info
-            weather_info = tools.get_weather(self.location)
-            logger.debug("Retrieved weather information")
-
-            # Get incomplete todos
-            incomplete_todos = memory.get_incomplete_todos(self.yesterday)
-            logger.debug(f"Retrieved {len(incomplete_todos)} incomplete todos")
-
-            context = {
-                "calendar_events": calendar_events,
-                "notes": yesterday_notes,
-                "weather": weather_info,
-                "todos": incomplete_todos,
-                "date": self.today
-            }
-            
+
+        context, status = self._gatherer.gather(sources)
+        context["date"] = self.today
+        context["source_status"] = status
+
+        if all(state == FRESH for state in status.values()):
             logger.info("Successfully gathered all context")
-            return context
-            
-        except Exception as e:
-            logger.error(f"Error gathering context: {str(e)}")
-            raise
+        else:
+            logger.warning(f"Gathered partial context: {status}")
+        return context
 
     def _extract_todos(self, summary: str) -> List[str]:
         """
@@ -90,43 +113,95 @@ class MCPAgent:
                 todos.append(line.replace('TODO:', '').replace('- [ ]', '').strip())
         return todos
 
-    def run_morning_briefing(self) -> str:
+    def run_morning_briefing(self, on_token: Optional[Callable[[str], None]] = None,
+                             verify: bool = False) -> str:
         """
         Run the morning briefing chain-of-tools flow.
+        Args:
+            on_token (callable, optional): Called with each text chunk as the
+                briefing streams in
+            verify (bool): Mark the briefing verified for get_prewarmed_briefing;
+                only the briefing scheduler, which re-checks it every tick, does
         Returns:
             str: Generated briefing summary
         """
         # 1. Instructions: Get the prompt template
         prompt = instructions.get_morning_briefing_prompt()
 
-        # 2. Tools: Gather context from all tools
-        context = self._get_context()
+        # 2. Tools: Gather the context the template uses; it compacts it to its budget
+        context = self._get_context(prompt.sources)
 
-        # 3. Generate briefing using LLM
-        briefing = generate_response(
-            prompt=prompt,
-            context=context
-        )
+        # 3. Memory: Reuse today's briefing if it was generated from the same inputs
+        fingerprint = prompt.fingerprint(context)
+        stored = memory.get_latest_briefing(self.today)
+        if stored and stored[2] == fingerprint:
+            logger.info("Context unchanged since the last briefing; reusing it")
+            if verify:
+                memory.mark_briefing_verified(stored[0])
+            if on_token is not None:
+                on_token(stored[1])
+            return stored[1]
 
-        # 4. Memory: Store briefing and extract todos
-        memory.store_briefing(self.today, briefing)
-        
-        # Extract and store todos
-        todos = self._extract_todos(briefing)
-        for todo in todos:
-            memory.store_todo(self.today, todo)
+        # 4. Generate briefing using LLM
+        completion = complete(prompt, context, on_token)
+        if completion.failed:
+            # Shown to the user, but never stored as the day's briefing
+            logger.warning("Morning briefing generation failed; not storing it")
+            return completion.text
+
+        # 5. Memory: Store briefing and its extracted todos in one transaction;
+        # a regenerated briefing leaves the todos stored with the day's first one
+        briefing = completion.text
+        todos = [] if stored else self._extract_todos(briefing)
+        memory.store_briefing_with_todos(self.today, briefing, todos, fingerprint=fingerprint, verified=verify)
 
         logger.info("Morning briefing completed and stored")
         return briefing
 
-    def complete_todo(self, todo_id: int) -> None:
+    def refresh_briefing(self) -> Optional[str]:
+        """
+        Check today's stored briefing against the current inputs without
+        generating it again. A briefing whose fingerprint still matches is
+        marked verified; a stale one loses its verification.
+        Returns:
+            str: Today's briefing, or None if none has been generated yet or
+                 its inputs have changed
+        """
+        stored = memory.get_latest_briefing(self.today)
+        if stored is None:
+            return None
+        prompt = instructions.get_morning_briefing_prompt()
+        current = stored[2] == prompt.fingerprint(self._get_context(prompt.sources))
+        memory.mark_briefing_verified(stored[0], verified=current)
+        if not current:
+            logger.info("Briefing inputs changed since it was generated")
+            return None
+        return stored[1]
+
+    def get_prewarmed_briefing(self, max_age: float) -> Optional[str]:
+        """
+        Return today's briefing without gathering context, if the briefing
+        scheduler verified it against its inputs within max_age seconds.
+        Args:
+            max_age (float): Maximum age in seconds
+        Returns:
+            str: Briefing summary, or None if it must be regenerated
+        """
+        return memory.get_verified_briefing(self.today, max_age)
+
+    def complete_todo(self, todo_id: int) -> bool:
         """
         Mark a todo item as completed.
         Args:
             todo_id (int): ID of the todo item
+        Returns:
+            bool: False if there is no open todo with that id
         """
-        memory.complete_todo(todo_id)
+        if not memory.complete_todo(todo_id):
+            logger.warning(f"No open todo with ID {todo_id}")
+            return False
         logger.info(f"Marked todo ID {todo_id} as completed")
+        return True
 
     def get_previous_briefing(self, date: Optional[str] = None) -> Optional[str]:
         """
@@ -144,14 +219,19 @@ class MCPAgent:
             logger.info(f"No briefing found for {date}")
         return briefing
 
-    def get_capabilities(self) -> str:
+    def get_capabilities(self, capabilities: Optional[Dict] = None) -> str:
         """
         Get a description of what the agent can do.
+        Args:
+            capabilities (dict, optional): Tool servers and their tools, as built
+                by the interactive CLI
         Returns:
             str: Capability description
         """
         prompt = instructions.get_capability_prompt()
-        context = self._get_context()
+        context = self._get_context(prompt.sources)
+        if capabilities is not None:
+            context["capabilities"] = capabilities
         return generate_response(prompt=prompt, context=context)
 
     def get_weather(self, location: str = None) -> str:
@@ -172,12 +252,18 @@ class MCPAgent:
             logger.error(f"Error getting weather: {str(e)}")
             return f"Sorry, I couldn't get the weather information for {location or self.location}."
         
-    def _generate_response(self, prompt: str, context: dict = None) -> str:
+    def _generate_response(self, prompt: str, context: dict = None,
+                           on_token: Optional[Callable[[str], None]] = None) -> str:
         """
         Generate a direct response to a prompt using the LLM.
         Args:
             prompt (str): The prompt to send to the LLM
+            on_token (callable, optional): Called with each text chunk as it streams in
         Returns:
             str: Generated response
         """
-        return generate_response(prompt=prompt, context=self._get_context())
+        context = self._get_context(getattr(prompt, "sources", None))
+        if not isinstance(prompt, instructions.PromptTemplate):
+            # Ad-hoc prompts get the same compact context as the general template
+            context = serialize_context(context, instructions.GENERAL_PROMPT.token_budget)
+        return complete(prompt, context, on_token).text
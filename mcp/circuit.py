@@ -0,0 +1,181 @@
+"""
+circuit.py
+Circuit breakers for tool backends.
+A breaker watches the outcome and latency of recent calls. When too many of
+them fail or are too slow it opens, and callers fail fast instead of waiting
+on a dead backend. After a cooldown it lets a single probe call through
+(half-open); the probe's outcome closes the breaker or reopens it.
+"""
+
+from collections import deque
+import logging
+import threading
+import time
+from typing import Callable, Deque, Dict, Optional, TypeVar
+
+from tool_utils.ratelimit import RATE_LIMITED, status_code
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Share of failed or slow calls in the window that opens the breaker
+FAILURE_RATE_THRESHOLD = 0.5
+# Calls needed in the window before the failure rate is trusted
+MIN_CALLS = 3
+# Number of recent calls the failure rate is computed over
+WINDOW_SIZE = 10
+# Calls slower than this many seconds count as failures
+SLOW_CALL_SECONDS = 8.0
+# Seconds an open breaker waits before letting a probe through
+COOLDOWN_SECONDS = 30.0
+# Errors that mean the request itself was wrong, e.g. bad tool arguments
+CALLER_ERRORS = (TypeError, ValueError, KeyError)
+
+def is_backend_failure(error: BaseException) -> bool:
+    """
+    Whether an error says something about the backend's health.
+    Caller errors and 4xx answers other than 429 (e.g. an unknown city) do not.
+    """
+    if isinstance(error, CALLER_ERRORS):
+        return False
+    status = status_code(error)
+    return status is None or status == RATE_LIMITED or not 400 <= status < 500
+
+
+class CircuitOpenError(Exception):
+    """Raised by CircuitBreaker.call() instead of calling a backend whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker over a sliding window of calls.
+    Callers ask allow() before a call and report it with record(); a call that
+    was allowed but not made must be given back with cancel().
+    """
+
+    def __init__(self, name: str, failure_rate: float = FAILURE_RATE_THRESHOLD,
+                 min_calls: int = MIN_CALLS, window: int = WINDOW_SIZE,
+                 slow_call_seconds: float = SLOW_CALL_SECONDS,
+                 cooldown: float = COOLDOWN_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            name (str): Name used in logs, e.g. "notes.get_notes"
+            failure_rate (float): Failed share of the window that opens the breaker
+            min_calls (int): Calls needed before the breaker can open
+            window (int): Number of recent calls considered
+            slow_call_seconds (float): Latency above which a call counts as failed
+            cooldown (float): Seconds to stay open before probing
+            clock (callable): Monotonic time source
+        """
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.slow_call_seconds = slow_call_seconds
+        self.cooldown = cooldown
+        self._clock = clock
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.cooldown:
+            self._state = HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now. In half-open state only one probe is allowed at a time."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def cancel(self) -> None:
+        """Give back an allowed call that was not made."""
+        with self._lock:
+            self._probing = False
+
+    def record(self, success: bool, elapsed: float = 0.0) -> None:
+        """
+        Report the outcome of an allowed call.
+        Args:
+            success (bool): Whether the call succeeded
+            elapsed (float): Call duration in seconds; slow calls count as failures
+        """
+        failed = not success or elapsed > self.slow_call_seconds
+        with self._lock:
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._probing = False
+                if failed:
+                    self._open()
+                else:
+                    logger.info(f"Circuit '{self.name}' closed after a successful probe")
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                return
+            self._outcomes.append(failed)
+            if (state == CLOSED and len(self._outcomes) >= self.min_calls
+                    and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate):
+                self._open()
+
+    def call(self, func: Callable[[], T]) -> T:
+        """
+        Run func through the breaker, recording its outcome and latency.
+        Errors that are not backend failures are raised without being recorded.
+        Args:
+            func (callable): Makes the backend call
+        Returns:
+            The result of func
+        Raises:
+            CircuitOpenError: If the breaker is failing fast
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+        started = self._clock()
+        try:
+            result = func()
+        except Exception as e:
+            if is_backend_failure(e):
+                self.record(False, self._clock() - started)
+            else:
+                self.cancel()
+            raise
+        self.record(True, self._clock() - started)
+        return result
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+        logger.warning(f"Circuit '{self.name}' opened; failing fast for {self.cooldown:.0f}s")
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        """State and recent failure rate, for status reporting."""
+        with self._lock:
+            state = self._current_state()
+            calls = len(self._outcomes)
+            return {
+                "state": state,
+                "failure_rate": sum(self._outcomes) / calls if calls else 0.0,
+                "retry_in": (max(self.cooldown - (self._clock() - self._opened_at), 0.0)
+                             if state == OPEN else None),
+            }
@@ -0,0 +1,171 @@
+"""
+context.py
+Concurrent context gathering and the shared context snapshot store.
+Every context source runs in parallel with its own deadline, so gathering
+costs about as much as the slowest source instead of the sum of all of them.
+Results are kept in a process-wide snapshot store with per-source TTLs that
+both the agent and the interactive CLI read from.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Source status markers
+FRESH = "fresh"
+STALE = "stale"
+UNAVAILABLE = "unavailable"
+
+# Context keys that are fetched from a tool; every other key is built locally
+CONTEXT_SOURCES = frozenset({"calendar_events", "notes", "weather", "todos"})
+
+# Per-source deadlines in seconds
+DEFAULT_TIMEOUT = 5.0
+SOURCE_TIMEOUTS = {
+    "calendar_events": 8.0,
+    "notes": 8.0,
+    "weather": 5.0,
+    "todos": 2.0,
+}
+
+# Per-source snapshot lifetimes in seconds
+SOURCE_TTLS = {
+    "calendar_events": 30,
+    "notes": 120,
+    "weather": 600,
+    "todos": 30,
+}
+
+# Shared worker pool. A source that misses its deadline keeps running here
+# in the background instead of blocking the caller.
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="mcp-context")
+
+
+class ContextGatherer:
+    """
+    Fan out context sources concurrently and collect partial results.
+    A source that fails or misses its deadline falls back to its last good
+    value (marked stale) or to its default (marked unavailable).
+    """
+
+    def __init__(self, sources: Dict[str, Callable[[], Any]],
+                 timeouts: Optional[Dict[str, float]] = None,
+                 defaults: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            sources (dict): Source name -> zero-argument loader
+            timeouts (dict, optional): Per-source deadline overrides in seconds
+            defaults (dict, optional): Value used when a source is unavailable
+        """
+        self.sources = sources
+        self.timeouts = {**SOURCE_TIMEOUTS, **(timeouts or {})}
+        self.defaults = defaults or {}
+        self._last_good: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def gather(self, names: Optional[Iterable[str]] = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Run the requested sources in parallel.
+        Args:
+            names (iterable, optional): Sources to run. Defaults to all sources.
+        Returns:
+            tuple: (results by source name, status by source name)
+        """
+        names = list(self.sources) if names is None else list(names)
+        started = time.monotonic()
+        futures = {name: _executor.submit(self.sources[name]) for name in names}
+
+        results: Dict[str, Any] = {}
+        status: Dict[str, str] = {}
+        for name, future in futures.items():
+            deadline = started + self.timeouts.get(name, DEFAULT_TIMEOUT)
+            try:
+                value = future.result(timeout=max(deadline - time.monotonic(), 0))
+            except FutureTimeout:
+                logger.warning(f"Context source '{name}' missed its deadline")
+                value, state = self._fallback(name)
+            except Exception as e:
+                logger.error(f"Context source '{name}' failed: {str(e)}")
+                value, state = self._fallback(name)
+            else:
+                with self._lock:
+                    self._last_good[name] = value
+                state = FRESH
+            results[name] = value
+            status[name] = state
+
+        logger.debug(f"Gathered context in {time.monotonic() - started:.2f}s: {status}")
+        return results, status
+
+    def _fallback(self, name: str) -> Tuple[Any, str]:
+        """Return the last good value for a source, or its default."""
+        with self._lock:
+            if name in self._last_good:
+                return self._last_good[name], STALE
+        return self.defaults.get(name), UNAVAILABLE
+
+
+class ContextStore:
+    """
+    Process-wide snapshot cache for context sources.
+    Entries are keyed by (source, key) so different dates or locations of the
+    same source are cached independently, and expire after the source's TTL.
+    Writes invalidate a whole source slice without touching the others.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            ttls (dict, optional): Per-source TTL overrides in seconds
+        """
+        self.ttls = {**SOURCE_TTLS, **(ttls or {})}
+        self._entries: Dict[Tuple[str, Hashable], Tuple[float, Any]] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, source: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return a fresh snapshot, calling the loader on a miss or expiry.
+        A loader result of None is returned but not cached.
+        Args:
+            source (str): Source name, e.g. "weather"
+            key (hashable): Source arguments, e.g. a date or location
+            loader (callable): Zero-argument function producing the value
+        Returns:
+            Cached or freshly loaded value
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((source, key))
+            generation = self._generations.get(source, 0)
+        if entry is not None and now - entry[0] < self.ttls.get(source, 0):
+            return entry[1]
+
+        value = loader()
+        if value is not None:
+            with self._lock:
+                # Skip the write if the source was invalidated mid-load
+                if self._generations.get(source, 0) == generation:
+                    self._entries[(source, key)] = (time.monotonic(), value)
+        return value
+
+    def invalidate(self, source: str) -> None:
+        """Drop every cached snapshot of a source."""
+        with self._lock:
+            self._generations[source] = self._generations.get(source, 0) + 1
+            for entry_key in [k for k in self._entries if k[0] == source]:
+                del self._entries[entry_key]
+        logger.debug(f"Invalidated context source '{source}'")
+
+    def clear(self) -> None:
+        """Drop all cached snapshots."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared snapshot store used by MCPAgent and InteractiveMCPAgent
+context_store = ContextStore()
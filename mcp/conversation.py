@@ -0,0 +1,130 @@
+"""
+conversation.py
+Bounded conversation memory for follow-up questions.
+Recent turns are kept verbatim within a token budget and older turns are
+folded into an extractive rolling summary with its own budget, so the
+conversation part of a prompt stays the same size however long a session
+runs. Turns and summary are persisted in the memory database.
+"""
+
+import re
+import threading
+from typing import List, Tuple
+
+from .memory import MemoryStore
+from .serializer import CHARS_PER_TOKEN, count_tokens
+
+# Token budget for recent turns kept verbatim
+WINDOW_TOKENS = 400
+# Token budget for the rolling summary of older turns
+SUMMARY_TOKENS = 150
+# Most turns kept verbatim, however short
+MAX_TURNS = 12
+# Longest excerpt of each side of a turn kept in the summary, in characters
+SUMMARY_EXCERPT_CHARS = 90
+
+def _excerpt(text: str, limit: int) -> str:
+    """First sentence of a text, clipped to limit characters."""
+    text = ' '.join(text.split())
+    sentence = re.split(r'(?<=[.!?])\s', text, maxsplit=1)[0]
+    if len(sentence) > limit:
+        sentence = sentence[:limit].rstrip() + '…'
+    return sentence
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit].rstrip() + '…'
+
+def summarize_turn(user_text: str, assistant_text: str) -> str:
+    """One summary line for a turn: the question and the gist of the answer."""
+    return (f"User asked: {_excerpt(user_text, SUMMARY_EXCERPT_CHARS)} "
+            f"→ {_excerpt(assistant_text, SUMMARY_EXCERPT_CHARS)}")
+
+def _newest_within(lines: List[str], budget: int) -> List[str]:
+    """Keep the newest lines whose combined size fits the token budget."""
+    kept, used = [], 0
+    for line in reversed(lines):
+        used += count_tokens(line) + 1
+        if used > budget:
+            break
+        kept.append(line)
+    return list(reversed(kept))
+
+
+class ConversationMemory:
+    """
+    Ring buffer of conversation turns with a rolling summary, persisted per session.
+    Adding a turn that pushes the window over WINDOW_TOKENS or MAX_TURNS folds
+    the oldest turns into the summary, which keeps only its newest lines
+    within SUMMARY_TOKENS.
+    """
+
+    def __init__(self, store: MemoryStore, session: str,
+                 window_tokens: int = WINDOW_TOKENS, summary_tokens: int = SUMMARY_TOKENS,
+                 max_turns: int = MAX_TURNS):
+        """
+        Args:
+            store (MemoryStore): Database the conversation is persisted in
+            session (str): Session name, e.g. the date; a stored session is resumed
+            window_tokens (int): Token budget for verbatim recent turns
+            summary_tokens (int): Token budget for the rolling summary
+            max_turns (int): Maximum number of verbatim turns
+        """
+        self.store = store
+        self.session = session
+        self.window_tokens = window_tokens
+        self.summary_tokens = summary_tokens
+        self.max_turns = max_turns
+        self._lock = threading.Lock()
+        self._turns: List[Tuple[int, str, str, int]] = list(store.get_turns(session))
+        self._summary = store.get_conversation_summary(session) or ""
+
+    def add_turn(self, user_text: str, assistant_text: str) -> None:
+        """Record a completed turn and fold old turns into the summary if needed."""
+        tokens = count_tokens(user_text) + count_tokens(assistant_text)
+        with self._lock:
+            turn_id = self.store.append_turn(self.session, user_text, assistant_text, tokens)
+            self._turns.append((turn_id, user_text, assistant_text, tokens))
+            self._compact()
+
+    def _compact(self) -> None:
+        folded = []
+        # The latest turn always stays verbatim; render() clips it if oversized
+        while len(self._turns) > 1 and (len(self._turns) > self.max_turns or
+                                        sum(turn[3] for turn in self._turns) > self.window_tokens):
+            folded.append(self._turns.pop(0))
+        if not folded:
+            return
+        lines = self._summary.splitlines() + [summarize_turn(user, assistant)
+                                              for _, user, assistant, _ in folded]
+        self._summary = "\n".join(_newest_within(lines, self.summary_tokens))
+        self.store.fold_turns(self.session, folded[-1][0], self._summary)
+
+    @property
+    def summary(self) -> str:
+        return self._summary
+
+    def turns(self) -> List[Tuple[str, str]]:
+        """Verbatim recent turns as (user text, assistant text), oldest first."""
+        with self._lock:
+            return [(user, assistant) for _, user, assistant, _ in self._turns]
+
+    def render(self) -> str:
+        """
+        The conversation for a prompt: the rolling summary, then the recent turns.
+        Returns:
+            str: Conversation text within about window_tokens + summary_tokens, or "none"
+        """
+        limit = self.window_tokens * CHARS_PER_TOKEN // 2
+        with self._lock:
+            parts = []
+            if self._summary:
+                parts.append(f"Earlier:\n{self._summary}")
+            for _, user, assistant, _ in self._turns:
+                parts.append(f"User: {_clip(user, limit)}\nAssistant: {_clip(assistant, limit)}")
+        return "\n".join(parts) if parts else "none"
+
+    def clear(self) -> None:
+        with self._lock:
+            self.store.clear_conversation(self.session)
+            self._turns = []
+            self._summary = ""
@@ -1,13 +1,148 @@
 """
 instructions.py
 Prompt templates and LLM goals for the MCP agent.
+Templates are parsed once at import into a registry. Each has a stable id,
+the context keys it needs, and a token budget for its context, and renders
+in a single pass.
 """
 
-def get_general_prompt() -> str:
+import hashlib
+import json
+import re
+from string import Formatter
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from .context import CONTEXT_SOURCES
+from .serializer import FORMATTERS, serialize_context
+
+# Context keys a template may reference
+KNOWN_CONTEXT_KEYS = frozenset({
+    "date", "weather", "calendar_events", "notes", "todos",
+    "capabilities", "servers", "user_input", "conversation",
+})
+
+# Values used when a required key is missing from the context
+CONTEXT_DEFAULTS = {
+    "date": "No date available",
+    "weather": "Weather unavailable",
+    "calendar_events": "none",
+    "notes": "none",
+    "todos": "none",
+    "servers": "none",
+    "capabilities": "none",
+    "conversation": "none",
+}
+
+_FIELD = re.compile(r'^context\[(\w+)\]$')
+
+# Temperature changes smaller than this many degrees leave a fingerprint unchanged
+FINGERPRINT_TEMPERATURE_STEP = 3
+_TEMPERATURE = re.compile(r'Temperature:\s*(-?\d+(?:\.\d+)?)')
+_CONDITIONS = re.compile(r'Conditions:\s*(.+)')
+
+def _weather_digest(weather: Any) -> str:
     """
-    Returns the prompt template for general queries.
+    Reduce a weather report to its conditions and a rounded temperature, so
+    readings that drift on every fetch (humidity, wind, pressure) do not count.
+    """
+    if isinstance(weather, dict):
+        temperature = weather.get("temperature", (weather.get("main") or {}).get("temp"))
+        conditions = weather.get("condition") or (weather.get("weather") or [{}])[0].get("description")
+    else:
+        text = str(weather)
+        temperature_match = _TEMPERATURE.search(text)
+        conditions_match = _CONDITIONS.search(text)
+        if not temperature_match and not conditions_match:
+            return text.strip()
+        temperature = float(temperature_match.group(1)) if temperature_match else None
+        conditions = conditions_match.group(1).strip() if conditions_match else None
+    if isinstance(temperature, (int, float)):
+        step = FINGERPRINT_TEMPERATURE_STEP
+        temperature = round(temperature / step) * step
+    return f"{str(conditions or '').lower()}|{temperature}"
+
+def _normalized(key: str, value: Any) -> Any:
+    """The part of a context value that a fingerprint depends on."""
+    if key == "weather":
+        return _weather_digest(value)
+    formatter = FORMATTERS.get(key, str)
+    if isinstance(value, (list, tuple)):
+        return [formatter(item) for item in value]
+    return formatter(value)
+
+
+class PromptTemplate(str):
     """
-    return """You are a helpful personal assistant using the Model Context Protocol (MCP).
+    A prompt template compiled once.
+    It is still the plain template string, so existing str.format callers keep
+    working, and it adds a stable template_id, its required context keys, a
+    context token budget, and single-pass rendering.
+    """
+
+    template_id: str
+    token_budget: int
+    required_keys: FrozenSet[str]
+
+    def __new__(cls, template_id: str, text: str, token_budget: int):
+        template = super().__new__(cls, text)
+        template.template_id = template_id
+        template.token_budget = token_budget
+        template._segments = cls._compile(template_id, text)
+        template.required_keys = frozenset(key for _, key in template._segments if key)
+        return template
+
+    @property
+    def sources(self) -> FrozenSet[str]:
+        """The context sources that must be fetched to render this template."""
+        return self.required_keys & CONTEXT_SOURCES
+
+    @staticmethod
+    def _compile(template_id: str, text: str) -> List[Tuple[str, Optional[str]]]:
+        """Split the template into (literal, context key) pairs and validate the keys."""
+        segments = []
+        for literal, field, spec, conversion in Formatter().parse(text):
+            key = None
+            if field is not None:
+                match = _FIELD.match(field)
+                if not match or spec or conversion:
+                    raise ValueError(f"Template '{template_id}' has unsupported field '{{{field}}}'")
+                key = match.group(1)
+                if key not in KNOWN_CONTEXT_KEYS:
+                    raise ValueError(f"Template '{template_id}' references unknown context key '{key}'")
+            segments.append((literal, key))
+        return segments
+
+    def render(self, context: Dict[str, Any]) -> str:
+        """
+        Serialize the context to this template's budget and fill it in one pass.
+        Args:
+            context (dict): Raw context
+        Returns:
+            str: The filled prompt
+        Raises:
+            KeyError: If a required key is missing and has no default
+        """
+        values = serialize_context({key: value for key, value in context.items()
+                                    if key in self.required_keys}, self.token_budget)
+        missing = self.required_keys - values.keys() - CONTEXT_DEFAULTS.keys()
+        if missing:
+            raise KeyError(f"Template '{self.template_id}' is missing context: {', '.join(sorted(missing))}")
+        return ''.join(literal + (values.get(key, CONTEXT_DEFAULTS.get(key)) if key else '')
+                       for literal, key in self._segments)
+
+    def fingerprint(self, context: Dict[str, Any]) -> str:
+        """
+        Hash of the source data this template renders for a context.
+        Items are hashed in their compact form, and weather only by its
+        conditions and a rounded temperature, so two contexts with the same
+        fingerprint ask the LLM for the same answer.
+        """
+        inputs = {key: _normalized(key, context[key]) for key in sorted(self.required_keys) if key in context}
+        payload = json.dumps([self.template_id, inputs], default=str, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+GENERAL_PROMPT = PromptTemplate("general", """You are a helpful personal assistant using the Model Context Protocol (MCP).
     
 Current Context:
 - Date: {context[date]}
@@ -17,6 +152,9 @@ Current Context:
 - Todos: {context[todos]}
 - Available Tools: {context[capabilities]}
 
+Conversation So Far:
+{context[conversation]}
+
 User Input: {context[user_input]}
 
 Please analyze the user's request and respond appropriately:
@@ -25,13 +163,9 @@ Please analyze the user's request and respond appropriately:
 3. For todo queries: Help manage tasks and suggest priorities
 4. For other queries: Use available context to provide helpful responses
 
-Format your response in a clear, conversational way."""
+Format your response in a clear, conversational way.""", token_budget=1800)
 
-def get_capability_prompt() -> str:
-    """
-    Returns the prompt template for explaining agent capabilities.
-    """
-    return """You are a helpful personal assistant using the Model Context Protocol (MCP).
+CAPABILITY_PROMPT = PromptTemplate("capabilities", """You are a helpful personal assistant using the Model Context Protocol (MCP).
     
 Available Capabilities:
 {context[capabilities]}
@@ -41,13 +175,9 @@ Please explain what you can do based on the available capabilities. Focus on:
 2. Types of tasks you can help with
 3. Specific commands or questions the user can ask
 
-Format your response in a clear, organized way using markdown."""
+Format your response in a clear, organized way using markdown.""", token_budget=600)
 
-def get_morning_briefing_prompt() -> str:
-    """
-    Returns the prompt template for generating morning briefings.
-    """
-    return """You are a helpful personal assistant generating a morning briefing.
+MORNING_BRIEFING_PROMPT = PromptTemplate("morning_briefing", """You are a helpful personal assistant generating a morning briefing.
     
 Current Context:
 - Today's date: {context[date]}
@@ -63,4 +193,32 @@ Please provide a natural, concise briefing that:
 4. Reminds about any incomplete tasks
 5. Suggests any necessary preparations or actions (mark these with TODO:)
 
-Format the response in a clear, organized way using markdown headings."""
+Format the response in a clear, organized way using markdown headings.""", token_budget=1500)
+
+# Registry of every template by id
+TEMPLATES: Dict[str, PromptTemplate] = {
+    template.template_id: template
+    for template in (GENERAL_PROMPT, CAPABILITY_PROMPT, MORNING_BRIEFING_PROMPT)
+}
+
+def get_template(template_id: str) -> PromptTemplate:
+    """Look up a registered template by id."""
+    return TEMPLATES[template_id]
+
+def get_general_prompt() -> PromptTemplate:
+    """
+    Returns the prompt template for general queries.
+    """
+    return GENERAL_PROMPT
+
+def get_capability_prompt() -> PromptTemplate:
+    """
+    Returns the prompt template for explaining agent capabilities.
+    """
+    return CAPABILITY_PROMPT
+
+def get_morning_briefing_prompt() -> PromptTemplate:
+    """
+    Returns the prompt template for generating morning briefings.
+    """
+    return MORNING_BRIEFING_PROMPT
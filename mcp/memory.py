@@ -2,92 +2,666 @@
 memory.py
 SQLite-backed memory for storing and retrieving morning briefings and incomplete tasks.
 """
+from contextlib import contextmanager
+import json
+import logging
 import sqlite3
 import os
-from datetime import datetime
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .context import context_store
+
+logger = logging.getLogger(__name__)
 
 # Set up database path
 DB_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
 DB_PATH = os.path.join(DB_DIR, 'notes.db')
 
-# Ensure DB and table exist
-def init_db():
-    """Initialize the SQLite database and create required tables."""
-    # Create data directory if it doesn't exist
-    os.makedirs(DB_DIR, exist_ok=True)
-    
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    # Create briefings table
-    c.execute('''CREATE TABLE IF NOT EXISTS briefings (
+# Schema migrations, applied in order. The database's PRAGMA user_version
+# records how many have run; append new entries, never edit old ones.
+MIGRATIONS = [
+    # 1: briefings and todos
+    '''
+    CREATE TABLE IF NOT EXISTS briefings (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         date TEXT NOT NULL,
         summary TEXT NOT NULL,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )''')
-    
-    # Create todos table
-    c.execute('''CREATE TABLE IF NOT EXISTS todos (
+    );
+    CREATE TABLE IF NOT EXISTS todos (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         date TEXT NOT NULL,
         todo TEXT NOT NULL,
         completed INTEGER DEFAULT 0,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         completed_at TIMESTAMP
-    )''')
-    
-    # Create indices for better performance
-    c.execute('CREATE INDEX IF NOT EXISTS idx_briefings_date ON briefings(date)')
-    c.execute('CREATE INDEX IF NOT EXISTS idx_todos_date ON todos(date)')
-    c.execute('CREATE INDEX IF NOT EXISTS idx_todos_completed ON todos(completed)')
-    
-    conn.commit()
-    conn.close()
+    );
+    CREATE INDEX IF NOT EXISTS idx_briefings_date ON briefings(date);
+    CREATE INDEX IF NOT EXISTS idx_todos_date ON todos(date);
+    CREATE INDEX IF NOT EXISTS idx_todos_completed ON todos(completed);
+    ''',
+    # 2: local calendar mirror and incremental sync state
+    '''
+    CREATE TABLE IF NOT EXISTS calendar_events (
+        id TEXT PRIMARY KEY,
+        start_ts REAL NOT NULL,
+        end_ts REAL NOT NULL,
+        event TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_calendar_events_range ON calendar_events(start_ts, end_ts);
+    CREATE TABLE IF NOT EXISTS sync_state (
+        source TEXT PRIMARY KEY,
+        value TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    ''',
+    # 3: local Notion notes mirror
+    '''
+    CREATE TABLE IF NOT EXISTS notes (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        content TEXT NOT NULL,
+        date TEXT,
+        last_edited TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_notes_date ON notes(date);
+    ''',
+    # 4: fingerprint of the context each briefing was generated from
+    '''
+    ALTER TABLE briefings ADD COLUMN fingerprint TEXT;
+    ''',
+    # 5: when a briefing was last confirmed to match its inputs (unix time)
+    '''
+    ALTER TABLE briefings ADD COLUMN verified_at REAL;
+    ''',
+    # 6: recent conversation turns and the rolling summary of older ones
+    '''
+    CREATE TABLE IF NOT EXISTS conversation_turns (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session TEXT NOT NULL,
+        user_text TEXT NOT NULL,
+        assistant_text TEXT NOT NULL,
+        tokens INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_conversation_turns_session ON conversation_turns(session, id);
+    CREATE TABLE IF NOT EXISTS conversation_summaries (
+        session TEXT PRIMARY KEY,
+        summary TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    ''',
+    # 7: FTS5 full-text indexes over briefings, todos and mirrored notes, kept in sync by triggers
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS briefings_fts USING fts5(
+        summary, content='briefings', content_rowid='id', tokenize='porter unicode61'
+    );
+    CREATE TRIGGER IF NOT EXISTS briefings_fts_insert AFTER INSERT ON briefings BEGIN
+        INSERT INTO briefings_fts (rowid, summary) VALUES (new.id, new.summary);
+    END;
+    CREATE TRIGGER IF NOT EXISTS briefings_fts_delete AFTER DELETE ON briefings BEGIN
+        INSERT INTO briefings_fts (briefings_fts, rowid, summary) VALUES ('delete', old.id, old.summary);
+    END;
+    CREATE TRIGGER IF NOT EXISTS briefings_fts_update AFTER UPDATE OF summary ON briefings BEGIN
+        INSERT INTO briefings_fts (briefings_fts, rowid, summary) VALUES ('delete', old.id, old.summary);
+        INSERT INTO briefings_fts (rowid, summary) VALUES (new.id, new.summary);
+    END;
+    INSERT INTO briefings_fts (briefings_fts) VALUES ('rebuild');
+
+    CREATE VIRTUAL TABLE IF NOT EXISTS todos_fts USING fts5(
+        todo, content='todos', content_rowid='id', tokenize='porter unicode61'
+    );
+    CREATE TRIGGER IF NOT EXISTS todos_fts_insert AFTER INSERT ON todos BEGIN
+        INSERT INTO todos_fts (rowid, todo) VALUES (new.id, new.todo);
+    END;
+    CREATE TRIGGER IF NOT EXISTS todos_fts_delete AFTER DELETE ON todos BEGIN
+        INSERT INTO todos_fts (todos_fts, rowid, todo) VALUES ('delete', old.id, old.todo);
+    END;
+    CREATE TRIGGER IF NOT EXISTS todos_fts_update AFTER UPDATE OF todo ON todos BEGIN
+        INSERT INTO todos_fts (todos_fts, rowid, todo) VALUES ('delete', old.id, old.todo);
+        INSERT INTO todos_fts (rowid, todo) VALUES (new.id, new.todo);
+    END;
+    INSERT INTO todos_fts (todos_fts) VALUES ('rebuild');
+
+    CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+        title, content, content='notes', content_rowid='rowid', tokenize='porter unicode61'
+    );
+    CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+        INSERT INTO notes_fts (rowid, title, content) VALUES (new.rowid, new.title, new.content);
+    END;
+    CREATE TRIGGER IF NOT EXISTS notes_fts_delete AFTER DELETE ON notes BEGIN
+        INSERT INTO notes_fts (notes_fts, rowid, title, content)
+        VALUES ('delete', old.rowid, old.title, old.content);
+    END;
+    CREATE TRIGGER IF NOT EXISTS notes_fts_update AFTER UPDATE OF title, content ON notes BEGIN
+        INSERT INTO notes_fts (notes_fts, rowid, title, content)
+        VALUES ('delete', old.rowid, old.title, old.content);
+        INSERT INTO notes_fts (rowid, title, content) VALUES (new.rowid, new.title, new.content);
+    END;
+    INSERT INTO notes_fts (notes_fts) VALUES ('rebuild');
+    ''',
+    # 8: rows of the on-disk vector matrix used for note and briefing retrieval
+    '''
+    CREATE TABLE IF NOT EXISTS vector_rows (
+        kind TEXT NOT NULL,
+        ref TEXT NOT NULL,
+        row INTEGER NOT NULL UNIQUE,
+        digest TEXT NOT NULL,
+        PRIMARY KEY (kind, ref)
+    );
+    ''',
+]
+
+# Ranked full-text search across briefings, todos and notes; the query is bound
+# once per index. Note titles weigh twice as much as note content.
+SEARCH_SQL = '''
+    SELECT 'briefing' AS kind, b.id, b.date, '' AS title,
+           snippet(briefings_fts, 0, '[', ']', '…', 12) AS snippet, bm25(briefings_fts) AS rank
+    FROM briefings_fts JOIN briefings b ON b.id = briefings_fts.rowid
+    WHERE briefings_fts MATCH ?1
+    UNION ALL
+    SELECT 'todo', t.id, t.date, '', snippet(todos_fts, 0, '[', ']', '…', 12), bm25(todos_fts)
+    FROM todos_fts JOIN todos t ON t.id = todos_fts.rowid
+    WHERE todos_fts MATCH ?1
+    UNION ALL
+    SELECT 'note', n.id, n.date, n.title, snippet(notes_fts, -1, '[', ']', '…', 12), bm25(notes_fts, 2.0, 1.0)
+    FROM notes_fts JOIN notes n ON n.rowid = notes_fts.rowid
+    WHERE notes_fts MATCH ?1
+    ORDER BY {order}
+    LIMIT ?2 OFFSET ?3
+'''
+# Best match first, or newest first (undated notes last) for "when did I last ..." questions
+SEARCH_BY_RANK = SEARCH_SQL.format(order='rank')
+SEARCH_BY_DATE = SEARCH_SQL.format(order='date DESC, rank')
+
+# Connection tuning applied to every new connection
+PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-8000',
+    'PRAGMA foreign_keys=ON',
+]
+
+
+class MemoryStore:
+    """
+    SQLite memory store with a schema initialized once per process.
+    Each thread gets its own long-lived WAL-mode connection with a prepared
+    statement cache, so reads and writes skip the connect and DDL cost.
+    """
+
+    def __init__(self, db_path: str = DB_PATH):
+        """
+        Args:
+            db_path (str): Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open and tune a new connection."""
+        # Connections are only used by the thread that opened them;
+        # check_same_thread is off so close() can run from any thread.
+        conn = sqlite3.connect(self.db_path, timeout=5.0, cached_statements=256,
+                               check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """This thread's connection, opened (and the schema migrated) on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.init()
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def init(self) -> None:
+        """Create the database and apply pending migrations. Runs once per store."""
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+            conn = self._connect()
+            try:
+                version = conn.execute('PRAGMA user_version').fetchone()[0]
+                for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+                    conn.executescript(f'BEGIN; {script}; PRAGMA user_version = {number}; COMMIT;')
+                    logger.info(f"Applied memory schema migration {number}")
+            finally:
+                conn.close()
+            self._initialized = True
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a block in a single transaction, rolling back on error."""
+        conn = self.conn
+        with conn:
+            yield conn
+
+    def close(self) -> None:
+        """Close every connection opened by this store."""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def store_briefing(self, date: str, summary: str, fingerprint: Optional[str] = None,
+                       verified: bool = False) -> int:
+        with self.transaction() as conn:
+            cur = conn.execute('INSERT INTO briefings (date, summary, fingerprint, verified_at) '
+                               'VALUES (?, ?, ?, ?)',
+                               (date, summary, fingerprint, time.time() if verified else None))
+        return cur.lastrowid
+
+    def get_briefing(self, date: str) -> Optional[str]:
+        """Return the most recently stored briefing for a date."""
+        latest = self.get_latest_briefing(date)
+        return latest[1] if latest else None
+
+    def get_latest_briefing(self, date: str) -> Optional[Tuple[int, str, Optional[str]]]:
+        """
+        Return the most recently stored briefing for a date.
+        Returns:
+            tuple: (briefing ID, summary, context fingerprint), or None
+        """
+        return self.conn.execute(
+            'SELECT id, summary, fingerprint FROM briefings WHERE date = ? ORDER BY id DESC LIMIT 1',
+            (date,)
+        ).fetchone()
+
+    def mark_briefing_verified(self, briefing_id: int, verified: bool = True) -> None:
+        """Record that a briefing still matches the current context, or that it no longer does."""
+        with self.transaction() as conn:
+            conn.execute('UPDATE briefings SET verified_at = ? WHERE id = ?',
+                         (time.time() if verified else None, briefing_id))
+
+    def get_verified_briefing(self, date: str, max_age: float) -> Optional[str]:
+        """
+        Return the latest briefing for a date if it was verified within max_age seconds.
+        Args:
+            date (str): Date in YYYY-MM-DD format
+            max_age (float): Maximum seconds since the briefing was last verified
+        Returns:
+            str: Briefing summary, or None if there is no recently verified briefing
+        """
+        row = self.conn.execute(
+            'SELECT summary, verified_at FROM briefings WHERE date = ? ORDER BY id DESC LIMIT 1',
+            (date,)
+        ).fetchone()
+        if row is None or row[1] is None or time.time() - row[1] > max_age:
+            return None
+        return row[0]
+
+    def store_todo(self, date: str, todo: str) -> int:
+        with self.transaction() as conn:
+            cur = conn.execute('INSERT INTO todos (date, todo) VALUES (?, ?)', (date, todo))
+        context_store.invalidate("todos")
+        return cur.lastrowid
+
+    def store_todos(self, date: str, todos: List[str]) -> List[int]:
+        """
+        Store several todos in a single transaction.
+        Args:
+            date (str): Date in YYYY-MM-DD format
+            todos (list): Todo texts
+        Returns:
+            list: New todo IDs, in input order
+        """
+        if not todos:
+            return []
+        with self.transaction() as conn:
+            todo_ids = self._insert_todos(conn, date, todos)
+        context_store.invalidate("todos")
+        return todo_ids
+
+    def store_briefing_with_todos(self, date: str, summary: str, todos: List[str],
+                                  fingerprint: Optional[str] = None,
+                                  verified: bool = False) -> Tuple[int, List[int]]:
+        """
+        Store a briefing and its extracted todos in one transaction and one commit.
+        Args:
+            date (str): Date in YYYY-MM-DD format
+            summary (str): Briefing text
+            todos (list): Todo texts extracted from the briefing
+            fingerprint (str, optional): Fingerprint of the context the briefing
+                was generated from; None marks it as not reusable
+            verified (bool): Mark it verified, so get_verified_briefing serves it
+        Returns:
+            tuple: (briefing ID, list of new todo IDs)
+        """
+        with self.transaction() as conn:
+            cur = conn.execute('INSERT INTO briefings (date, summary, fingerprint, verified_at) '
+                               'VALUES (?, ?, ?, ?)',
+                               (date, summary, fingerprint, time.time() if verified else None))
+            briefing_id = cur.lastrowid
+            todo_ids = self._insert_todos(conn, date, todos) if todos else []
+        if todo_ids:
+            context_store.invalidate("todos")
+        return briefing_id, todo_ids
+
+    @staticmethod
+    def _insert_todos(conn: sqlite3.Connection, date: str, todos: List[str]) -> List[int]:
+        """Bulk insert todos inside an open transaction and return their IDs."""
+        conn.executemany('INSERT INTO todos (date, todo) VALUES (?, ?)',
+                         [(date, todo) for todo in todos])
+        # The transaction holds the write lock, so the newest rows are ours
+        rows = conn.execute('SELECT id FROM todos ORDER BY id DESC LIMIT ?', (len(todos),)).fetchall()
+        return [row[0] for row in reversed(rows)]
+
+    def get_incomplete_todos(self, date: str) -> List[Tuple[int, str]]:
+        return self.conn.execute(
+            'SELECT id, todo FROM todos WHERE date = ? AND completed = 0', (date,)
+        ).fetchall()
+
+    def complete_todo(self, todo_id: int) -> int:
+        """
+        Mark an open todo as completed.
+        Returns:
+            int: 1 if the todo was completed, 0 if no open todo has that id
+        """
+        with self.transaction() as conn:
+            updated = conn.execute(
+                'UPDATE todos SET completed = 1, completed_at = CURRENT_TIMESTAMP '
+                'WHERE id = ? AND completed = 0',
+                (todo_id,)
+            ).rowcount
+        if updated:
+            context_store.invalidate("todos")
+        return updated
+
+    def get_sync_state(self, source: str) -> Optional[str]:
+        """Return the saved sync cursor for a source, if any."""
+        row = self.conn.execute('SELECT value FROM sync_state WHERE source = ?', (source,)).fetchone()
+        return row[0] if row else None
+
+    def set_sync_state(self, source: str, value: Optional[str]) -> None:
+        with self.transaction() as conn:
+            self._save_sync_state(conn, source, value)
+
+    @staticmethod
+    def _save_sync_state(conn: sqlite3.Connection, source: str, value: Optional[str]) -> None:
+        conn.execute(
+            'INSERT INTO sync_state (source, value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP) '
+            'ON CONFLICT(source) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at',
+            (source, value)
+        )
+
+    def apply_calendar_changes(self, upserts: List[Tuple[str, float, float, Dict]],
+                               deleted_ids: List[str], sync_token: Optional[str],
+                               full: bool = False) -> None:
+        """
+        Apply a calendar sync batch and save its sync token in one transaction.
+        Args:
+            upserts (list): (event ID, start timestamp, end timestamp, event dict) tuples
+            deleted_ids (list): IDs of cancelled events
+            sync_token (str): Token for the next incremental sync
+            full (bool): Replace the whole mirror instead of merging
+        """
+        with self.transaction() as conn:
+            if full:
+                conn.execute('DELETE FROM calendar_events')
+            conn.executemany(
+                'INSERT OR REPLACE INTO calendar_events (id, start_ts, end_ts, event) VALUES (?, ?, ?, ?)',
+                [(event_id, start_ts, end_ts, json.dumps(event))
+                 for event_id, start_ts, end_ts, event in upserts]
+            )
+            conn.executemany('DELETE FROM calendar_events WHERE id = ?',
+                             [(event_id,) for event_id in deleted_ids])
+            self._save_sync_state(conn, 'calendar', sync_token)
+
+    def get_mirrored_events(self, start_ts: float, end_ts: float) -> List[Dict]:
+        """Return mirrored events overlapping [start_ts, end_ts), ordered by start time."""
+        rows = self.conn.execute(
+            'SELECT event FROM calendar_events WHERE start_ts < ? AND end_ts > ? ORDER BY start_ts',
+            (end_ts, start_ts)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def apply_note_changes(self, notes: List[Dict], high_water: Optional[str],
+                           reconciled_at: Optional[str] = None) -> None:
+        """
+        Upsert synced notes and save the sync high-water mark in one transaction.
+        Args:
+            notes (list): Note dicts with id, title, content, date and last_edited
+            high_water (str): Newest last_edited timestamp seen so far
+            reconciled_at (str, optional): Set when notes is a complete listing;
+                mirrored notes missing from it are deleted
+        """
+        with self.transaction() as conn:
+            if reconciled_at is not None:
+                conn.execute('CREATE TEMP TABLE IF NOT EXISTS live_note_ids (id TEXT PRIMARY KEY)')
+                conn.execute('DELETE FROM live_note_ids')
+                conn.executemany('INSERT OR IGNORE INTO live_note_ids (id) VALUES (?)',
+                                 [(note['id'],) for note in notes])
+                conn.execute('DELETE FROM notes WHERE id NOT IN (SELECT id FROM live_note_ids)')
+                self._save_sync_state(conn, 'notes_reconciled', reconciled_at)
+            # An upsert rather than INSERT OR REPLACE keeps each note's rowid and
+            # fires the update trigger that maintains notes_fts
+            conn.executemany(
+                'INSERT INTO notes (id, title, content, date, last_edited) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(id) DO UPDATE SET title = excluded.title, content = excluded.content, '
+                'date = excluded.date, last_edited = excluded.last_edited',
+                [(note['id'], note['title'], note['content'], note['date'], note.get('last_edited'))
+                 for note in notes]
+            )
+            self._save_sync_state(conn, 'notes', high_water)
+
+    def get_mirrored_notes(self, from_date: Optional[str] = None,
+                           limit: Optional[int] = None) -> List[Dict]:
+        """Return mirrored notes dated on or after from_date, oldest first."""
+        sql = 'SELECT id, title, content, date FROM notes'
+        params: list = []
+        if from_date:
+            sql += ' WHERE date >= ?'
+            params.append(from_date)
+        sql += ' ORDER BY date, id'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        rows = self.conn.execute(sql, params).fetchall()
+        return [{"id": row[0], "title": row[1], "content": row[2], "date": row[3]} for row in rows]
+
+    def delete_mirrored_note(self, note_id: str) -> None:
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM notes WHERE id = ?', (note_id,))
+
+    def search_memory(self, query: str, limit: int = 10, offset: int = 0,
+                      newest_first: bool = False) -> List[Dict]:
+        """
+        Full-text search over briefings, todos and mirrored notes, best matches first.
+        Every word of the query must match; words are stemmed, so 'migrating'
+        finds 'migration'.
+        Args:
+            query (str): Free-text query
+            limit (int): Page size
+            offset (int): Number of results to skip, for paging
+            newest_first (bool): Order matches by date instead of relevance
+        Returns:
+            list: Dicts with kind ('briefing', 'todo' or 'note'), id, date,
+                  title, snippet (matches in [brackets]) and rank
+        """
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return []
+        match = ' '.join('"' + term + '"' for term in terms)
+        sql = SEARCH_BY_DATE if newest_first else SEARCH_BY_RANK
+        rows = self.conn.execute(sql, (match, limit, offset)).fetchall()
+        return [{"kind": row[0], "id": row[1], "date": row[2], "title": row[3],
+                 "snippet": row[4], "rank": row[5]} for row in rows]
+
+    def get_latest_briefings(self) -> List[Tuple[int, str, str]]:
+        """Return the newest briefing of every date as (id, date, summary)."""
+        return self.conn.execute(
+            'SELECT id, date, summary FROM briefings '
+            'WHERE id IN (SELECT MAX(id) FROM briefings GROUP BY date) ORDER BY date'
+        ).fetchall()
+
+    def get_briefings_by_id(self, briefing_ids: List[int]) -> List[Tuple[int, str, str]]:
+        """Return the given briefings as (id, date, summary)."""
+        if not briefing_ids:
+            return []
+        placeholders = ', '.join('?' * len(briefing_ids))
+        return self.conn.execute(
+            f'SELECT id, date, summary FROM briefings WHERE id IN ({placeholders})', briefing_ids
+        ).fetchall()
+
+    def get_notes_by_id(self, note_ids: List[str]) -> List[Dict]:
+        """Return the given mirrored notes."""
+        if not note_ids:
+            return []
+        placeholders = ', '.join('?' * len(note_ids))
+        rows = self.conn.execute(
+            f'SELECT id, title, content, date FROM notes WHERE id IN ({placeholders})', note_ids
+        ).fetchall()
+        return [{"id": row[0], "title": row[1], "content": row[2], "date": row[3]} for row in rows]
+
+    def get_content_version(self) -> Tuple:
+        """A cheap value that changes whenever mirrored notes or briefings change."""
+        return self.conn.execute(
+            'SELECT (SELECT COUNT(*) FROM notes), (SELECT MAX(last_edited) FROM notes), '
+            '(SELECT MAX(id) FROM briefings)'
+        ).fetchone()
+
+    def get_vector_rows(self) -> List[Tuple[str, str, int, str]]:
+        """Return every indexed document as (kind, ref, row, digest)."""
+        return self.conn.execute('SELECT kind, ref, row, digest FROM vector_rows').fetchall()
+
+    def save_vector_rows(self, upserts: List[Tuple[str, str, int, str]],
+                         deleted: List[Tuple[str, str]]) -> None:
+        """Record written (kind, ref, row, digest) rows and drop deleted (kind, ref) ones."""
+        with self.transaction() as conn:
+            conn.executemany('DELETE FROM vector_rows WHERE kind = ? AND ref = ?', deleted)
+            conn.executemany('INSERT INTO vector_rows (kind, ref, row, digest) VALUES (?, ?, ?, ?) '
+                             'ON CONFLICT(kind, ref) DO UPDATE SET row = excluded.row, '
+                             'digest = excluded.digest', upserts)
+
+    def clear_vector_rows(self) -> None:
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM vector_rows')
+
+    def append_turn(self, session: str, user_text: str, assistant_text: str, tokens: int) -> int:
+        with self.transaction() as conn:
+            cur = conn.execute('INSERT INTO conversation_turns (session, user_text, assistant_text, tokens) '
+                               'VALUES (?, ?, ?, ?)', (session, user_text, assistant_text, tokens))
+        return cur.lastrowid
+
+    def get_turns(self, session: str) -> List[Tuple[int, str, str, int]]:
+        """Return a session's stored turns as (id, user text, assistant text, tokens), oldest first."""
+        return self.conn.execute(
+            'SELECT id, user_text, assistant_text, tokens FROM conversation_turns '
+            'WHERE session = ? ORDER BY id', (session,)
+        ).fetchall()
+
+    def get_conversation_summary(self, session: str) -> Optional[str]:
+        row = self.conn.execute('SELECT summary FROM conversation_summaries WHERE session = ?',
+                                (session,)).fetchone()
+        return row[0] if row else None
+
+    def fold_turns(self, session: str, through_id: int, summary: str) -> None:
+        """
+        Replace a session's summary and drop the turns it now covers, in one transaction.
+        Args:
+            session (str): Conversation session
+            through_id (int): Last turn ID folded into the summary
+            summary (str): Updated rolling summary
+        """
+        with self.transaction() as conn:
+            conn.execute('INSERT INTO conversation_summaries (session, summary, updated_at) '
+                         'VALUES (?, ?, CURRENT_TIMESTAMP) '
+                         'ON CONFLICT(session) DO UPDATE SET summary = excluded.summary, '
+                         'updated_at = excluded.updated_at', (session, summary))
+            conn.execute('DELETE FROM conversation_turns WHERE session = ? AND id <= ?',
+                         (session, through_id))
+
+    def clear_conversation(self, session: str) -> None:
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM conversation_turns WHERE session = ?', (session,))
+            conn.execute('DELETE FROM conversation_summaries WHERE session = ?', (session,))
+
+
+_store: Optional[MemoryStore] = None
+_store_lock = threading.Lock()
+
+def get_store() -> MemoryStore:
+    """Return the process-wide memory store for DB_PATH."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = MemoryStore(DB_PATH)
+    return _store
+
+# Ensure DB and table exist
+def init_db():
+    """Initialize the SQLite database and create required tables."""
+    get_store().init()
 
 # Store a morning briefing
-def store_briefing(date, summary):
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('INSERT INTO briefings (date, summary) VALUES (?, ?)', (date, summary))
-    conn.commit()
-    conn.close()
-
-# Retrieve briefing by date
+def store_briefing(date, summary, fingerprint=None, verified=False):
+    return get_store().store_briefing(date, summary, fingerprint, verified)
+
+# Retrieve the latest briefing by date
 def get_briefing(date):
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('SELECT summary FROM briefings WHERE date = ?', (date,))
-    row = c.fetchone()
-    conn.close()
-    return row[0] if row else None
+    return get_store().get_briefing(date)
+
+# Retrieve the latest briefing by date with its ID and context fingerprint
+def get_latest_briefing(date):
+    return get_store().get_latest_briefing(date)
+
+# Mark a briefing as still matching its inputs, or as stale
+def mark_briefing_verified(briefing_id, verified=True):
+    get_store().mark_briefing_verified(briefing_id, verified)
+
+# Retrieve today's briefing if it was verified recently
+def get_verified_briefing(date, max_age):
+    return get_store().get_verified_briefing(date, max_age)
 
 # Store a to-do
 def store_todo(date, todo):
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('INSERT INTO todos (date, todo) VALUES (?, ?)', (date, todo))
-    conn.commit()
-    conn.close()
+    return get_store().store_todo(date, todo)
+
+# Store several to-dos at once
+def store_todos(date, todos):
+    return get_store().store_todos(date, todos)
+
+# Store a briefing together with its to-dos
+def store_briefing_with_todos(date, summary, todos, fingerprint=None, verified=False):
+    return get_store().store_briefing_with_todos(date, summary, todos, fingerprint, verified)
 
 # Get incomplete to-dos
 def get_incomplete_todos(date):
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('SELECT id, todo FROM todos WHERE date = ? AND completed = 0', (date,))
-    rows = c.fetchall()
-    conn.close()
-    return rows
+    return get_store().get_incomplete_todos(date)
+
+# Read mirrored calendar events in a time range
+def get_mirrored_events(start_ts, end_ts):
+    return get_store().get_mirrored_events(start_ts, end_ts)
+
+# Read mirrored notes from a given date
+def get_mirrored_notes(from_date, limit=None):
+    return get_store().get_mirrored_notes(from_date, limit)
+
+# Full-text search over briefings, to-dos and notes
+def search_memory(query, limit=10, offset=0, newest_first=False):
+    return get_store().search_memory(query, limit, offset, newest_first)
 
 # Mark to-do as completed
 def complete_todo(todo_id):
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('UPDATE todos SET completed = 1 WHERE id = ?', (todo_id,))
-    conn.commit()
-    conn.close()
+    return get_store().complete_todo(todo_id)
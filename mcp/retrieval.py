@@ -0,0 +1,247 @@
+"""
+retrieval.py
+Offline vector retrieval over mirrored notes and past briefings.
+Documents are embedded with a signed feature-hashing vectorizer (no model or
+vocabulary to fit) into L2-normalized rows of a float32 matrix memory-mapped
+from disk. The row of each document and a digest of its text live in the
+memory database, so the index is updated incrementally: only new or edited
+documents are re-embedded. Queries rank documents by cosine similarity.
+NumPy is imported on first use.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .memory import DB_DIR, MemoryStore, get_store
+
+logger = logging.getLogger(__name__)
+
+VECTORS_PATH = os.path.join(DB_DIR, 'vectors.f32')
+# Embedding width; each document costs DIM * 4 bytes on disk
+DIM = 1024
+# Rows added to the matrix file whenever it runs out of space
+GROWTH_ROWS = 256
+# Matches below this cosine similarity are never returned
+MIN_SCORE = 0.05
+
+NOTE = "note"
+BRIEFING = "briefing"
+
+STOPWORDS = frozenset("""
+a an and are as at be but by do for from has have how i in is it its me my of on or
+so that the this to was we what when where which who why will with you your
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word unigrams and bigrams, without stopwords."""
+    words = [word for word in re.findall(r'\w+', text.lower()) if word not in STOPWORDS]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class VectorIndex:
+    """
+    Incrementally updated, memory-mapped embedding index.
+    Call refresh() to pick up changes to the mirrored notes and briefings,
+    then search() for the documents most similar to a query.
+    """
+
+    def __init__(self, store: MemoryStore, path: str = VECTORS_PATH, dim: int = DIM):
+        """
+        Args:
+            store (MemoryStore): Database holding the documents and the row map
+            path (str): Matrix file path
+            dim (int): Embedding width
+        """
+        self.store = store
+        self.path = path
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._rows: Dict[Tuple[str, str], Tuple[int, str]] = {}
+        self._free: List[int] = []
+        self._version: Optional[Tuple] = None
+
+    def vectorize(self, text: str):
+        """Embed text as an L2-normalized float32 vector."""
+        import numpy as np
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in tokenize(text):
+            code = zlib.crc32(token.encode('utf-8'))
+            # Low bits pick the column, the top bit the sign, so collisions tend to cancel
+            vector[code % self.dim] += -1.0 if code >> 31 else 1.0
+        # Sublinear term frequency
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def _open(self) -> None:
+        """Map the matrix file and load the row map, resetting both if they disagree."""
+        import numpy as np
+        if self._matrix is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        row_bytes = self.dim * 4
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        rows = self.store.get_vector_rows()
+        if size % row_bytes or any(row >= size // row_bytes for _, _, row, _ in rows):
+            logger.warning("Vector index does not match its row map; rebuilding it")
+            self.store.clear_vector_rows()
+            rows, size = [], 0
+        if size == 0:
+            size = GROWTH_ROWS * row_bytes
+            with open(self.path, 'wb') as f:
+                f.truncate(size)
+        self._matrix = np.memmap(self.path, dtype=np.float32, mode='r+',
+                                 shape=(size // row_bytes, self.dim))
+        self._rows = {(kind, ref): (row, digest) for kind, ref, row, digest in rows}
+        used = {row for row, _ in self._rows.values()}
+        self._free = sorted(set(range(len(self._matrix))) - used, reverse=True)
+
+    def _grow(self) -> None:
+        import numpy as np
+        capacity = len(self._matrix)
+        self._matrix.flush()
+        self._matrix = None
+        with open(self.path, 'r+b') as f:
+            f.truncate((capacity + GROWTH_ROWS) * self.dim * 4)
+        self._matrix = np.memmap(self.path, dtype=np.float32, mode='r+',
+                                 shape=(capacity + GROWTH_ROWS, self.dim))
+        self._free = list(range(capacity + GROWTH_ROWS - 1, capacity - 1, -1)) + self._free
+
+    def update(self, documents: Iterable[Tuple[str, str, str]], remove_missing: bool = True) -> int:
+        """
+        Embed new or changed documents and drop ones no longer present.
+        Args:
+            documents (iterable): (kind, ref, text) for every current document
+            remove_missing (bool): Drop indexed documents absent from documents
+        Returns:
+            int: Number of documents (re-)embedded
+        """
+        with self._lock:
+            self._open()
+            seen, upserts = set(), []
+            for kind, ref, text in documents:
+                key = (kind, str(ref))
+                seen.add(key)
+                digest = _digest(text)
+                current = self._rows.get(key)
+                if current is not None and current[1] == digest:
+                    continue
+                if current is not None:
+                    row = current[0]
+                else:
+                    if not self._free:
+                        self._grow()
+                    row = self._free.pop()
+                self._matrix[row] = self.vectorize(text)
+                self._rows[key] = (row, digest)
+                upserts.append((key[0], key[1], row, digest))
+
+            deleted = [key for key in self._rows if key not in seen] if remove_missing else []
+            for key in deleted:
+                row, _ = self._rows.pop(key)
+                self._matrix[row] = 0.0
+                self._free.append(row)
+            if upserts or deleted:
+                # Vectors reach the file before the row map points at them
+                self._matrix.flush()
+                self.store.save_vector_rows(upserts, deleted)
+            return len(upserts)
+
+    def refresh(self) -> int:
+        """
+        Re-index the mirrored notes and the latest briefing of each day if they changed.
+        Returns:
+            int: Number of documents (re-)embedded
+        """
+        version = self.store.get_content_version()
+        if version == self._version:
+            return 0
+        documents = [(NOTE, note["id"], f"{note['title']}\n{note['content']}")
+                     for note in self.store.get_mirrored_notes()]
+        documents += [(BRIEFING, str(briefing_id), summary)
+                      for briefing_id, _, summary in self.store.get_latest_briefings()]
+        embedded = self.update(documents)
+        self._version = version
+        if embedded:
+            logger.info(f"Embedded {embedded} changed documents")
+        return embedded
+
+    def search(self, query: str, k: int = 5, kinds: Optional[Iterable[str]] = None,
+               min_score: float = MIN_SCORE) -> List[Tuple[str, str, float]]:
+        """
+        Rank indexed documents by cosine similarity to a query.
+        Args:
+            query (str): Free text
+            k (int): Maximum number of results
+            kinds (iterable, optional): Only return these kinds, e.g. [NOTE]
+            min_score (float): Minimum similarity
+        Returns:
+            list: (kind, ref, score) tuples, best first
+        """
+        import numpy as np
+        query_vector = self.vectorize(query)
+        if k <= 0 or not query_vector.any():
+            return []
+        with self._lock:
+            self._open()
+            wanted = set(kinds) if kinds is not None else None
+            keys = [key for key in self._rows if wanted is None or key[0] in wanted]
+            if not keys:
+                return []
+            rows = np.fromiter((self._rows[key][0] for key in keys), dtype=np.int64, count=len(keys))
+            scores = self._matrix[rows] @ query_vector
+        top = np.argsort(-scores)[:k] if len(keys) <= k else np.argpartition(-scores, k)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(keys[i][0], keys[i][1], float(scores[i])) for i in top if scores[i] >= min_score]
+
+    def relevant_documents(self, query: str, k: int) -> List[Dict[str, Any]]:
+        """
+        The k notes and briefings most relevant to a query, refreshing the index first.
+        Returns:
+            list: Note-shaped dicts (title, content, date, score), best first
+        """
+        self.refresh()
+        matches = self.search(query, k)
+        notes = {note["id"]: note for note in
+                 self.store.get_notes_by_id([ref for kind, ref, _ in matches if kind == NOTE])}
+        briefings = {str(row[0]): row for row in
+                     self.store.get_briefings_by_id([int(ref) for kind, ref, _ in matches if kind == BRIEFING])}
+        documents = []
+        for kind, ref, score in matches:
+            if kind == NOTE and ref in notes:
+                documents.append(dict(notes[ref], score=round(score, 3)))
+            elif kind == BRIEFING and ref in briefings:
+                _, date, summary = briefings[ref]
+                documents.append({"title": f"Briefing {date}", "content": summary, "date": date,
+                                  "score": round(score, 3)})
+        return documents
+
+    def close(self) -> None:
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+                self._matrix = None
+
+
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+
+def get_index() -> VectorIndex:
+    """Return the process-wide vector index over the memory database."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = VectorIndex(get_store())
+    return _index
@@ -0,0 +1,120 @@
+"""
+router.py
+Deterministic intent routing for direct commands.
+Commands such as "what's on my calendar tomorrow", "add todo buy milk" or
+"complete todo 3" are matched against precompiled patterns and mapped to a
+tool call with extracted slots, so they never need an LLM round trip.
+Anything that does not match falls through to the LLM.
+"""
+
+from datetime import date, datetime, timedelta
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional, Pattern, Tuple
+
+# Intent names
+CAPABILITIES = "capabilities"
+WEATHER = "weather"
+LIST_EVENTS = "list_events"
+LIST_NOTES = "list_notes"
+LIST_TODOS = "list_todos"
+ADD_TODO = "add_todo"
+COMPLETE_TODO = "complete_todo"
+SEARCH_MEMORY = "search_memory"
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# Words that resolve to a day, relative to today
+_DATE_WORD = r"today|tonight|tomorrow|yesterday|\d{4}-\d{2}-\d{2}|(?:next\s+)?(?:" + "|".join(WEEKDAYS) + r")"
+_DATE = rf"(?:\s+(?:for|on)?\s*(?P<date>{_DATE_WORD}))?"
+_END = r"\s*[?.!]*$"
+# What a memory search can be asked to look through
+_HISTORY = r"(?:memory|notes|history|todos|briefings)"
+
+# (intent, pattern) pairs, tried in order; the first match wins
+INTENT_PATTERNS: List[Tuple[str, str]] = [
+    (CAPABILITIES, r"^(?:what can you do|help|capabilities|what are your tools)" + _END),
+    (COMPLETE_TODO, r"^(?:complete|finish|done|check off|mark)\s+(?:todo|task)\s*#?(?P<todo_id>\d+)"
+                    r"(?:\s+as\s+(?:done|complete|completed))?" + _END),
+    (ADD_TODO, r"^(?:add|create|new)\s+(?:a\s+)?(?:todo|task)(?:\s+to|\s*:)?\s+(?P<text>.+?)" + _END),
+    # Searches must name the user's history, so "find time for a meeting" still reaches the LLM
+    (SEARCH_MEMORY, r"^(?:search|find|look)(?:\s+(?:in|through))?\s+my\s+" + _HISTORY
+                    + r"(?:\s+for)?\s+(?:the\s+)?(?P<query>.+?)" + _END),
+    (SEARCH_MEMORY, r"^(?:search for|find|look up|look for)\s+(?:the\s+)?(?P<query>.+?)\s+in\s+my\s+"
+                    + _HISTORY + _END),
+    (SEARCH_MEMORY, r"^(?P<recency>when did i(?:\s+last)?)\s+(?:mention|write about|talk about|note)"
+                    r"\s+(?:the\s+)?(?P<query>.+?)" + _END),
+    (LIST_TODOS, r"^(?:show|list|what are|what[’']?s on)\s+(?:my\s+)?(?:todos|tasks|todo list|to-do list)"
+                 + _DATE + _END),
+    (LIST_EVENTS, r"^(?:what[’']?s|what is|show|list|show me)\s+(?:on\s+)?(?:my\s+)?"
+                  r"(?:calendar|schedule|events|meetings)" + _DATE + _END),
+    (LIST_NOTES, r"^(?:show|list|show me)\s+(?:my\s+)?notes" + _DATE + _END),
+    # Only whole weather questions; a sentence that merely mentions the weather goes to the LLM
+    (WEATHER, r"^(?:(?:what[’']?s|what is|how[’']?s|how is|show(?:\s+me)?|get|check|tell me)\s+)?"
+              r"(?:the\s+)?(?:current\s+)?(?:weather|temperature|forecast)(?:\s+forecast)?(?:\s+like)?"
+              r"(?:\s+(?:in|at|for)\s+(?!(?:today|tonight|tomorrow|now)\b)(?P<location>[a-z][a-z\s]*?))?"
+              r"(?:\s+(?:for\s+)?(?:today|tonight|tomorrow|now|outside))?" + _END),
+]
+
+
+class Route(NamedTuple):
+    """A matched intent and its extracted slots."""
+    intent: str
+    slots: Dict[str, str]
+
+
+def resolve_date(word: Optional[str], today: date) -> str:
+    """
+    Resolve a date word ('tomorrow', 'friday', '2024-01-02') to YYYY-MM-DD.
+    A weekday resolves to its next occurrence, counting today.
+    """
+    if not word or word in ("today", "tonight"):
+        return today.isoformat()
+    if word == "tomorrow":
+        return (today + timedelta(days=1)).isoformat()
+    if word == "yesterday":
+        return (today - timedelta(days=1)).isoformat()
+    name = word.split()[-1]
+    if name in WEEKDAYS:
+        ahead = (WEEKDAYS.index(name) - today.weekday()) % 7
+        if word.startswith("next") and ahead == 0:
+            ahead = 7
+        return (today + timedelta(days=ahead)).isoformat()
+    return word
+
+
+class IntentRouter:
+    """
+    Match user input against INTENT_PATTERNS, compiled once.
+    Slots: 'date' (resolved to YYYY-MM-DD), 'location', 'text', 'todo_id', 'query'
+    and 'recency' (present when a search asks when something last came up).
+    """
+
+    def __init__(self, patterns: List[Tuple[str, str]] = INTENT_PATTERNS,
+                 clock: Callable[[], datetime] = datetime.now):
+        """
+        Args:
+            patterns (list): (intent, regex) pairs tried in order
+            clock (callable): Returns the current local time, for relative dates
+        """
+        self._patterns: List[Tuple[str, Pattern]] = [
+            (intent, re.compile(pattern, re.IGNORECASE)) for intent, pattern in patterns
+        ]
+        self._clock = clock
+
+    def route(self, user_input: str) -> Optional[Route]:
+        """
+        Args:
+            user_input (str): Raw user input
+        Returns:
+            Route: The matched intent and slots, or None if the input needs the LLM
+        """
+        text = " ".join(user_input.split())
+        for intent, pattern in self._patterns:
+            match = pattern.match(text)
+            if match is None:
+                continue
+            slots = {name: value.strip() for name, value in match.groupdict().items() if value}
+            if "date" in slots or "date" in pattern.groupindex:
+                slots["date"] = resolve_date(slots.get("date", "").lower(), self._clock().date())
+            return Route(intent, slots)
+        return None
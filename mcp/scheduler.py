@@ -0,0 +1,107 @@
+"""
+scheduler.py
+Background pre-warming of the morning briefing.
+Runs as a long-lived process that keeps the local calendar and notes mirrors
+in sync and, from the configured time each day, keeps today's briefing current,
+so opening the assistant shows a precomputed briefing instead of waiting on the
+tools and the LLM.
+"""
+
+from datetime import datetime, time as dtime, timedelta
+import logging
+import threading
+from typing import Callable, Optional
+
+from . import tools
+
+logger = logging.getLogger(__name__)
+
+# Time of day from which the briefing is kept pre-warmed
+BRIEFING_TIME = "07:00"
+# Seconds between mirror refreshes and briefing checks
+REFRESH_INTERVAL = 15 * 60
+# A stored briefing verified within this many seconds is shown as-is on startup
+BRIEFING_MAX_AGE = 2 * REFRESH_INTERVAL
+
+def parse_time_of_day(value: str) -> dtime:
+    """
+    Parse an 'HH:MM' time of day.
+    Raises:
+        ValueError: If the value is not a valid 24-hour time
+    """
+    return datetime.strptime(value, "%H:%M").time()
+
+
+class BriefingScheduler:
+    """
+    Periodically refresh context sources and the morning briefing.
+    Each tick syncs the calendar and notes mirrors. The first tick after the
+    briefing time generates the day's briefing; later ticks check it against
+    its inputs' fingerprint and regenerate it only when they have changed, so
+    its todos are stored once per day.
+    """
+
+    def __init__(self, agent, briefing_time: str = BRIEFING_TIME,
+                 refresh_interval: float = REFRESH_INTERVAL,
+                 clock: Callable[[], datetime] = datetime.now):
+        """
+        Args:
+            agent (MCPAgent): Agent whose briefing is pre-warmed
+            briefing_time (str): 'HH:MM' from which the briefing is kept current
+            refresh_interval (float): Seconds between ticks
+            clock (callable): Returns the current local time
+        """
+        self.agent = agent
+        self.briefing_time = parse_time_of_day(briefing_time)
+        self.refresh_interval = refresh_interval
+        self._clock = clock
+        self._stop = threading.Event()
+
+    def tick(self) -> Optional[str]:
+        """
+        Run one refresh cycle.
+        Returns:
+            str: Today's briefing if it was due, None otherwise
+        """
+        now = self._clock()
+        self.agent.set_date(now)
+        self._refresh_mirrors()
+        if now.time() < self.briefing_time:
+            return None
+        # A stored briefing that still matches its inputs is kept, even across daemon restarts
+        briefing = self.agent.refresh_briefing()
+        if briefing is None:
+            briefing = self.agent.run_morning_briefing(verify=True)
+            logger.info(f"Pre-warmed briefing for {self.agent.today}")
+        return briefing
+
+    def _refresh_mirrors(self) -> None:
+        for name, sync in (("calendar", tools.sync_calendar),
+                           ("notes", lambda: tools.sync_notes(force=True))):
+            try:
+                sync()
+            except Exception as e:
+                logger.error(f"Scheduled {name} sync failed: {str(e)}")
+
+    def seconds_until_next_tick(self) -> float:
+        """Wait one refresh interval, but wake up at the briefing time if it comes first."""
+        now = self._clock()
+        due = datetime.combine(now.date(), self.briefing_time)
+        if due <= now:
+            due += timedelta(days=1)
+        return min(self.refresh_interval, (due - now).total_seconds())
+
+    def run_forever(self) -> None:
+        """Tick until stop() is called."""
+        logger.info(f"Briefing scheduler started: briefing at {self.briefing_time:%H:%M}, "
+                    f"refresh every {self.refresh_interval:.0f}s")
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Scheduled briefing refresh failed: {str(e)}")
+            self._stop.wait(self.seconds_until_next_tick())
+        logger.info("Briefing scheduler stopped")
+
+    def stop(self) -> None:
+        self._stop.set()
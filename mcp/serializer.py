@@ -0,0 +1,158 @@
+"""
+serializer.py
+Compact, token-budgeted serialization of context for prompts.
+Each source is projected to one short line per item instead of raw API
+dicts, and list sources are trimmed to fit a per-prompt token budget.
+"""
+
+import json
+import math
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+# Rough token estimate for English text; good enough for budgeting
+CHARS_PER_TOKEN = 4
+# Longest note excerpt included in a prompt, in characters
+NOTE_EXCERPT_CHARS = 240
+
+# Prefix of each list item in a prompt
+BULLET = "\n  - "
+# List sources in the order they get their share of the budget
+LIST_SOURCES = ["calendar_events", "todos", "notes"]
+# Keys that never go into a prompt
+EXCLUDED_KEYS = {"source_status", "servers"}
+
+def count_tokens(text: str) -> int:
+    """Estimate the number of tokens in a string."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+def _clock(value: Dict) -> str:
+    if 'dateTime' in value:
+        return datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00')).strftime('%H:%M')
+    return ''
+
+def format_event(event: Any) -> str:
+    """'10:00-10:30 Team Standup @ Google Meet' for a Google Calendar event."""
+    if not isinstance(event, dict):
+        return str(event)
+    start = event.get('start') or {}
+    end = event.get('end') or {}
+    try:
+        when = f"{_clock(start)}-{_clock(end)}" if 'dateTime' in start else "all day"
+    except ValueError:
+        when = start.get('dateTime', '')
+    line = f"{when} {event.get('summary') or event.get('title') or 'Untitled'}"
+    if event.get('location'):
+        line += f" @ {event['location']}"
+    return line
+
+def format_note(note: Any) -> str:
+    """'Title: first part of the content' for a note dict."""
+    if not isinstance(note, dict):
+        return str(note)
+    content = ' '.join(str(note.get('content', '')).split())
+    if len(content) > NOTE_EXCERPT_CHARS:
+        content = content[:NOTE_EXCERPT_CHARS].rstrip() + '…'
+    title = note.get('title') or 'Untitled'
+    return f"{title}: {content}" if content else title
+
+def format_todo(todo: Any) -> str:
+    """'#3 Send report' for an (id, text) todo row."""
+    if isinstance(todo, (list, tuple)) and len(todo) == 2:
+        return f"#{todo[0]} {todo[1]}"
+    return str(todo)
+
+def format_weather(weather: Any) -> str:
+    """Collapse the decorated weather report to 'Label: value; ...'."""
+    if not isinstance(weather, str):
+        return json.dumps(weather, default=str)
+    fields = []
+    for line in weather.splitlines():
+        if ':' in line:
+            fields.append(re.sub(r'^[^A-Za-z]+', '', line).strip())
+        elif line.strip().startswith('🌍'):
+            fields.append(line.strip('🌍 ').strip())
+    return '; '.join(fields) if fields else weather.strip()
+
+def format_capabilities(capabilities: Any) -> str:
+    """One line per server: 'calendar (available): create_event, list_events'."""
+    if not isinstance(capabilities, dict):
+        return str(capabilities)
+    lines = []
+    for server, info in capabilities.items():
+        names = list(info.get('tools', {})) + list(info.get('resources', {}))
+        lines.append(f"{server} ({info.get('status', 'unknown')}): {', '.join(names)}")
+    return '\n'.join(lines)
+
+FORMATTERS: Dict[str, Callable[[Any], str]] = {
+    "calendar_events": format_event,
+    "notes": format_note,
+    "todos": format_todo,
+    "weather": format_weather,
+    "capabilities": format_capabilities,
+}
+
+def _fit_lines(lines: List[str], budget: int) -> str:
+    """
+    Render leading lines as a bullet list within the budget, ending with a
+    '(+N more)' marker for the lines that were dropped. Bullets and the
+    marker count against the budget.
+    """
+    if not lines:
+        return "none"
+    items, used = [], 0
+    for index, line in enumerate(lines):
+        item = BULLET + line
+        dropped_after = len(lines) - index - 1
+        # Leave room for the marker in case the next line does not fit
+        marker = count_tokens(f"{BULLET}(+{dropped_after} more)") if dropped_after else 0
+        if used + count_tokens(item) + marker > budget:
+            break
+        items.append(item)
+        used += count_tokens(item)
+    if len(items) < len(lines):
+        marker = f"{BULLET}(+{len(lines) - len(items)} more)"
+        if used + count_tokens(marker) <= budget:
+            items.append(marker)
+    return ''.join(items)
+
+def serialize_context(context: Dict[str, Any], budget: int) -> Dict[str, str]:
+    """
+    Project context to compact strings that fit a token budget.
+    Scalar fields are kept whole; list sources share what is left of the
+    budget in LIST_SOURCES order, with unused share rolling over to the next.
+    When notes must be trimmed, newest notes are kept first, unless they carry
+    a retrieval 'score', in which case they are already ranked best first.
+    Args:
+        context (dict): Raw context from the tools
+        budget (int): Approximate token budget for all context values
+    Returns:
+        dict: Context values as compact strings
+    """
+    result: Dict[str, str] = {}
+    lists: Dict[str, List[str]] = {}
+    for key, value in context.items():
+        if key in EXCLUDED_KEYS:
+            continue
+        if key in LIST_SOURCES and isinstance(value, (list, tuple)):
+            items = list(value)
+            ranked = any(isinstance(item, dict) and 'score' in item for item in items)
+            if key == "notes" and not ranked:
+                items.sort(key=lambda note: str(note.get('date') or '') if isinstance(note, dict) else '',
+                           reverse=True)
+            lists[key] = [FORMATTERS[key](item) for item in items]
+        elif key in FORMATTERS:
+            result[key] = FORMATTERS[key](value)
+        elif isinstance(value, (dict, list, tuple)):
+            result[key] = json.dumps(value, default=str, separators=(',', ':'))
+        else:
+            result[key] = str(value)
+
+    remaining = budget - sum(count_tokens(text) for text in result.values())
+    ordered = [key for key in LIST_SOURCES if key in lists]
+    for position, key in enumerate(ordered):
+        share = max(remaining, 0) // (len(ordered) - position)
+        result[key] = _fit_lines(lists[key], share)
+        remaining -= count_tokens(result[key])
+    return result
@@ -2,18 +2,80 @@
 tools.py
 Core tool functions for calendar, notes, and weather integration.
 """
+from datetime import datetime, timedelta
 import logging
+import threading
+import time
 
-from tool_utils.google_calendar import list_events_for_date as gc_get_calendar_events
+from . import memory
+from .circuit import CircuitBreaker, CircuitOpenError
+from .context import context_store
+from .retrieval import get_index
+from tool_utils.google_calendar import sync_events as gc_sync_events, SyncTokenExpired, UTC_OFFSET
 
 logger = logging.getLogger(__name__)
-from tool_utils.notion_notes import get_notes as nn_get_notes
-from tool_utils.weather import get_weather as w_get_weather
+from tool_utils.notion_notes import iter_notes as nn_iter_notes
+from tool_utils.weather import (
+    get_weather as w_get_weather, get_weather_data as w_get_weather_data, is_cached as w_is_cached
+)
+
+_calendar_sync_lock = threading.Lock()
+_notes_sync_lock = threading.Lock()
+_last_notes_sync = 0.0
+
+# Minimum seconds between incremental Notion syncs
+NOTES_SYNC_INTERVAL = 60
+# Seconds between full Notion listings that drop deleted notes from the mirror
+NOTES_RECONCILE_INTERVAL = 6 * 60 * 60
+
+# Breakers around the remote backends. While one is open, reads are answered
+# from the local mirror without waiting on the backend.
+calendar_breaker = CircuitBreaker("calendar.sync")
+notes_breaker = CircuitBreaker("notes.sync")
+weather_breaker = CircuitBreaker("weather.fetch")
+
+def _parse_event_time(value: dict) -> float:
+    """Convert a Google event start/end ({'dateTime'} or all-day {'date'}) to a timestamp."""
+    if 'dateTime' in value:
+        return datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00')).timestamp()
+    return datetime.fromisoformat(f"{value['date']}T00:00:00{UTC_OFFSET}").timestamp()
+
+def sync_calendar() -> int:
+    """
+    Pull calendar changes into the local event mirror.
+    Uses the saved sync token for an incremental sync, and falls back to a
+    full resync when there is no token or Google reports it expired.
+    Returns:
+        int: Number of changed events received
+    """
+    with _calendar_sync_lock:
+        store = memory.get_store()
+        sync_token = store.get_sync_state('calendar')
+        try:
+            events, next_token = gc_sync_events(sync_token)
+        except SyncTokenExpired:
+            logger.info("Calendar sync token expired, running a full resync")
+            sync_token = None
+            events, next_token = gc_sync_events(None)
+
+        upserts, deleted_ids = [], []
+        for event in events:
+            if event.get('status') == 'cancelled':
+                deleted_ids.append(event['id'])
+            else:
+                upserts.append((event['id'], _parse_event_time(event['start']),
+                                _parse_event_time(event['end']), event))
+        store.apply_calendar_changes(upserts, deleted_ids, next_token, full=sync_token is None)
+        logger.debug(f"Synced {len(events)} calendar changes")
+        return len(events)
 
 # Calendar tool stub
 def get_calendar_events(start_date: str, end_date: str = None):
     """
     Fetch calendar events between start_date and end_date.
+    Only changes since the last sync cross the network; the date range itself
+    is served from the indexed local mirror, which is also used as-is when
+    Google Calendar is unreachable.
     Args:
         start_date (str): 'YYYY-MM-DD'
         end_date (str, optional): 'YYYY-MM-DD'. If not provided, only get events for start_date
@@ -21,10 +83,18 @@ def get_calendar_events(start_date: str, end_date: str = None):
         list: List of event dicts
     """
     try:
-        return gc_get_calendar_events(start_date, end_date)
+        calendar_breaker.call(sync_calendar)
+    except CircuitOpenError:
+        logger.debug("Calendar circuit open, serving the local mirror")
     except FileNotFoundError:
         logger.warning("Google Calendar credentials file not found. Calendar integration disabled.")
-        return []
+    except Exception as e:
+        logger.error(f"Error syncing calendar events: {str(e)}")
+
+    try:
+        range_start = datetime.fromisoformat(f"{start_date}T00:00:00{UTC_OFFSET}")
+        range_end = datetime.fromisoformat(f"{end_date or start_date}T00:00:00{UTC_OFFSET}") + timedelta(days=1)
+        return memory.get_mirrored_events(range_start.timestamp(), range_end.timestamp())
     except Exception as e:
         logger.error(f"Error getting calendar events: {str(e)}")
         return []
@@ -43,7 +113,9 @@ def create_calendar_event(title, start_iso, end_iso, location=None, description=
         str: Event ID
     """
     from tool_utils.google_calendar import create_event as gc_create_event
-    return gc_create_event(title, start_iso, end_iso, location, description)
+    event_id = gc_create_event(title, start_iso, end_iso, location, description)
+    context_store.invalidate("calendar_events")
+    return event_id
 
 # Update calendar event
 def update_calendar_event(event_id, **kwargs):
@@ -56,7 +128,9 @@ def update_calendar_event(event_id, **kwargs):
         dict: Updated event
     """
     from tool_utils.google_calendar import update_event as gc_update_event
-    return gc_update_event(event_id, **kwargs)
+    updated_event = gc_update_event(event_id, **kwargs)
+    context_store.invalidate("calendar_events")
+    return updated_event
 
 # Delete calendar event
 def delete_calendar_event(event_id):
@@ -68,19 +142,95 @@ def delete_calendar_event(event_id):
         None
     """
     from tool_utils.google_calendar import delete_event as gc_delete_event
-    return gc_delete_event(event_id)
+    gc_delete_event(event_id)
+    context_store.invalidate("calendar_events")
+
+# Batch calendar mutations
+def batch_calendar_events(operations):
+    """
+    Create, patch and delete many calendar events in a few batched requests.
+    Args:
+        operations (list): Operation dicts, see tool_utils.google_calendar.batch_mutate
+    Returns:
+        list: Per-operation results in input order
+    """
+    from tool_utils.google_calendar import batch_mutate as gc_batch_mutate
+    results = gc_batch_mutate(operations)
+    context_store.invalidate("calendar_events")
+    return results
+
+def sync_notes(force: bool = False) -> int:
+    """
+    Pull Notion note changes into the local notes mirror.
+    Fetches only notes edited since the saved high-water mark, and
+    periodically lists everything to drop notes deleted in Notion.
+    Args:
+        force (bool): Sync even if the last sync was under NOTES_SYNC_INTERVAL ago
+    Returns:
+        int: Number of notes received
+    """
+    global _last_notes_sync
+    with _notes_sync_lock:
+        if not force and time.monotonic() - _last_notes_sync < NOTES_SYNC_INTERVAL:
+            return 0
+        store = memory.get_store()
+        high_water = store.get_sync_state('notes')
+        reconciled = store.get_sync_state('notes_reconciled')
+        full = (high_water is None or reconciled is None
+                or time.time() - float(reconciled) > NOTES_RECONCILE_INTERVAL)
+
+        notes = list(nn_iter_notes(edited_since=None if full else high_water))
+        edited = [note['last_edited'] for note in notes if note.get('last_edited')]
+        if high_water:
+            edited.append(high_water)
+        store.apply_note_changes(notes, max(edited, default=None),
+                                 reconciled_at=str(time.time()) if full else None)
+        _last_notes_sync = time.monotonic()
+        logger.debug(f"Synced {len(notes)} notes ({'full' if full else 'incremental'})")
+        return len(notes)
+
+def _sync_notes_guarded():
+    """Sync notes through the notes breaker, leaving the mirror as-is on failure."""
+    try:
+        notes_breaker.call(sync_notes)
+    except CircuitOpenError:
+        logger.debug("Notes circuit open, serving the local mirror")
+    except Exception as e:
+        logger.error(f"Error syncing notes: {str(e)}")
+
+def _expire_notes_sync():
+    """Make the next get_notes call sync, e.g. after a local write."""
+    global _last_notes_sync
+    _last_notes_sync = 0.0
 
 # Notes tool stub
-def get_notes(from_date):
+def get_notes(from_date, limit=None):
     """
     Fetch notes from a given date.
+    Notion changes are synced incrementally into the local notes mirror,
+    which then answers the query; on sync errors the mirror is used as-is.
     Args:
         from_date (str): 'YYYY-MM-DD'
+        limit (int, optional): Maximum number of notes to return
     Returns:
         list: List of note dicts
     """
-    # TODO: Connect to Notion Notes integration
-    return nn_get_notes(from_date)
+    _sync_notes_guarded()
+    return memory.get_mirrored_notes(from_date, limit)
+
+def get_relevant_notes(query, limit=5):
+    """
+    Fetch the notes and past briefings most similar to a query.
+    Uses the local vector index over the notes mirror, which is synced and
+    re-embedded incrementally first.
+    Args:
+        query (str): Free text, e.g. the user's question
+        limit (int): Maximum number of documents
+    Returns:
+        list: Note dicts with a similarity score, best first
+    """
+    _sync_notes_guarded()
+    return get_index().relevant_documents(query, limit)
 
 # Create note
 def create_note(content, title="Untitled", tags=None):
@@ -96,7 +246,10 @@ def create_note(content, title="Untitled", tags=None):
     if tags is None:
         tags = []
     from tool_utils.notion_notes import create_note
-    return create_note(content, title, tags)
+    note_id = create_note(content, title, tags)
+    _expire_notes_sync()
+    context_store.invalidate("notes")
+    return note_id
 
 # Update note
 def update_note(note_id, new_content=None, new_title=None):
@@ -110,7 +263,9 @@ def update_note(note_id, new_content=None, new_title=None):
         None
     """
     from tool_utils.notion_notes import update_note
-    return update_note(note_id, new_content, new_title)
+    update_note(note_id, new_content, new_title)
+    _expire_notes_sync()
+    context_store.invalidate("notes")
 
 # Delete note
 def delete_note(note_id):
@@ -122,7 +277,9 @@ def delete_note(note_id):
         None
     """
     from tool_utils.notion_notes import delete_note
-    return delete_note(note_id)
+    delete_note(note_id)
+    memory.get_store().delete_mirrored_note(note_id)
+    context_store.invalidate("notes")
 
 # Weather tool stub
 def get_weather(location):
@@ -131,7 +288,13 @@ def get_weather(location):
     Args:
         location (str): City or region name
     Returns:
-        dict: Weather data
+        str: Formatted weather
+    Raises:
+        CircuitOpenError: If the weather backend is failing fast
+        Exception: If the weather could not be fetched
     """
-    # TODO: Connect to weather API integration
+    # A cached report needs no request, so it is served even while the circuit is open
+    if not w_is_cached(location):
+        # Fetch through the breaker so failures surface; formatting reuses the cached payload
+        weather_breaker.call(lambda: w_get_weather_data(location))
     return w_get_weather(location)
\ No newline at end of file
@@ -6,6 +6,8 @@ Unit and integration tests for the MCP agent.
 import pytest
 from datetime import datetime, timedelta
 
+from groq_api import Completion
+from mcp import memory
 from mcp.agent import MCPAgent
 from mcp.memory import get_briefing, get_incomplete_todos, store_todo
 
@@ -43,6 +45,43 @@ def test_extract_todos(agent):
     assert "Send email" in todos
     assert "Review document" in todos
 
+def test_get_capabilities_fetches_no_sources(agent, monkeypatch):
+    fetched = []
+    for name in list(agent._gatherer.sources):
+        agent._gatherer.sources[name] = lambda name=name: fetched.append(name)
+    captured = {}
+    monkeypatch.setattr("mcp.agent.generate_response",
+                        lambda prompt, context: captured.update(context) or "I can help")
+
+    assert agent.get_capabilities({"todos": {"status": "available"}}) == "I can help"
+    assert fetched == []
+    assert captured["capabilities"] == {"todos": {"status": "available"}}
+
+def test_failed_briefing_is_not_stored(agent, monkeypatch):
+    for name in list(agent._gatherer.sources):
+        agent._gatherer.sources[name] = lambda: []
+    before = memory.get_latest_briefing(agent.today)
+    monkeypatch.setattr("mcp.agent.complete", lambda prompt, context, on_token=None:
+                        Completion("Good \n\nSorry, an error occurred", failed=True))
+
+    assert agent.run_morning_briefing(on_token=lambda chunk: None).endswith("an error occurred")
+    assert memory.get_latest_briefing(agent.today) == before
+
+def test_regenerated_briefing_keeps_the_days_todos(agent, monkeypatch, tmp_path):
+    monkeypatch.setattr(memory, "_store", memory.MemoryStore(str(tmp_path / "memory.db")))
+    for name in list(agent._gatherer.sources):
+        agent._gatherer.sources[name] = lambda: []
+    events = []
+    agent._gatherer.sources["calendar_events"] = lambda: list(events)
+    monkeypatch.setattr("mcp.agent.complete", lambda prompt, context, on_token=None:
+                        Completion(f"{len(context['calendar_events'])} events\nTODO: Book room"))
+
+    agent.run_morning_briefing()
+    events.append({"summary": "Offsite"})
+    assert agent.run_morning_briefing() == "1 events\nTODO: Book room"
+    assert memory.get_incomplete_todos(agent.today) == [(1, "Book room")]
+    memory.get_store().close()
+
 @pytest.mark.integration
 def test_run_morning_briefing(agent):
     briefing = agent.run_morning_briefing()
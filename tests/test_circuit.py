@@ -0,0 +1,169 @@
+"""
+test_circuit.py
+Unit tests for circuit breakers and fail-fast tool servers.
+"""
+
+import pytest
+
+from mcp.circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, is_backend_failure
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+def test_opens_on_failure_rate(clock):
+    breaker = CircuitBreaker("notes", failure_rate=0.5, min_calls=4, clock=clock)
+    for success in (True, False, True):
+        breaker.record(success)
+    assert breaker.state == CLOSED
+
+    breaker.record(False)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+def test_slow_calls_count_as_failures(clock):
+    breaker = CircuitBreaker("calendar", min_calls=2, slow_call_seconds=1.0, clock=clock)
+    breaker.record(True, elapsed=2.0)
+    breaker.record(True, elapsed=3.0)
+    assert breaker.state == OPEN
+
+def test_half_open_allows_one_probe(clock):
+    breaker = CircuitBreaker("notes", min_calls=1, cooldown=30, clock=clock)
+    breaker.record(False)
+    clock.now = 29
+    assert not breaker.allow()
+
+    clock.now = 30
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record(True)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker("notes", min_calls=1, cooldown=30, clock=clock)
+    breaker.record(False)
+    clock.now = 30
+    assert breaker.allow()
+    breaker.record(False)
+
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["retry_in"] == 30
+
+def test_cancel_returns_the_probe(clock):
+    breaker = CircuitBreaker("notes", min_calls=1, cooldown=0, clock=clock)
+    breaker.record(False)
+    assert breaker.allow()
+    breaker.cancel()
+    assert breaker.allow()
+
+def test_call_records_outcomes_and_fails_fast(clock):
+    def down():
+        raise ConnectionError("down")
+
+    breaker = CircuitBreaker("weather", min_calls=1, clock=clock)
+    assert breaker.call(lambda: "sunny") == "sunny"
+    with pytest.raises(ConnectionError):
+        breaker.call(down)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "sunny")
+
+class HTTPError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status_code = status
+
+def test_bad_requests_are_not_backend_failures(clock):
+    assert not is_backend_failure(TypeError("unexpected keyword argument"))
+    assert not is_backend_failure(HTTPError(404))
+    assert is_backend_failure(HTTPError(429))
+    assert is_backend_failure(HTTPError(503))
+    assert is_backend_failure(ConnectionError("down"))
+
+    def not_found():
+        raise HTTPError(404)
+
+    breaker = CircuitBreaker("weather", min_calls=1, clock=clock)
+    for _ in range(3):
+        with pytest.raises(HTTPError):
+            breaker.call(not_found)
+    assert breaker.state == CLOSED
+
+def test_bad_arguments_do_not_trip_the_server():
+    from interactive_cli import MCPToolServer
+
+    def create_event(title, start_iso, end_iso):
+        return "e1"
+
+    server = MCPToolServer("calendar")
+    server.register_tool("create_event", create_event, "Create an event")
+    server.register_tool("list_events", lambda date: [f"event on {date}"], "List events")
+    for _ in range(5):
+        assert server.call_tool("create_event", title="Standup") is None
+    assert server.status() == "available"
+    assert server.call_tool("list_events", date="2024-01-01") == ["event on 2024-01-01"]
+
+def test_server_fails_fast_with_last_good_result():
+    from interactive_cli import MCPToolServer
+
+    calls = []
+    healthy = [True]
+
+    def list_events(date):
+        calls.append(date)
+        if not healthy[0]:
+            raise ConnectionError("backend down")
+        return [f"event on {date}"]
+
+    server = MCPToolServer("calendar")
+    server.register_tool("list_events", list_events, "List events", cache_fallback=True)
+    assert server.call_tool("list_events", date="2024-01-01") == ["event on 2024-01-01"]
+    assert server.status() == "available"
+
+    healthy[0] = False
+    for _ in range(3):
+        assert server.call_tool("list_events", date="2024-01-01") == ["event on 2024-01-01"]
+    assert server.status() == "unavailable"
+    assert server.error_state
+
+    # Open circuit: answered from the fallback without touching the backend
+    made = len(calls)
+    assert server.call_tool("list_events", date="2024-01-01") == ["event on 2024-01-01"]
+    assert server.call_tool("list_events", date="2024-01-02") is None
+    assert len(calls) == made
+
+def test_backend_failures_open_the_sync_circuit(monkeypatch, tmp_path):
+    from interactive_cli import NotesServer
+    from mcp import memory, tools
+
+    store = memory.MemoryStore(str(tmp_path / "memory.db"))
+    monkeypatch.setattr(memory, "_store", store)
+    monkeypatch.setattr(tools, "notes_breaker", CircuitBreaker("notes.sync"))
+    syncs = []
+
+    def sync_notes():
+        syncs.append(None)
+        raise ConnectionError("Notion down")
+    monkeypatch.setattr(tools, "sync_notes", sync_notes)
+
+    server = NotesServer()
+    for _ in range(3):
+        assert server.call_tool("get_notes", from_date="2024-01-01") == []
+    assert tools.notes_breaker.state == OPEN
+    assert server.status() == "degraded"
+    assert server.open_circuits() == ["notes.sync"]
+
+    # Served from the mirror without calling Notion again
+    assert server.call_tool("get_notes", from_date="2024-01-01") == []
+    assert len(syncs) == 3
+    store.close()
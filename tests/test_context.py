@@ -0,0 +1,88 @@
+"""
+test_context.py
+Unit tests for concurrent context gathering.
+"""
+
+import time
+
+from mcp.context import ContextGatherer, ContextStore, FRESH, STALE, UNAVAILABLE
+
+def _fail():
+    raise RuntimeError("backend down")
+
+def test_gather_runs_sources_concurrently():
+    gatherer = ContextGatherer(sources={
+        "calendar_events": lambda: time.sleep(0.2) or ["event"],
+        "notes": lambda: time.sleep(0.2) or ["note"],
+        "weather": lambda: time.sleep(0.2) or "sunny",
+    })
+
+    started = time.monotonic()
+    results, status = gatherer.gather()
+
+    assert time.monotonic() - started < 0.5
+    assert results == {"calendar_events": ["event"], "notes": ["note"], "weather": "sunny"}
+    assert set(status.values()) == {FRESH}
+
+def test_gather_marks_slow_source_unavailable():
+    gatherer = ContextGatherer(
+        sources={"weather": lambda: time.sleep(1) or "sunny", "todos": lambda: []},
+        timeouts={"weather": 0.1},
+        defaults={"weather": "Weather unavailable"}
+    )
+
+    started = time.monotonic()
+    results, status = gatherer.gather()
+
+    assert time.monotonic() - started < 0.5
+    assert results["weather"] == "Weather unavailable"
+    assert status == {"weather": UNAVAILABLE, "todos": FRESH}
+
+def test_gather_falls_back_to_last_good_value():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) > 1:
+            _fail()
+        return ["event"]
+
+    gatherer = ContextGatherer(sources={"calendar_events": flaky})
+    gatherer.gather()
+    results, status = gatherer.gather()
+
+    assert results["calendar_events"] == ["event"]
+    assert status["calendar_events"] == STALE
+
+def test_store_serves_fresh_snapshot_without_reloading():
+    store = ContextStore(ttls={"weather": 60})
+    calls = []
+    loader = lambda: calls.append(1) or "sunny"
+
+    assert store.get("weather", "New York", loader) == "sunny"
+    assert store.get("weather", "New York", loader) == "sunny"
+    assert len(calls) == 1
+
+def test_store_reloads_after_ttl():
+    store = ContextStore(ttls={"calendar_events": 0})
+    calls = []
+    loader = lambda: calls.append(1) or []
+
+    store.get("calendar_events", "2024-01-01", loader)
+    store.get("calendar_events", "2024-01-01", loader)
+    assert len(calls) == 2
+
+def test_store_invalidates_only_affected_source():
+    store = ContextStore(ttls={"todos": 60, "weather": 60})
+    store.get("todos", "2024-01-01", lambda: [(1, "old")])
+    store.get("weather", "New York", lambda: "sunny")
+
+    store.invalidate("todos")
+
+    assert store.get("todos", "2024-01-01", lambda: [(1, "new")]) == [(1, "new")]
+    assert store.get("weather", "New York", lambda: "rainy") == "sunny"
+
+def test_store_does_not_cache_none():
+    store = ContextStore(ttls={"notes": 60})
+    assert store.get("notes", "2024-01-01", lambda: None) is None
+    assert store.get("notes", "2024-01-01", lambda: ["note"]) == ["note"]
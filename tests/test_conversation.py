@@ -0,0 +1,67 @@
+"""
+test_conversation.py
+Unit tests for the bounded conversation memory.
+"""
+
+import pytest
+
+from mcp.conversation import ConversationMemory, summarize_turn
+from mcp.memory import MemoryStore
+from mcp.serializer import count_tokens
+
+@pytest.fixture
+def store(tmp_path):
+    store = MemoryStore(str(tmp_path / "notes.db"))
+    yield store
+    store.close()
+
+def test_empty_conversation_renders_none(store):
+    assert ConversationMemory(store, "2024-01-01").render() == "none"
+
+def test_recent_turns_are_kept_verbatim(store):
+    conversation = ConversationMemory(store, "2024-01-01")
+    conversation.add_turn("What's on today?", "Two meetings.")
+    conversation.add_turn("When is the first?", "At 10:00.")
+
+    assert conversation.turns() == [("What's on today?", "Two meetings."), ("When is the first?", "At 10:00.")]
+    assert conversation.summary == ""
+    assert "User: When is the first?\nAssistant: At 10:00." in conversation.render()
+
+def test_old_turns_fold_into_summary(store):
+    conversation = ConversationMemory(store, "2024-01-01", max_turns=2)
+    conversation.add_turn("Plan the offsite. Please.", "Book a venue first. Then invite people.")
+    conversation.add_turn("Second", "Answer two")
+    conversation.add_turn("Third", "Answer three")
+
+    assert conversation.summary == summarize_turn("Plan the offsite. Please.", "Book a venue first.")
+    assert conversation.summary == "User asked: Plan the offsite. → Book a venue first."
+    assert [user for user, _ in conversation.turns()] == ["Second", "Third"]
+    assert len(store.get_turns("2024-01-01")) == 2
+
+def test_rendered_size_stays_bounded(store):
+    conversation = ConversationMemory(store, "2024-01-01", window_tokens=100, summary_tokens=60)
+    sizes = []
+    for i in range(200):
+        conversation.add_turn(f"Question number {i} about the project?", f"Answer {i}. " + "detail " * 20)
+        sizes.append(count_tokens(conversation.render()))
+
+    assert max(sizes) < 100 + 60 + 20
+    assert len(store.get_turns("2024-01-01")) <= 2
+
+def test_session_is_resumed_from_the_database(store):
+    conversation = ConversationMemory(store, "2024-01-01", max_turns=1)
+    conversation.add_turn("First question", "First answer")
+    conversation.add_turn("Follow-up", "Second answer")
+
+    resumed = ConversationMemory(store, "2024-01-01", max_turns=1)
+    assert resumed.render() == conversation.render()
+    assert ConversationMemory(store, "2024-01-02").render() == "none"
+
+def test_clear_forgets_the_session(store):
+    conversation = ConversationMemory(store, "2024-01-01", max_turns=1)
+    conversation.add_turn("a", "b")
+    conversation.add_turn("c", "d")
+    conversation.clear()
+
+    assert conversation.render() == "none"
+    assert ConversationMemory(store, "2024-01-01").render() == "none"
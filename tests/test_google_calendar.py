@@ -0,0 +1,200 @@
+"""
+test_google_calendar.py
+Unit tests for the cached Calendar service and authorized sessions.
+"""
+
+import sys
+import threading
+import types
+
+import pytest
+
+from tool_utils import google_calendar
+
+class FakeCredentials:
+    valid = True
+    expiry = None
+    refresh_token = None
+
+class FakeHttp:
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+
+class FakeAuthorizedHttp:
+    def __init__(self, credentials, http=None):
+        self.credentials = credentials
+        self.http = http
+
+@pytest.fixture
+def google(monkeypatch):
+    """Fake Google client modules; returns the list of build() calls."""
+    builds = []
+
+    def build(*args, **kwargs):
+        builds.append((args, kwargs))
+        return object()
+
+    discovery = types.ModuleType("googleapiclient.discovery")
+    discovery.build = build
+    package = types.ModuleType("googleapiclient")
+    package.discovery = discovery
+    monkeypatch.setitem(sys.modules, "googleapiclient", package)
+    monkeypatch.setitem(sys.modules, "googleapiclient.discovery", discovery)
+    monkeypatch.setitem(sys.modules, "httplib2", types.SimpleNamespace(Http=FakeHttp))
+    monkeypatch.setitem(sys.modules, "google_auth_httplib2",
+                        types.SimpleNamespace(AuthorizedHttp=FakeAuthorizedHttp))
+    creds = FakeCredentials()
+    monkeypatch.setattr(google_calendar, "_load_credentials", lambda: creds)
+    google_calendar.reset_service()
+    yield builds
+    google_calendar.reset_service()
+
+def test_service_is_built_once(google):
+    services = []
+    threads = [threading.Thread(target=lambda: services.append(google_calendar.get_service()))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(google) == 1
+    assert len({id(service) for service in services}) == 1
+    assert google[0][1]["static_discovery"] is True
+    assert google[0][1]["cache_discovery"] is False
+
+def test_reset_service_rebuilds(google):
+    google_calendar.get_service()
+    google_calendar.reset_service()
+    google_calendar.get_service()
+    assert len(google) == 2
+
+def test_http_session_is_reused_per_thread(google):
+    http = google_calendar._authorized_http()
+    assert google_calendar._authorized_http() is http
+    assert http.http.timeout == google_calendar.HTTP_TIMEOUT
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(google_calendar._authorized_http()))
+    thread.start()
+    thread.join()
+    assert other[0] is not http
+    assert other[0].credentials is http.credentials
+
+def test_http_session_follows_new_credentials(google, monkeypatch):
+    http = google_calendar._authorized_http()
+    new_creds = FakeCredentials()
+    monkeypatch.setattr(google_calendar, "_creds", new_creds)
+    assert google_calendar._authorized_http().credentials is new_creds
+    assert google_calendar._authorized_http() is not http
+
+def test_credentials_near_expiry_are_refreshed_once(google, monkeypatch):
+    refreshed = []
+    creds = FakeCredentials()
+    creds.valid = False
+    creds.refresh_token = "token"
+    monkeypatch.setattr(google_calendar, "_creds", creds)
+
+    def refresh(target):
+        refreshed.append(target)
+        target.valid = True
+    monkeypatch.setattr(google_calendar, "_refresh", refresh)
+
+    assert google_calendar._get_credentials() is creds
+    assert google_calendar._get_credentials() is creds
+    assert refreshed == [creds]
+
+class FakeRequest:
+    def __init__(self, method, **kwargs):
+        self.method = method
+        self.kwargs = kwargs
+
+class FakeEvents:
+    def insert(self, **kwargs):
+        return FakeRequest("insert", **kwargs)
+
+    def patch(self, **kwargs):
+        return FakeRequest("patch", **kwargs)
+
+    def delete(self, **kwargs):
+        return FakeRequest("delete", **kwargs)
+
+class FakeBatch:
+    def __init__(self, callback, failing):
+        self.callback = callback
+        self.failing = failing
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self, http=None):
+        for request_id, request in self.requests:
+            if request.kwargs.get("eventId") in self.failing:
+                self.callback(request_id, None, Exception("404 Not Found"))
+            else:
+                self.callback(request_id, {"method": request.method, **request.kwargs}, None)
+
+class FakeService:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.batches = []
+
+    def events(self):
+        return FakeEvents()
+
+    def new_batch_http_request(self, callback):
+        batch = FakeBatch(callback, self.failing)
+        self.batches.append(batch)
+        return batch
+
+@pytest.fixture
+def service(monkeypatch):
+    service = FakeService(failing={"missing"})
+    monkeypatch.setattr(google_calendar, "get_service", lambda: service)
+    monkeypatch.setattr(google_calendar, "_authorized_http", lambda: None)
+    monkeypatch.setattr(google_calendar, "governed", lambda provider, func, **kwargs: func())
+    return service
+
+def test_batch_is_split_at_the_batch_limit(service):
+    operations = [{"op": "delete", "event_id": f"e{i}"} for i in range(google_calendar.BATCH_LIMIT + 1)]
+    results = google_calendar.batch_mutate(operations)
+
+    assert [len(batch.requests) for batch in service.batches] == [google_calendar.BATCH_LIMIT, 1]
+    assert all(result["ok"] for result in results)
+    assert results[-1]["result"]["eventId"] == f"e{google_calendar.BATCH_LIMIT}"
+
+def test_batch_reports_per_item_errors_in_order(service):
+    results = google_calendar.batch_mutate([
+        {"op": "create", "title": "Standup", "start_iso": "2024-01-02T10:00:00",
+         "end_iso": "2024-01-02T10:15:00"},
+        {"op": "delete", "event_id": "missing"},
+        {"op": "patch", "event_id": "e1", "summary": "Renamed", "color": "red"},
+    ])
+
+    assert results[0]["ok"] and results[0]["result"]["body"]["summary"] == "Standup"
+    assert results[1] == {"ok": False, "error": "404 Not Found"}
+    assert results[2]["result"]["body"] == {"summary": "Renamed"}
+
+def test_batch_rejects_invalid_operations_without_sending_them(service):
+    results = google_calendar.batch_mutate([
+        {"op": "move", "event_id": "e1"},
+        {"op": "create", "title": "No times"},
+        {"op": "delete", "event_id": "e2"},
+    ])
+
+    assert not results[0]["ok"] and "Unknown batch operation" in results[0]["error"]
+    assert not results[1]["ok"] and results[1]["error"].startswith("Invalid operation")
+    assert results[2]["ok"]
+    assert [request_id for request_id, _ in service.batches[0].requests] == ["2"]
+
+def test_patch_reschedules_a_series(service):
+    operations = [{"op": "patch", "event_id": f"e{day}",
+                   "start_iso": f"2024-01-0{day}T11:00:00", "end_iso": f"2024-01-0{day}T11:30:00"}
+                  for day in range(1, 4)]
+    results = google_calendar.batch_mutate(operations)
+
+    body = results[1]["result"]["body"]
+    assert body["start"] == {"dateTime": "2024-01-02T11:00:00", "timeZone": google_calendar.TIME_ZONE}
+    assert body["end"] == {"dateTime": "2024-01-02T11:30:00", "timeZone": google_calendar.TIME_ZONE}
+    assert len(service.batches) == 1
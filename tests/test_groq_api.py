@@ -0,0 +1,166 @@
+"""
+test_groq_api.py
+Unit tests for the Groq wrapper, with a fake client in place of the SDK.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import groq_api
+from llm_cache import ResponseCache
+from tool_utils.ratelimit import Governor, Limit
+
+def chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+class FakeCompletions:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def create(self, **kwargs):
+        return self.stream()
+
+@pytest.fixture
+def groq(monkeypatch, tmp_path):
+    """Route the wrapper to a fake client; set .stream to a generator factory."""
+    completions = FakeCompletions(lambda: iter([]))
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(groq_api, "get_client", lambda: client)
+    monkeypatch.setattr(groq_api, "response_cache", ResponseCache(str(tmp_path / "cache.db")))
+    unlimited = Governor("groq", Limit(1000, burst=1000, tokens_per_minute=10 ** 9))
+    monkeypatch.setattr(groq_api, "get_governor", lambda provider: unlimited)
+    return completions
+
+def test_complete_streams_chunks_and_caches(groq):
+    groq.stream = lambda: iter([chunk("Good "), chunk("morning")])
+    seen = []
+
+    completion = groq_api.complete("Hi {context}", {}, on_token=seen.append)
+    assert completion == groq_api.Completion("Good morning", failed=False)
+    assert seen == ["Good ", "morning"]
+    assert groq_api.complete("Hi {context}", {}, on_token=seen.append).text == "Good morning"
+
+def test_complete_flags_a_stream_that_fails_midway(groq):
+    def broken():
+        yield chunk("Good ")
+        raise ConnectionError("stream reset")
+    groq.stream = broken
+    seen = []
+
+    completion = groq_api.complete("Hi {context}", {}, on_token=seen.append)
+    assert completion.failed
+    assert completion.text == f"Good \n\n{groq_api.API_ERROR_MESSAGE}"
+    assert seen[-1] == f"\n\n{groq_api.API_ERROR_MESSAGE}"
+    # The partial response is not cached
+    groq.stream = lambda: iter([chunk("Fresh")])
+    assert groq_api.complete("Hi {context}", {}, on_token=seen.append).text == "Fresh"
+
+def test_generate_response_stream_yields_the_error_text(groq):
+    def broken():
+        raise ConnectionError("refused")
+        yield
+    groq.stream = broken
+    assert list(groq_api.generate_response_stream("Hi {context}", {})) == [groq_api.API_ERROR_MESSAGE]
+
+@pytest.fixture
+def tokens(groq, monkeypatch):
+    """A governor whose token bucket never refills; returns the bucket."""
+    governor = Governor("groq", Limit(1000, burst=1000, tokens_per_minute=60_000), clock=lambda: 0.0)
+    monkeypatch.setattr(groq_api, "get_governor", lambda provider: governor)
+    return governor.tokens
+
+def test_stream_refunds_by_reported_usage(groq, tokens):
+    final = chunk(None)
+    final.choices = []
+    final.x_groq = SimpleNamespace(usage=SimpleNamespace(total_tokens=120))
+    groq.stream = lambda: iter([chunk("Good morning"), final])
+
+    list(groq_api.generate_response_stream("Hi {context}", {}, use_cache=False))
+    assert tokens._tokens == 60_000 - 120
+
+def test_stream_refunds_by_counted_output_when_it_fails(groq, tokens):
+    def broken():
+        yield chunk("x" * 40)
+        raise ConnectionError("stream reset")
+    groq.stream = broken
+
+    list(groq_api.generate_response_stream("Hi {context}", {}, use_cache=False))
+    prompt_tokens = groq_api._estimated_tokens(groq_api._format_prompt("Hi {context}", {})) - groq_api.MAX_TOKENS
+    assert tokens._tokens == 60_000 - prompt_tokens - 10
+
+def test_failed_requests_refund_their_reservation(groq, tokens, monkeypatch):
+    def refused(**kwargs):
+        raise ConnectionError("refused")
+    monkeypatch.setattr(groq, "create", refused)
+
+    assert groq_api.generate_response("Hi {context}", {}, use_cache=False) == groq_api.API_ERROR_MESSAGE
+    assert list(groq_api.generate_response_stream("Hi {context}", {}, use_cache=False)) == [
+        groq_api.API_ERROR_MESSAGE]
+    assert tokens._tokens == 60_000
+
+class FakeAsyncClient:
+    """Async client that records concurrency and fails prompts containing 'fail'."""
+    instances = []
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+        self.closed = False
+        self.chat = SimpleNamespace(completions=self)
+        FakeAsyncClient.instances.append(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+
+    async def create(self, messages, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            prompt = messages[-1]["content"]
+            # Later prompts finish first, so ordering is not an accident of timing
+            await asyncio.sleep(0.01 / (1 + int(prompt.split()[-1])))
+            if "fail" in prompt:
+                raise ConnectionError("boom")
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"re: {prompt}"))],
+                                   usage=None)
+        finally:
+            self.in_flight -= 1
+
+@pytest.fixture
+def async_groq(groq, monkeypatch):
+    FakeAsyncClient.instances = []
+    monkeypatch.setattr(groq_api, "_new_async_client", FakeAsyncClient)
+    return FakeAsyncClient.instances
+
+def test_generate_many_keeps_request_order(async_groq):
+    requests = [(f"prompt {i}", {}) for i in range(6)]
+    assert groq_api.generate_many(requests, use_cache=False) == [f"re: prompt {i}" for i in range(6)]
+
+def test_generate_many_bounds_concurrency_and_shares_one_client(async_groq):
+    groq_api.generate_many([(f"prompt {i}", {}) for i in range(8)], max_concurrency=3, use_cache=False)
+    assert len(async_groq) == 1
+    assert async_groq[0].peak == 3
+    assert async_groq[0].closed
+
+def test_generate_many_isolates_failures(async_groq):
+    responses = groq_api.generate_many([("prompt 0", {}), ("fail 1", {}), ("prompt 2", {})],
+                                       use_cache=False)
+    assert responses == ["re: prompt 0", groq_api.API_ERROR_MESSAGE, "re: prompt 2"]
+
+def test_generate_many_serves_cached_responses(async_groq):
+    groq_api.generate_many([("prompt 1", {})])
+    assert groq_api.generate_many([("prompt 1", {})]) == ["re: prompt 1"]
+    assert groq_api.response_cache.stats()["hits"] == 1
+
+def test_agenerate_response_refunds_a_failed_request(async_groq, tokens):
+    assert asyncio.run(groq_api.agenerate_response("fail 1", {})) == groq_api.API_ERROR_MESSAGE
+    assert tokens._tokens == 60_000
+
+def test_agenerate_response_closes_its_own_client(async_groq):
+    assert asyncio.run(groq_api.agenerate_response("prompt 1", {})) == "re: prompt 1"
+    assert len(async_groq) == 1 and async_groq[0].closed
@@ -0,0 +1,74 @@
+"""
+test_instructions.py
+Unit tests for the prompt template registry.
+"""
+
+import pytest
+
+from mcp.instructions import (
+    PromptTemplate, TEMPLATES, get_general_prompt, get_morning_briefing_prompt, get_template
+)
+
+def test_templates_are_registered_once():
+    assert get_template("general") is get_general_prompt()
+    assert get_morning_briefing_prompt() is get_morning_briefing_prompt()
+    assert set(TEMPLATES) == {"general", "capabilities", "morning_briefing"}
+
+def test_required_keys_are_parsed_up_front():
+    assert get_morning_briefing_prompt().required_keys == {
+        "date", "weather", "calendar_events", "notes", "todos"
+    }
+
+def test_unknown_context_key_is_rejected():
+    with pytest.raises(ValueError, match="unknown context key 'mood'"):
+        PromptTemplate("bad", "Mood: {context[mood]}", token_budget=100)
+
+def test_unsupported_field_is_rejected():
+    with pytest.raises(ValueError, match="unsupported field"):
+        PromptTemplate("bad", "Hello {name}", token_budget=100)
+
+def test_render_fills_defaults_and_serializes():
+    template = PromptTemplate("t", "{context[date]} | {context[todos]} | {context[weather]}", token_budget=100)
+    rendered = template.render({"date": "2024-01-01", "todos": [(3, "Send report")], "notes": ["unused"]})
+    assert rendered == "2024-01-01 | \n  - #3 Send report | Weather unavailable"
+
+def test_render_requires_keys_without_default():
+    template = PromptTemplate("t", "Q: {context[user_input]}", token_budget=100)
+    with pytest.raises(KeyError, match="user_input"):
+        template.render({})
+
+def test_render_keeps_braces_in_values():
+    template = PromptTemplate("t", "Q: {context[user_input]}", token_budget=100)
+    assert template.render({"user_input": "what is {x}?"}) == "Q: what is {x}?"
+
+def test_template_is_still_a_format_string():
+    assert get_general_prompt().startswith("You are a helpful personal assistant")
+
+def test_fingerprint_tracks_rendered_inputs():
+    template = get_morning_briefing_prompt()
+    context = {"date": "2024-01-01", "weather": "Sunny", "todos": [(1, "Call John")],
+               "source_status": {"weather": "fresh"}}
+
+    same = dict(context, source_status={"weather": "stale"})
+    changed = dict(context, todos=[(1, "Call John"), (2, "Send report")])
+    assert template.fingerprint(context) == template.fingerprint(same)
+    assert template.fingerprint(context) != template.fingerprint(changed)
+
+def test_fingerprint_ignores_weather_drift():
+    template = get_morning_briefing_prompt()
+
+    def report(temperature, humidity, conditions="Clear Sky"):
+        return (f"🌍 Weather in Delhi\n🌡  Temperature: {temperature}°C\n💧 Humidity: {humidity}%\n"
+                f"🌤  Conditions: {conditions}\n📊 Pressure: 1012 hPa")
+    context = {"date": "2024-01-01", "weather": report(20.2, 40), "todos": [(1, "Call John")]}
+
+    drifted = dict(context, weather=report(21.9, 44))
+    rainy = dict(context, weather=report(20.2, 40, "Light Rain"))
+    colder = dict(context, weather=report(14.0, 40))
+    assert template.fingerprint(context) == template.fingerprint(drifted)
+    assert template.fingerprint(context) != template.fingerprint(rainy)
+    assert template.fingerprint(context) != template.fingerprint(colder)
+
+def test_templates_declare_their_sources():
+    assert get_template("capabilities").sources == frozenset()
+    assert get_morning_briefing_prompt().sources == {"calendar_events", "notes", "weather", "todos"}
@@ -0,0 +1,46 @@
+"""
+test_llm_cache.py
+Unit tests for the persistent LLM response cache.
+"""
+
+import pytest
+
+from llm_cache import ResponseCache
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / "llm_cache.db"), ttl=60, max_entries=3)
+
+def test_key_depends_on_every_parameter():
+    key = ResponseCache.make_key("model", "system", "prompt", 0.7, 1000)
+    assert key == ResponseCache.make_key("model", "system", "prompt", 0.7, 1000)
+    assert key != ResponseCache.make_key("model", "system", "prompt", 0.2, 1000)
+    assert key != ResponseCache.make_key("model", "system", "other prompt", 0.7, 1000)
+
+def test_hit_and_miss_counters(cache):
+    assert cache.get("k") is None
+    cache.put("k", "cached answer")
+    assert cache.get("k") == "cached answer"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+def test_expired_entries_are_not_served(cache):
+    cache.put("k", "stale answer", ttl=-1)
+    assert cache.get("k") is None
+
+def test_least_recently_used_entries_are_evicted(cache):
+    for key in ("a", "b", "c"):
+        cache.put(key, key)
+    cache.get("a")
+    cache.put("d", "d")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "a"
+    assert cache.stats()["entries"] == 3
+
+def test_cache_persists_across_instances(cache):
+    cache.put("k", "persisted")
+    assert ResponseCache(cache.path).get("k") == "persisted"
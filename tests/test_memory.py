@@ -0,0 +1,195 @@
+"""
+test_memory.py
+Unit tests for the SQLite memory store.
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from mcp.memory import MemoryStore, MIGRATIONS
+
+@pytest.fixture
+def store(tmp_path):
+    store = MemoryStore(str(tmp_path / "notes.db"))
+    yield store
+    store.close()
+
+def test_schema_is_migrated_once(store):
+    store.init()
+    version = store.conn.execute("PRAGMA user_version").fetchone()[0]
+    assert version == len(MIGRATIONS)
+
+    # A second store on the same file has nothing left to apply
+    other = MemoryStore(store.db_path)
+    other.init()
+    assert other.conn.execute("PRAGMA user_version").fetchone()[0] == version
+    other.close()
+
+def test_connection_uses_wal(store):
+    assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+def test_connection_is_reused_per_thread(store):
+    assert store.conn is store.conn
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(store.conn))
+    thread.start()
+    thread.join()
+    assert other[0] is not store.conn
+
+def test_todo_roundtrip(store):
+    todo_id = store.store_todo("2024-01-01", "Write report")
+    assert store.get_incomplete_todos("2024-01-01") == [(todo_id, "Write report")]
+
+    assert store.complete_todo(todo_id) == 1
+    assert store.get_incomplete_todos("2024-01-01") == []
+    # Already completed or unknown ids change nothing
+    assert store.complete_todo(todo_id) == 0
+    assert store.complete_todo(todo_id + 100) == 0
+
+def test_briefing_roundtrip(store):
+    store.store_briefing("2024-01-01", "Sunny, two meetings")
+    assert store.get_briefing("2024-01-01") == "Sunny, two meetings"
+    assert store.get_briefing("2024-01-02") is None
+
+def test_get_briefing_returns_latest_row(store):
+    store.store_briefing("2024-01-01", "Early draft")
+    briefing_id = store.store_briefing("2024-01-01", "Final", fingerprint="abc")
+
+    assert store.get_briefing("2024-01-01") == "Final"
+    assert store.get_latest_briefing("2024-01-01") == (briefing_id, "Final", "abc")
+    assert store.get_latest_briefing("2024-01-02") is None
+
+def test_verified_briefing_expires(store):
+    briefing_id = store.store_briefing("2024-01-01", "Fresh", fingerprint="abc", verified=True)
+    assert store.get_verified_briefing("2024-01-01", max_age=60) == "Fresh"
+
+    store.conn.execute("UPDATE briefings SET verified_at = verified_at - 120")
+    assert store.get_verified_briefing("2024-01-01", max_age=60) is None
+    store.mark_briefing_verified(briefing_id)
+    assert store.get_verified_briefing("2024-01-01", max_age=60) == "Fresh"
+
+    store.mark_briefing_verified(briefing_id, verified=False)
+    assert store.get_verified_briefing("2024-01-01", max_age=60) is None
+
+    # Only briefings stored as verified are served
+    store.store_briefing("2024-01-01", "Unchecked", fingerprint="abc")
+    assert store.get_verified_briefing("2024-01-01", max_age=60) is None
+
+def test_fingerprint_migration_upgrades_existing_database(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(MIGRATIONS[0])
+    conn.execute("INSERT INTO briefings (date, summary) VALUES ('2024-01-01', 'Old')")
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+
+    store = MemoryStore(path)
+    store.init()
+    assert store.get_latest_briefing("2024-01-01")[1:] == ("Old", None)
+    store.close()
+
+def test_transaction_rolls_back_on_error(store):
+    with pytest.raises(sqlite3.IntegrityError):
+        with store.transaction() as conn:
+            conn.execute("INSERT INTO todos (date, todo) VALUES (?, ?)", ("2024-01-01", "kept?"))
+            conn.execute("INSERT INTO todos (date, todo) VALUES (?, ?)", ("2024-01-01", None))
+    assert store.get_incomplete_todos("2024-01-01") == []
+
+def test_store_todos_returns_ids_in_order(store):
+    store.store_todo("2024-01-01", "Existing")
+    todo_ids = store.store_todos("2024-01-01", ["First", "Second", "Third"])
+
+    rows = dict(store.get_incomplete_todos("2024-01-01"))
+    assert [rows[todo_id] for todo_id in todo_ids] == ["First", "Second", "Third"]
+    assert store.store_todos("2024-01-01", []) == []
+
+def test_store_briefing_with_todos_commits_once(store):
+    commits = []
+    store.conn.set_trace_callback(lambda sql: sql.strip().upper() == "COMMIT" and commits.append(sql))
+
+    items = [f"Action {i}" for i in range(20)]
+    briefing_id, todo_ids = store.store_briefing_with_todos("2024-01-01", "Busy day", items)
+
+    assert len(commits) == 1
+    assert len(todo_ids) == 20
+    assert store.get_briefing("2024-01-01") == "Busy day"
+    assert [todo for _, todo in store.get_incomplete_todos("2024-01-01")] == items
+
+def test_calendar_mirror_applies_incremental_changes(store):
+    standup = {"id": "a", "summary": "Standup"}
+    review = {"id": "b", "summary": "Review"}
+    store.apply_calendar_changes([("a", 100, 200, standup), ("b", 300, 400, review)],
+                                 [], "token-1", full=True)
+    assert store.get_sync_state("calendar") == "token-1"
+    assert store.get_mirrored_events(0, 1000) == [standup, review]
+    assert store.get_mirrored_events(250, 1000) == [review]
+
+    moved = {"id": "a", "summary": "Standup (moved)"}
+    store.apply_calendar_changes([("a", 500, 600, moved)], ["b"], "token-2")
+    assert store.get_sync_state("calendar") == "token-2"
+    assert store.get_mirrored_events(0, 1000) == [moved]
+
+def test_calendar_full_resync_replaces_mirror(store):
+    store.apply_calendar_changes([("a", 100, 200, {"id": "a"})], [], "token-1", full=True)
+    store.apply_calendar_changes([("c", 100, 200, {"id": "c"})], [], "token-2", full=True)
+    assert store.get_mirrored_events(0, 1000) == [{"id": "c"}]
+
+def _note(note_id, date, edited):
+    return {"id": note_id, "title": f"Note {note_id}", "content": "", "date": date, "last_edited": edited}
+
+def test_notes_mirror_incremental_and_reconcile(store):
+    store.apply_note_changes([_note("a", "2024-01-01", "t1"), _note("b", "2024-01-02", "t2")],
+                             "t2", reconciled_at="1")
+    assert [n["id"] for n in store.get_mirrored_notes("2024-01-02")] == ["b"]
+    assert store.get_sync_state("notes") == "t2"
+
+    # Incremental batches only add or update
+    store.apply_note_changes([_note("c", "2024-01-03", "t3")], "t3")
+    assert [n["id"] for n in store.get_mirrored_notes("2024-01-01")] == ["a", "b", "c"]
+
+    # A full listing drops notes that no longer exist
+    store.apply_note_changes([_note("c", "2024-01-03", "t3")], "t3", reconciled_at="2")
+    assert [n["id"] for n in store.get_mirrored_notes("2024-01-01")] == ["c"]
+    assert store.get_sync_state("notes_reconciled") == "2"
+
+def test_search_memory_ranks_across_sources(store):
+    store.store_briefing("2024-01-01", "Busy day. Plan the DevOps migration with Sam.")
+    todo_id = store.store_todo("2024-01-02", "Review the devops migration runbook")
+    store.apply_note_changes([{"id": "n1", "title": "DevOps migration", "content": "Moving CI",
+                               "date": "2024-01-03"}], None)
+    store.store_todo("2024-01-02", "Buy milk")
+
+    results = store.search_memory("devops migrating")
+    assert {(result["kind"], result["id"]) for result in results} == {
+        ("briefing", 1), ("todo", todo_id), ("note", "n1")}
+    assert results[0]["kind"] == "note"
+    assert "[DevOps]" in results[0]["snippet"]
+    assert len(store.search_memory("devops", limit=2)) == 2
+    assert len(store.search_memory("devops", limit=2, offset=2)) == 1
+    assert store.search_memory('" OR *') == []
+
+def test_search_memory_newest_first(store):
+    store.apply_note_changes([{"id": "n1", "title": "DevOps migration", "content": "DevOps migration plan",
+                               "date": "2024-01-01"}], None)
+    store.store_todo("2024-01-05", "Ask about devops")
+    store.apply_note_changes([{"id": "n2", "title": "Standup", "content": "Mentioned devops",
+                               "date": "2024-01-03"}], None)
+
+    assert store.search_memory("devops")[0]["id"] == "n1"
+    assert [result["date"] for result in store.search_memory("devops", newest_first=True)] == [
+        "2024-01-05", "2024-01-03", "2024-01-01"]
+
+def test_search_index_follows_note_changes(store):
+    store.apply_note_changes([{"id": "n1", "title": "Offsite", "content": "Book venue",
+                               "date": "2024-01-03"}], None)
+    store.apply_note_changes([{"id": "n1", "title": "Offsite", "content": "Book catering",
+                               "date": "2024-01-03"}], None)
+    assert store.search_memory("venue") == []
+    assert [result["id"] for result in store.search_memory("catering")] == ["n1"]
+
+    store.delete_mirrored_note("n1")
+    assert store.search_memory("offsite") == []
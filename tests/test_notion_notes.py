@@ -0,0 +1,79 @@
+"""
+test_notion_notes.py
+Unit tests for paginated Notion note retrieval.
+"""
+
+import pytest
+
+from tool_utils import notion_notes
+
+def page(index):
+    return {
+        "id": f"n{index}",
+        "last_edited_time": f"2024-01-02T10:{index:02d}:00.000Z",
+        "properties": {
+            "Title": {"title": [{"plain_text": f"Note {index}"}]},
+            "Content": {"rich_text": [{"plain_text": f"Content {index}"}]},
+            "Date": {"date": {"start": "2024-01-02"}},
+        },
+    }
+
+class FakeDatabases:
+    def __init__(self, total, page_size):
+        self.pages = [page(index) for index in range(total)]
+        self.page_size = page_size
+        self.queries = []
+
+    def query(self, **query):
+        self.queries.append(dict(query))
+        start = int(query.get("start_cursor", 0))
+        end = start + min(query["page_size"], self.page_size)
+        has_more = end < len(self.pages)
+        return {"results": self.pages[start:end], "has_more": has_more,
+                "next_cursor": str(end) if has_more else None}
+
+class FakeClient:
+    def __init__(self, total=5, page_size=2):
+        self.databases = FakeDatabases(total, page_size)
+
+@pytest.fixture
+def client(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(notion_notes, "get_client", lambda: client)
+    monkeypatch.setattr(notion_notes, "governed", lambda provider, func, **kwargs: func())
+    return client
+
+def test_follows_cursors_across_pages(client):
+    notes = notion_notes.get_notes()
+
+    assert [note["id"] for note in notes] == [f"n{index}" for index in range(5)]
+    assert notes[0]["title"] == "Note 0" and notes[0]["content"] == "Content 0"
+    queries = client.databases.queries
+    assert len(queries) == 3
+    assert "start_cursor" not in queries[0]
+    assert [query["start_cursor"] for query in queries[1:]] == ["2", "4"]
+
+def test_limit_truncates_and_stops_paging(client):
+    notes = notion_notes.get_notes(limit=3)
+
+    assert [note["id"] for note in notes] == ["n0", "n1", "n2"]
+    assert len(client.databases.queries) == 2
+    assert client.databases.queries[1]["page_size"] == 1
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_non_positive_limit_makes_no_request(client, limit):
+    assert notion_notes.get_notes(limit=limit) == []
+    assert client.databases.queries == []
+
+def test_filters_on_date_and_last_edited_time(client):
+    list(notion_notes.iter_notes(edited_since="2024-01-02T10:00:00Z"))
+    assert client.databases.queries[0]["filter"] == {
+        "timestamp": "last_edited_time",
+        "last_edited_time": {"on_or_after": "2024-01-02T10:00:00Z"},
+    }
+
+    client.databases.queries.clear()
+    list(notion_notes.iter_notes(from_date="2024-01-01", edited_since="2024-01-02T10:00:00Z"))
+    combined = client.databases.queries[0]["filter"]["and"]
+    assert combined[0] == {"property": "Date", "date": {"on_or_after": "2024-01-01"}}
+    assert combined[1]["timestamp"] == "last_edited_time"
@@ -0,0 +1,154 @@
+"""
+test_ratelimit.py
+Unit tests for the outbound request governor.
+"""
+
+import asyncio
+
+import pytest
+
+from tool_utils.ratelimit import Governor, Limit, TokenBucket, retry_after, status_code
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+class Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+class APIError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.response = Response(status, headers)
+
+def governor(clock, limit=Limit(1, burst=2), **kwargs):
+    return Governor("test", limit, clock=clock, sleep=clock.sleep, jitter=lambda: 0.5, **kwargs)
+
+def failing(errors, result="ok"):
+    """A call that raises the given errors in turn, then returns result."""
+    errors = list(errors)
+    attempts = []
+
+    def call():
+        attempts.append(None)
+        if errors:
+            raise errors.pop(0)
+        return result
+    return call, attempts
+
+def test_bucket_allows_a_burst_then_spaces_calls_out():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    clock.now = 10.0
+    assert bucket.reserve() == 0.0
+
+def test_reservations_beyond_capacity_count_in_full():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=10, clock=clock)
+    assert bucket.reserve(50) == 4.0
+    assert bucket.reserve() == 4.1
+
+def test_bucket_refund_and_pause():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, capacity=5, clock=clock)
+    bucket.reserve(5)
+    bucket.refund(3)
+    assert bucket.reserve(3) == 0.0
+    bucket.pause(4)
+    assert bucket.reserve() == 4.0
+
+def test_status_and_retry_after_from_client_errors():
+    assert status_code(APIError(429)) == 429
+    assert retry_after(APIError(429, {"retry-after": "7"})) == 7.0
+
+    class HttpLib2Response(dict):
+        status = 503
+    error = Exception()
+    error.resp = HttpLib2Response({"retry-after": "Thu, 01 Jan 1970 00:00:00 GMT"})
+    assert status_code(error) == 503
+    assert retry_after(error) == 0.0
+    assert status_code(ValueError()) is None
+    assert retry_after(ValueError()) is None
+
+def test_calls_are_throttled_to_the_rate_limit():
+    clock = FakeClock()
+    gov = governor(clock)
+    for _ in range(4):
+        gov.call(lambda: None)
+    assert clock.now == 2.0
+    stats = gov.stats()
+    assert stats["calls"] == 4
+    assert stats["throttled"] == 2
+    assert stats["throttle_seconds"] == 2.0
+
+def test_rate_limited_call_honors_retry_after():
+    clock = FakeClock()
+    gov = governor(clock, limit=Limit(100, burst=100))
+    call, attempts = failing([APIError(429, {"Retry-After": "3"})])
+    assert gov.call(call) == "ok"
+    assert len(attempts) == 2
+    # Retry-After plus jittered backoff (0.5 * BASE_DELAY)
+    assert clock.now == pytest.approx(3.25)
+    assert gov.stats()["rate_limited"] == 1
+    assert gov.stats()["retries"] == 1
+
+def test_backoff_grows_exponentially_and_gives_up():
+    clock = FakeClock()
+    gov = governor(clock, limit=Limit(100, burst=100), max_retries=2)
+    call, attempts = failing([APIError(503)] * 3)
+    with pytest.raises(APIError):
+        gov.call(call)
+    assert len(attempts) == 3
+    assert clock.now == pytest.approx(0.25 + 0.5)
+    assert gov.stats()["failures"] == 1
+
+def test_non_idempotent_calls_only_retry_rate_limits():
+    clock = FakeClock()
+    gov = governor(clock)
+    call, attempts = failing([APIError(500)])
+    with pytest.raises(APIError):
+        gov.call(call, idempotent=False)
+    assert len(attempts) == 1
+
+    call, attempts = failing([APIError(429)])
+    assert gov.call(call, idempotent=False) == "ok"
+    assert len(attempts) == 2
+
+def test_other_errors_and_long_retry_after_are_raised():
+    clock = FakeClock()
+    gov = governor(clock, max_retry_after=10)
+    call, attempts = failing([ValueError("bad request")])
+    with pytest.raises(ValueError):
+        gov.call(call)
+    call, attempts = failing([APIError(429, {"retry-after": "120"})])
+    with pytest.raises(APIError):
+        gov.call(call)
+    assert len(attempts) == 1
+
+def test_token_limit_throttles_large_requests():
+    clock = FakeClock()
+    gov = governor(clock, limit=Limit(100, burst=100, tokens_per_minute=600))
+    gov.call(lambda: None, tokens=600)
+    gov.call(lambda: None, tokens=300)
+    assert clock.now == 30.0
+    gov.refund_tokens(300)
+    gov.call(lambda: None, tokens=300)
+    assert clock.now == 30.0
+
+def test_async_calls_retry_without_blocking():
+    gov = Governor("test", Limit(100, burst=100), base_delay=0.001, jitter=lambda: 0.5)
+    call, attempts = failing([APIError(429)])
+
+    async def acall():
+        return call()
+    assert asyncio.run(gov.acall(acall)) == "ok"
+    assert len(attempts) == 2
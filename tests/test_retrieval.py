@@ -0,0 +1,79 @@
+"""
+test_retrieval.py
+Unit tests for the local vector index.
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from mcp.memory import MemoryStore
+from mcp.retrieval import BRIEFING, GROWTH_ROWS, NOTE, VectorIndex
+
+def _note(note_id, title, content, date="2024-01-01"):
+    return {"id": note_id, "title": title, "content": content, "date": date, "last_edited": date}
+
+@pytest.fixture
+def store(tmp_path):
+    store = MemoryStore(str(tmp_path / "notes.db"))
+    yield store
+    store.close()
+
+@pytest.fixture
+def index(store, tmp_path):
+    index = VectorIndex(store, path=str(tmp_path / "vectors.f32"), dim=256)
+    yield index
+    index.close()
+
+def test_vectors_are_normalized(index):
+    vector = index.vectorize("Quarterly budget review with finance")
+    assert vector.dtype == np.float32
+    assert abs(float(np.linalg.norm(vector)) - 1.0) < 1e-5
+    assert not index.vectorize("the and of").any()
+
+def test_search_ranks_relevant_notes_first(store, index):
+    store.apply_note_changes([
+        _note("a", "Budget", "Quarterly budget review with finance team"),
+        _note("b", "Offsite", "Book a venue for the team offsite"),
+        _note("c", "Groceries", "Milk, eggs and bread"),
+    ], None)
+    store.store_briefing("2024-01-02", "Prepare the budget review slides")
+
+    assert index.refresh() == 4
+    results = index.search("budget review", k=2)
+    assert {(kind, ref) for kind, ref, _ in results} == {(NOTE, "a"), (BRIEFING, "1")}
+    assert results[0][2] >= results[1][2]
+    assert index.search("budget review", k=5, kinds=[NOTE])[0][:2] == (NOTE, "a")
+
+def test_refresh_only_embeds_changes(store, index):
+    store.apply_note_changes([_note("a", "Budget", "Review"), _note("b", "Offsite", "Venue")], None)
+    assert index.refresh() == 2
+    assert index.refresh() == 0
+
+    store.apply_note_changes([_note("b", "Offsite", "Catering", date="2024-01-02")], None)
+    assert index.refresh() == 1
+    assert index.search("catering", k=1)[0][:2] == (NOTE, "b")
+
+    store.delete_mirrored_note("b")
+    index.refresh()
+    assert index.search("catering", k=1) == []
+
+def test_index_persists_and_grows(store, tmp_path):
+    path = str(tmp_path / "vectors.f32")
+    index = VectorIndex(store, path=path, dim=64)
+    documents = [(NOTE, str(i), f"note number {i} topic{i}") for i in range(GROWTH_ROWS + 10)]
+    assert index.update(documents) == len(documents)
+    index.close()
+
+    reopened = VectorIndex(store, path=path, dim=64)
+    assert reopened.update(documents) == 0
+    assert reopened.search("topic260", k=1)[0][:2] == (NOTE, "260")
+    reopened.close()
+
+def test_relevant_documents_are_note_shaped(store, index):
+    store.apply_note_changes([_note("a", "Budget", "Quarterly budget review")], None)
+    store.store_briefing("2024-01-02", "Budget review at 10")
+
+    documents = index.relevant_documents("budget review", k=5)
+    assert {document["title"] for document in documents} == {"Budget", "Briefing 2024-01-02"}
+    assert all(set(document) >= {"title", "content", "date", "score"} for document in documents)
@@ -0,0 +1,80 @@
+"""
+test_router.py
+Unit tests for the deterministic intent router.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from mcp.router import (
+    ADD_TODO, CAPABILITIES, COMPLETE_TODO, LIST_EVENTS, LIST_NOTES, LIST_TODOS, SEARCH_MEMORY,
+    WEATHER, IntentRouter, Route
+)
+
+# A Wednesday
+NOW = datetime(2024, 1, 3, 9, 0)
+
+@pytest.fixture
+def router():
+    return IntentRouter(clock=lambda: NOW)
+
+@pytest.mark.parametrize("text, expected", [
+    ("What can you do?", Route(CAPABILITIES, {})),
+    ("what's on my calendar tomorrow", Route(LIST_EVENTS, {"date": "2024-01-04"})),
+    ("Show my schedule for Friday", Route(LIST_EVENTS, {"date": "2024-01-05"})),
+    ("list events on 2024-02-01", Route(LIST_EVENTS, {"date": "2024-02-01"})),
+    ("What's on my calendar today?", Route(LIST_EVENTS, {"date": "2024-01-03"})),
+    ("show notes yesterday", Route(LIST_NOTES, {"date": "2024-01-02"})),
+    ("list my todos", Route(LIST_TODOS, {"date": "2024-01-03"})),
+    ("add todo buy milk", Route(ADD_TODO, {"text": "buy milk"})),
+    ("Create a todo to follow up with John.", Route(ADD_TODO, {"text": "follow up with John"})),
+    ("complete todo 3", Route(COMPLETE_TODO, {"todo_id": "3"})),
+    ("mark task #12 as done", Route(COMPLETE_TODO, {"todo_id": "12"})),
+    ("When did I last mention the DevOps migration?",
+     Route(SEARCH_MEMORY, {"recency": "When did I last", "query": "DevOps migration"})),
+    ("search my notes for budget review", Route(SEARCH_MEMORY, {"query": "budget review"})),
+    ("find the offsite agenda in my notes", Route(SEARCH_MEMORY, {"query": "offsite agenda"})),
+    ("look through my history for dentist", Route(SEARCH_MEMORY, {"query": "dentist"})),
+    ("What's the weather in New York?", Route(WEATHER, {"location": "New York"})),
+    ("what's the weather like today", Route(WEATHER, {})),
+    ("weather for tomorrow", Route(WEATHER, {})),
+    ("How's the weather outside?", Route(WEATHER, {})),
+    ("show me the forecast for London tomorrow", Route(WEATHER, {"location": "London"})),
+    ("temperature in san francisco", Route(WEATHER, {"location": "san francisco"})),
+])
+def test_routes_direct_commands(router, text, expected):
+    assert router.route(text) == expected
+
+@pytest.mark.parametrize("text", [
+    "Add a note about the meeting",
+    "What should I focus on this afternoon?",
+    "help me plan my week",
+    "Should I move my run because of the weather tomorrow?",
+    "write a note about the weather balloon project",
+    "Is it going to rain during my outside meeting?",
+    "find time for a meeting with Sam next week",
+    "search for flights to Lisbon",
+    "look up the capital of Australia",
+])
+def test_open_questions_fall_through_to_llm(router, text):
+    assert router.route(text) is None
+
+def test_next_weekday_skips_today(router):
+    assert router.route("show my calendar wednesday").slots["date"] == "2024-01-03"
+    assert router.route("show my calendar next wednesday").slots["date"] == "2024-01-10"
+
+def test_complete_todo_command_reports_unknown_ids(monkeypatch, tmp_path):
+    from interactive_cli import InteractiveMCPAgent, TodoServer
+    from mcp import memory
+
+    store = memory.MemoryStore(str(tmp_path / "memory.db"))
+    monkeypatch.setattr(memory, "_store", store)
+    cli = InteractiveMCPAgent.__new__(InteractiveMCPAgent)
+    cli.servers = {"todos": TodoServer()}
+    todo_id = store.store_todo("2024-01-03", "Buy milk")
+
+    assert cli._complete_todo(str(todo_id)) == f"Marked todo #{todo_id} as complete."
+    assert cli._complete_todo(str(todo_id)) == f"There is no open todo #{todo_id}."
+    assert cli._complete_todo("999") == "There is no open todo #999."
+    store.close()
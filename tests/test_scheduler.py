@@ -0,0 +1,140 @@
+"""
+test_scheduler.py
+Unit tests for the background briefing scheduler.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from groq_api import Completion
+from mcp import memory, tools
+from mcp.agent import MCPAgent
+from mcp.context import context_store
+from mcp.memory import MemoryStore
+from mcp.scheduler import BriefingScheduler
+
+class FakeAgent:
+    def __init__(self):
+        self.today = None
+        self.briefings = 0
+        self.stored = {}
+
+    def set_date(self, now):
+        self.today = now.strftime("%Y-%m-%d")
+
+    def refresh_briefing(self):
+        return self.stored.get(self.today)
+
+    def run_morning_briefing(self, verify=False):
+        self.briefings += 1
+        self.stored[self.today] = "Briefing"
+        return "Briefing"
+
+@pytest.fixture
+def syncs(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tools, "sync_calendar", lambda: calls.append("calendar"))
+    monkeypatch.setattr(tools, "sync_notes", lambda force=False: calls.append("notes"))
+    return calls
+
+def test_tick_before_briefing_time_only_refreshes_mirrors(syncs):
+    agent = FakeAgent()
+    scheduler = BriefingScheduler(agent, briefing_time="07:00",
+                                  clock=lambda: datetime(2024, 1, 2, 6, 30))
+
+    assert scheduler.tick() is None
+    assert syncs == ["calendar", "notes"]
+    assert agent.briefings == 0
+    assert agent.today == "2024-01-02"
+
+def test_tick_after_briefing_time_prewarms_briefing(syncs):
+    agent = FakeAgent()
+    scheduler = BriefingScheduler(agent, briefing_time="07:00",
+                                  clock=lambda: datetime(2024, 1, 2, 7, 15))
+
+    assert scheduler.tick() == "Briefing"
+    assert agent.briefings == 1
+
+def test_failed_sync_does_not_stop_the_tick(monkeypatch):
+    monkeypatch.setattr(tools, "sync_calendar", lambda: 1 / 0)
+    monkeypatch.setattr(tools, "sync_notes", lambda force=False: 0)
+    agent = FakeAgent()
+    scheduler = BriefingScheduler(agent, clock=lambda: datetime(2024, 1, 2, 9, 0))
+
+    assert scheduler.tick() == "Briefing"
+
+@pytest.fixture
+def briefing_agent(monkeypatch, tmp_path):
+    """A real agent on an empty store whose sources return lists the test can change."""
+    store = MemoryStore(str(tmp_path / "memory.db"))
+    monkeypatch.setattr(memory, "_store", store)
+    context_store.clear()
+    agent = MCPAgent(location="Test City")
+    agent.calls = []
+    agent.events = []
+    monkeypatch.setattr("mcp.agent.complete", lambda prompt, context, on_token=None:
+                        agent.calls.append(context) or Completion("Plan\nTODO: Call John"))
+    agent._gatherer.sources = {name: lambda: [] for name in agent._gatherer.sources}
+    agent._gatherer.sources["calendar_events"] = lambda: list(agent.events)
+    yield agent
+    store.close()
+
+def weather_report(temperature, humidity):
+    return f"🌡  Temperature: {temperature}°C\n💧 Humidity: {humidity}%\n🌤  Conditions: Clear Sky"
+
+def test_briefing_is_generated_once_per_day(syncs, briefing_agent):
+    agent = briefing_agent
+    # Readings drift on every tick without changing the briefing's inputs
+    readings = iter([(20.1, 40), (20.6, 42), (21.2, 45), (20.9, 43)])
+    agent._gatherer.sources["weather"] = lambda: weather_report(*next(readings))
+    now = [datetime(2024, 1, 2, 7, 5)]
+    scheduler = BriefingScheduler(agent, briefing_time="07:00", clock=lambda: now[0])
+
+    for minute in (5, 20, 35, 50):
+        now[0] = datetime(2024, 1, 2, 7, minute)
+        assert scheduler.tick() == "Plan\nTODO: Call John"
+
+    assert len(agent.calls) == 1
+    assert memory.get_incomplete_todos("2024-01-02") == [(1, "Call John")]
+    assert memory.get_verified_briefing("2024-01-02", max_age=60) == "Plan\nTODO: Call John"
+
+    now[0] = datetime(2024, 1, 3, 7, 5)
+    agent._gatherer.sources["weather"] = lambda: weather_report(20, 40)
+    scheduler.tick()
+    assert len(agent.calls) == 2
+
+def test_changed_inputs_regenerate_the_briefing(syncs, briefing_agent):
+    agent = briefing_agent
+    now = [datetime(2024, 1, 2, 7, 5)]
+    scheduler = BriefingScheduler(agent, briefing_time="07:00", clock=lambda: now[0])
+    scheduler.tick()
+
+    # An event added after the briefing makes it stale, then brings it up to date
+    agent.events.append({"summary": "Offsite"})
+    assert agent.refresh_briefing() is None
+    assert memory.get_verified_briefing("2024-01-02", max_age=60) is None
+    now[0] = datetime(2024, 1, 2, 7, 20)
+    scheduler.tick()
+
+    assert len(agent.calls) == 2
+    assert agent.calls[-1]["calendar_events"] == [{"summary": "Offsite"}]
+    assert memory.get_verified_briefing("2024-01-02", max_age=60) is not None
+    assert memory.get_incomplete_todos("2024-01-02") == [(1, "Call John")]
+
+def test_briefing_generated_without_the_scheduler_is_not_prewarmed(briefing_agent):
+    briefing_agent.set_date(datetime(2024, 1, 2, 8, 0))
+    briefing_agent.run_morning_briefing()
+    assert briefing_agent.get_prewarmed_briefing(max_age=60) is None
+
+def test_next_tick_wakes_up_at_briefing_time():
+    scheduler = BriefingScheduler(FakeAgent(), briefing_time="07:00", refresh_interval=900,
+                                  clock=lambda: datetime(2024, 1, 2, 6, 55))
+    assert scheduler.seconds_until_next_tick() == 300
+
+    scheduler._clock = lambda: datetime(2024, 1, 2, 8, 0)
+    assert scheduler.seconds_until_next_tick() == 900
+
+def test_invalid_briefing_time_is_rejected():
+    with pytest.raises(ValueError):
+        BriefingScheduler(FakeAgent(), briefing_time="7am")
@@ -0,0 +1,70 @@
+"""
+test_serializer.py
+Unit tests for compact, token-budgeted context serialization.
+"""
+
+import pytest
+
+from mcp.serializer import count_tokens, serialize_context
+
+EVENT = {
+    "id": "abc123",
+    "etag": "\"3181161784712000\"",
+    "htmlLink": "https://www.google.com/calendar/event?eid=abc123",
+    "creator": {"email": "me@example.com", "self": True},
+    "reminders": {"useDefault": True},
+    "summary": "Team Standup",
+    "location": "Google Meet",
+    "start": {"dateTime": "2024-01-01T10:00:00+05:30"},
+    "end": {"dateTime": "2024-01-01T10:30:00+05:30"},
+}
+
+def test_events_are_projected_to_compact_lines():
+    context = serialize_context({"calendar_events": [EVENT]}, budget=500)
+    assert context["calendar_events"] == "\n  - 10:00-10:30 Team Standup @ Google Meet"
+    assert "etag" not in context["calendar_events"]
+
+def test_todos_and_empty_sources():
+    context = serialize_context({"todos": [(3, "Send report")], "notes": []}, budget=500)
+    assert context["todos"] == "\n  - #3 Send report"
+    assert context["notes"] == "none"
+
+def test_list_sources_are_trimmed_to_budget():
+    todos = [(i, f"Follow up on item number {i}") for i in range(200)]
+    context = serialize_context({"date": "2024-01-01", "todos": todos}, budget=100)
+
+    assert sum(count_tokens(value) for value in context.values()) <= 100
+    assert context["todos"].startswith("\n  - #0 ")
+    assert context["todos"].endswith("more)")
+
+@pytest.mark.parametrize("budget", [12, 25, 40, 63, 100, 157])
+def test_bullets_and_markers_fit_the_budget(budget):
+    context = serialize_context({
+        "calendar_events": [{"summary": f"Meeting {i}"} for i in range(30)],
+        # '#NN ' plus eight characters: lengths where rounding leaves no slack
+        "todos": [(i, "Pay rent") for i in range(10, 60)],
+        "notes": [{"title": f"Note {i}", "content": "Some thoughts " * 5, "date": "2024-01-01"}
+                  for i in range(30)],
+    }, budget=budget)
+
+    assert sum(count_tokens(value) for value in context.values()) <= budget
+    for value in context.values():
+        assert value.startswith("\n  - ")
+
+def test_newest_notes_are_kept_first():
+    notes = [{"title": f"Note {day}", "content": "x" * 200, "date": f"2024-01-{day:02d}"}
+             for day in range(1, 10)]
+    context = serialize_context({"notes": notes}, budget=80)
+    assert "Note 9" in context["notes"]
+    assert "Note 1:" not in context["notes"]
+
+def test_ranked_notes_keep_their_order():
+    notes = [{"title": f"Note {day}", "content": "x" * 200, "date": f"2024-01-{day:02d}",
+              "score": 1 - day / 10} for day in range(1, 10)]
+    context = serialize_context({"notes": notes}, budget=80)
+    assert context["notes"].startswith("\n  - Note 1")
+    assert "Note 9" not in context["notes"]
+
+def test_internal_keys_are_excluded():
+    context = serialize_context({"source_status": {"weather": "stale"}, "date": "2024-01-01"}, budget=50)
+    assert context == {"date": "2024-01-01"}
@@ -0,0 +1,150 @@
+"""
+test_tools.py
+Unit tests for the calendar and notes mirrors behind the tool functions.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from mcp import memory, tools
+from mcp.circuit import CircuitBreaker
+from tool_utils.google_calendar import SyncTokenExpired
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    store = memory.MemoryStore(str(tmp_path / "memory.db"))
+    monkeypatch.setattr(memory, "_store", store)
+    monkeypatch.setattr(tools, "calendar_breaker", CircuitBreaker("calendar.sync"))
+    monkeypatch.setattr(tools, "notes_breaker", CircuitBreaker("notes.sync"))
+    monkeypatch.setattr(tools, "_last_notes_sync", 0.0)
+    yield store
+    store.close()
+
+def event(event_id, start, end, summary="Meeting"):
+    return {"id": event_id, "summary": summary,
+            "start": {"dateTime": start}, "end": {"dateTime": end}}
+
+class FakeCalendar:
+    """Stands in for sync_events: serves queued (events, next token) pages and records tokens."""
+
+    def __init__(self, *pages):
+        self.pages = list(pages)
+        self.tokens = []
+
+    def __call__(self, sync_token):
+        self.tokens.append(sync_token)
+        page = self.pages.pop(0)
+        if isinstance(page, Exception):
+            raise page
+        return page
+
+def test_calendar_sync_is_incremental_after_the_first_full_sync(store, monkeypatch):
+    calendar = FakeCalendar(
+        ([event("a", "2024-01-02T10:00:00+05:30", "2024-01-02T11:00:00+05:30"),
+          event("b", "2024-01-02T12:00:00+05:30", "2024-01-02T13:00:00+05:30")], "t1"),
+        ([event("a", "2024-01-02T15:00:00+05:30", "2024-01-02T16:00:00+05:30", "Moved"),
+          {"id": "b", "status": "cancelled"}], "t2"),
+    )
+    monkeypatch.setattr(tools, "gc_sync_events", calendar)
+
+    assert [e["id"] for e in tools.get_calendar_events("2024-01-02")] == ["a", "b"]
+    events = tools.get_calendar_events("2024-01-02")
+    assert [(e["id"], e["summary"]) for e in events] == [("a", "Moved")]
+    assert calendar.tokens == [None, "t1"]
+    assert store.get_sync_state("calendar") == "t2"
+
+def test_expired_sync_token_falls_back_to_a_full_resync(store, monkeypatch):
+    store.apply_calendar_changes(
+        [("gone", 0, 10 ** 10, event("gone", "2024-01-02T09:00:00+05:30", "2024-01-02T09:30:00+05:30"))],
+        [], "stale")
+    calendar = FakeCalendar(
+        SyncTokenExpired("410 Gone"),
+        ([event("kept", "2024-01-02T10:00:00+05:30", "2024-01-02T11:00:00+05:30")], "fresh"),
+    )
+    monkeypatch.setattr(tools, "gc_sync_events", calendar)
+
+    # The full listing replaces the mirror instead of merging into it
+    assert [e["id"] for e in tools.get_calendar_events("2024-01-02")] == ["kept"]
+    assert calendar.tokens == ["stale", None]
+    assert store.get_sync_state("calendar") == "fresh"
+
+def test_all_day_events_cover_their_local_days(store, monkeypatch):
+    holiday = {"id": "h", "summary": "Holiday",
+               "start": {"date": "2024-01-02"}, "end": {"date": "2024-01-04"}}
+    monkeypatch.setattr(tools, "gc_sync_events", FakeCalendar(([holiday], "t1"), ([], "t1"), ([], "t1")))
+
+    assert tools._parse_event_time(holiday["start"]) == pytest.approx(1704133800.0)
+    assert [e["id"] for e in tools.get_calendar_events("2024-01-03")] == ["h"]
+    assert tools.get_calendar_events("2024-01-04") == []
+    assert [e["id"] for e in tools.get_calendar_events("2024-01-01", "2024-01-02")] == ["h"]
+
+def test_sync_failure_serves_the_mirror(store, monkeypatch):
+    store.apply_calendar_changes(
+        [("a", 0, 10 ** 10, event("a", "2024-01-02T10:00:00+05:30", "2024-01-02T11:00:00+05:30"))],
+        [], "t1")
+    monkeypatch.setattr(tools, "gc_sync_events", FakeCalendar(ConnectionError("offline")))
+
+    assert [e["id"] for e in tools.get_calendar_events("2024-01-02")] == ["a"]
+
+def note(note_id, last_edited, date="2024-01-02"):
+    return {"id": note_id, "title": f"Note {note_id}", "content": "", "date": date,
+            "last_edited": last_edited}
+
+class FakeNotion:
+    """Stands in for iter_notes: serves the current notes edited since the given mark."""
+
+    def __init__(self, *notes):
+        self.notes = list(notes)
+        self.calls = []
+
+    def __call__(self, edited_since=None):
+        self.calls.append(edited_since)
+        return [n for n in self.notes if edited_since is None or n["last_edited"] >= edited_since]
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic and wall clocks for the notes sync; advance with clock.now += seconds."""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(tools, "time", SimpleNamespace(monotonic=lambda: clock.now, time=lambda: clock.now))
+    return clock
+
+def test_notes_sync_advances_the_high_water_mark(store, clock, monkeypatch):
+    notion = FakeNotion(note("a", "2024-01-02T09:00:00"), note("b", "2024-01-02T10:00:00"))
+    monkeypatch.setattr(tools, "nn_iter_notes", notion)
+
+    assert [n["id"] for n in tools.get_notes("2024-01-01")] == ["a", "b"]
+    assert store.get_sync_state("notes") == "2024-01-02T10:00:00"
+
+    # Within the sync interval the mirror answers without asking Notion
+    notion.notes.append(note("c", "2024-01-02T11:00:00"))
+    assert len(tools.get_notes("2024-01-01")) == 2
+    assert notion.calls == [None]
+
+    clock.now += tools.NOTES_SYNC_INTERVAL
+    assert [n["id"] for n in tools.get_notes("2024-01-01")] == ["a", "b", "c"]
+    assert notion.calls == [None, "2024-01-02T10:00:00"]
+    assert store.get_sync_state("notes") == "2024-01-02T11:00:00"
+
+def test_notes_sync_reconciles_deletions_periodically(store, clock, monkeypatch):
+    notion = FakeNotion(note("a", "2024-01-02T09:00:00"), note("b", "2024-01-02T10:00:00"))
+    monkeypatch.setattr(tools, "nn_iter_notes", notion)
+    tools.sync_notes()
+
+    # An incremental sync cannot see deletions
+    del notion.notes[0]
+    clock.now += tools.NOTES_SYNC_INTERVAL
+    assert [n["id"] for n in tools.get_notes("2024-01-01")] == ["a", "b"]
+
+    clock.now += tools.NOTES_RECONCILE_INTERVAL
+    assert [n["id"] for n in tools.get_notes("2024-01-01")] == ["b"]
+    assert notion.calls == [None, "2024-01-02T10:00:00", None]
+    assert store.get_sync_state("notes_reconciled") == str(clock.now)
+
+def test_forced_notes_sync_ignores_the_interval(store, clock, monkeypatch):
+    notion = FakeNotion(note("a", "2024-01-02T09:00:00"))
+    monkeypatch.setattr(tools, "nn_iter_notes", notion)
+    assert tools.sync_notes() == 1
+    assert tools.sync_notes() == 0
+    assert tools.sync_notes(force=True) == 1
+    assert notion.calls == [None, "2024-01-02T09:00:00"]
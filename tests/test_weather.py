@@ -0,0 +1,149 @@
+"""
+test_weather.py
+Unit tests for the weather TTL cache and pooled session.
+"""
+
+import sys
+import types
+
+import pytest
+
+from tool_utils import weather
+
+PAYLOAD = {"cod": 200, "name": "Delhi", "main": {"temp": 30}, "weather": [{"description": "haze"}]}
+
+class FakeResponse:
+    def __init__(self, data, status_code=200):
+        self._data = data
+        self.status_code = status_code
+
+    def json(self):
+        return self._data
+
+class FakeSession:
+    def __init__(self):
+        self.calls = []
+        self.mounts = {}
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append({"url": url, "params": params, "timeout": timeout})
+        return FakeResponse(dict(PAYLOAD, main={"temp": 30 + len(self.calls)}))
+
+    def mount(self, prefix, adapter):
+        self.mounts[prefix] = adapter
+
+class SyncThread:
+    """Runs background refreshes inline so tests can observe them."""
+    def __init__(self, target, name=None, daemon=None):
+        self.target = target
+
+    def start(self):
+        self.target()
+
+@pytest.fixture
+def session(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(weather, "_get_session", lambda: session)
+    monkeypatch.setattr(weather, "governed", lambda provider, func, **kwargs: func())
+    monkeypatch.setattr(weather, "API_KEY", "key")
+    monkeypatch.setattr(weather, "threading", types.SimpleNamespace(Thread=SyncThread))
+    weather._data_cache.clear()
+    weather._text_cache.clear()
+    yield session
+    weather._data_cache.clear()
+    weather._text_cache.clear()
+
+def age_entries(seconds):
+    """Pretend every cached payload was fetched seconds earlier."""
+    for key, (fetched_at, data) in list(weather._data_cache.items()):
+        weather._data_cache[key] = (fetched_at - seconds, data)
+
+def test_request_passes_timeouts_and_params(session):
+    weather.get_weather_data("Delhi", "metric")
+    call = session.calls[0]
+    assert call["timeout"] == weather.REQUEST_TIMEOUT
+    assert call["params"] == {"q": "Delhi", "appid": "key", "units": "metric"}
+
+def test_fresh_entries_are_served_from_cache(session):
+    first = weather.get_weather_data("Delhi")
+    assert weather.get_weather_data(" delhi ") is first
+    assert len(session.calls) == 1
+
+    text = weather.get_weather("Delhi")
+    assert weather.get_weather("Delhi") is text
+    assert len(session.calls) == 1
+
+def test_stale_entries_are_served_while_refreshing(session):
+    first = weather.get_weather_data("Delhi")
+    age_entries(weather.CACHE_TTL + 1)
+
+    assert weather.get_weather_data("Delhi") is first
+    assert len(session.calls) == 2
+    assert weather.get_weather_data("Delhi")["main"]["temp"] == 32
+    assert len(session.calls) == 2
+
+def test_expired_entries_are_fetched_synchronously(session):
+    weather.get_weather_data("Delhi")
+    age_entries(weather.CACHE_TTL + weather.STALE_TTL + 1)
+
+    assert weather.get_weather_data("Delhi")["main"]["temp"] == 32
+    assert len(session.calls) == 2
+
+def test_formatted_text_follows_the_payload(session):
+    first = weather.get_weather("Delhi")
+    age_entries(weather.CACHE_TTL + weather.STALE_TTL + 1)
+    second = weather.get_weather("Delhi")
+    assert "31°C" in first and "32°C" in second
+
+def test_error_payloads_are_not_cached(session, monkeypatch):
+    monkeypatch.setattr(session, "get", lambda url, params=None, timeout=None:
+                        FakeResponse({"cod": "404", "message": "city not found"}, 404))
+    assert weather.get_weather("Atlantis") == "Weather service error: city not found"
+    assert weather._data_cache == {}
+
+def test_session_is_created_once_with_pooled_adapters(monkeypatch):
+    sessions = []
+
+    def make_session():
+        sessions.append(FakeSession())
+        return sessions[-1]
+    monkeypatch.setitem(sys.modules, "requests", types.SimpleNamespace(Session=make_session))
+    monkeypatch.setitem(sys.modules, "requests.adapters",
+                        types.SimpleNamespace(HTTPAdapter=lambda **kwargs: kwargs))
+    monkeypatch.setattr(weather, "_session", None)
+
+    assert weather._get_session() is weather._get_session()
+    assert len(sessions) == 1
+    assert set(sessions[0].mounts) == {"http://", "https://"}
+    assert sessions[0].mounts["https://"]["pool_maxsize"] == 8
+
+def test_unknown_city_does_not_open_the_weather_circuit(session, monkeypatch):
+    from mcp import tools
+    from mcp.circuit import CircuitBreaker, CLOSED
+
+    monkeypatch.setattr(tools, "weather_breaker", CircuitBreaker("weather.fetch", min_calls=1))
+    get = session.get
+
+    def lookup(url, params=None, timeout=None):
+        if params["q"] == "Atlantis":
+            return FakeResponse({"cod": "404", "message": "city not found"}, status_code=404)
+        return get(url, params, timeout)
+    session.get = lookup
+
+    assert "Delhi" in tools.get_weather("Delhi")
+    for _ in range(2):
+        with pytest.raises(weather.WeatherServiceError):
+            tools.get_weather("Atlantis")
+    assert tools.weather_breaker.state == CLOSED
+
+def test_cached_weather_is_served_while_the_circuit_is_open(session, monkeypatch):
+    from mcp import tools
+    from mcp.circuit import CircuitBreaker
+
+    breaker = CircuitBreaker("weather.fetch")
+    monkeypatch.setattr(tools, "weather_breaker", breaker)
+    assert "Delhi" in tools.get_weather("Delhi")
+    breaker._open()
+
+    assert "Delhi" in tools.get_weather("Delhi")
+    assert len(session.calls) == 1
@@ -7,24 +7,31 @@ from .google_calendar import (
     create_event,
     list_events_for_date,
     update_event,
-    delete_event
+    delete_event,
+    batch_mutate
 )
 from .notion_notes import (
     create_note,
     get_notes,
+    iter_notes,
     update_note,
     delete_note
 )
-from .weather import get_weather
+from .weather import get_weather, get_weather_data
+from .ratelimit import rate_limit_stats
 
 __all__ = [
     'create_event',
     'list_events_for_date',
     'update_event',
     'delete_event',
+    'batch_mutate',
     'create_note',
     'get_notes',
+    'iter_notes',
     'update_note',
     'delete_note',
-    'get_weather'
+    'get_weather',
+    'get_weather_data',
+    'rate_limit_stats'
 ]
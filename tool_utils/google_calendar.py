@@ -1,57 +1,161 @@
 from __future__ import print_function
+from datetime import datetime, timedelta
 import os.path
+import threading
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from .ratelimit import GOOGLE_CALENDAR, governed
+
+# The Google client libraries are imported inside the functions that use them,
+# so importing this module stays cheap until the calendar is actually used.
 
 # If modifying these scopes, delete the token.json
 SCOPES = ['https://www.googleapis.com/auth/calendar']
+TOKEN_FILE = 'token.json'
+CREDENTIALS_FILE = 'google_calendar_credentials.json'
+
+# Calendar time zone used for event creation and day boundaries
+TIME_ZONE = 'Asia/Kolkata'
+UTC_OFFSET = '+05:30'
+
+# Refresh credentials when they are this close to expiry
+REFRESH_MARGIN = timedelta(minutes=5)
+# Socket timeout for Calendar API requests, in seconds
+HTTP_TIMEOUT = 30
+
+# Google accepts at most 50 calls per Calendar batch request
+BATCH_LIMIT = 50
+# Event fields that update_event and batch patches may change
+UPDATABLE_FIELDS = ('summary', 'location', 'description')
+# Patch arguments that reschedule an event, and the event field each one sets
+TIME_FIELDS = {'start_iso': 'start', 'end_iso': 'end'}
+
+# Process-wide service and credentials, built once and shared by every call.
+# httplib2 is not thread-safe, so each thread gets its own authorized session.
+_lock = threading.RLock()
+_creds = None
+_service = None
+_http_local = threading.local()
+
+def _load_credentials():
+    """Load credentials from token.json, refreshing or re-authenticating as needed."""
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
 
-def get_service():
     creds = None
     print('Checking for existing credentials...')
-    try:
-        if os.path.exists('token.json'):
-            creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-
-        # If no (valid) credentials, let user log in.
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                try:
-                    creds.refresh(Request())
-                except Exception as e:
-                    print('Error refreshing token. Removing token.json and requesting new authentication...')
-                    if os.path.exists('token.json'):
-                        os.remove('token.json')
-                    creds = None
-            
-            if not creds:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    'google_calendar_credentials.json', SCOPES)
-                creds = flow.run_local_server(port=0)
-                with open('token.json', 'w') as token:
-                    token.write(creds.to_json())
-
-        return build('calendar', 'v3', credentials=creds)
-    except Exception as e:
-        if os.path.exists('token.json'):
-            os.remove('token.json')
-        raise Exception(f"Authentication failed. Please try again. Error: {str(e)}")
+    if os.path.exists(TOKEN_FILE):
+        creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
+
+    # If no (valid) credentials, let user log in.
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            try:
+                _refresh(creds)
+            except Exception as e:
+                print('Error refreshing token. Removing token.json and requesting new authentication...')
+                if os.path.exists(TOKEN_FILE):
+                    os.remove(TOKEN_FILE)
+                creds = None
+
+        if not creds:
+            flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_FILE, SCOPES)
+            creds = flow.run_local_server(port=0)
+            with open(TOKEN_FILE, 'w') as token:
+                token.write(creds.to_json())
+    return creds
+
+def _refresh(creds):
+    """Refresh credentials and persist the new token."""
+    from google.auth.transport.requests import Request
+    creds.refresh(Request())
+    with open(TOKEN_FILE, 'w') as token:
+        token.write(creds.to_json())
+
+def _near_expiry(creds):
+    if not creds.valid:
+        return True
+    return creds.expiry is not None and creds.expiry - datetime.utcnow() < REFRESH_MARGIN
+
+def _get_credentials():
+    """Return cached credentials, refreshing them under the lock only near expiry."""
+    global _creds
+    creds = _creds
+    if creds is not None and not _near_expiry(creds):
+        return creds
+    with _lock:
+        try:
+            if _creds is None:
+                _creds = _load_credentials()
+            elif _near_expiry(_creds) and _creds.refresh_token:
+                _refresh(_creds)
+            return _creds
+        except Exception as e:
+            reset_service()
+            if os.path.exists(TOKEN_FILE):
+                os.remove(TOKEN_FILE)
+            raise Exception(f"Authentication failed. Please try again. Error: {str(e)}")
+
+def _authorized_http():
+    """Return this thread's keep-alive authorized HTTP session."""
+    http = getattr(_http_local, 'http', None)
+    creds = _get_credentials()
+    if http is None or http.credentials is not creds:
+        import httplib2
+        from google_auth_httplib2 import AuthorizedHttp
+        http = AuthorizedHttp(creds, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+        _http_local.http = http
+    return http
+
+def _execute(request, idempotent=True):
+    """Execute an API request over this thread's pooled session, within the Calendar rate limit."""
+    return governed(GOOGLE_CALENDAR, lambda: request.execute(http=_authorized_http()),
+                    idempotent=idempotent)
+
+def get_service():
+    """
+    Return the process-wide Calendar service.
+    The service is built once from the discovery document bundled with
+    google-api-python-client, so no discovery fetch or parse happens per call.
+    """
+    global _service
+    if _service is None:
+        with _lock:
+            if _service is None:
+                from googleapiclient.discovery import build
+                _service = build('calendar', 'v3', http=_authorized_http(),
+                                 static_discovery=True, cache_discovery=False)
+    return _service
+
+def reset_service():
+    """Drop the cached service and credentials, e.g. after revoking access."""
+    global _creds, _service
+    with _lock:
+        _creds = None
+        _service = None
+        _http_local.__dict__.clear()
 
 # ========== Calendar CRUD ==========
 
-def create_event(title, start_iso, end_iso, location=None, description=None):
-    service = get_service()
-    event = {
+def _event_body(title, start_iso, end_iso, location=None, description=None):
+    return {
         'summary': title,
         'location': location,
         'description': description,
-        'start': {'dateTime': start_iso, 'timeZone': 'Asia/Kolkata'},
-        'end': {'dateTime': end_iso, 'timeZone': 'Asia/Kolkata'},
+        'start': {'dateTime': start_iso, 'timeZone': TIME_ZONE},
+        'end': {'dateTime': end_iso, 'timeZone': TIME_ZONE},
     }
-    created_event = service.events().insert(calendarId='primary', body=event).execute()
+
+def _patch_body(fields):
+    body = {key: value for key, value in fields.items() if key in UPDATABLE_FIELDS}
+    for key, field in TIME_FIELDS.items():
+        if fields.get(key):
+            body[field] = {'dateTime': fields[key], 'timeZone': TIME_ZONE}
+    return body
+
+def create_event(title, start_iso, end_iso, location=None, description=None):
+    service = get_service()
+    event = _event_body(title, start_iso, end_iso, location, description)
+    created_event = _execute(service.events().insert(calendarId='primary', body=event), idempotent=False)
     return created_event['id']
 
 def list_events_for_date(start_date: str, end_date: str = None):
@@ -64,27 +168,115 @@ def list_events_for_date(start_date: str, end_date: str = None):
     if end_date is None:
         end_date = start_date
         
-    start = f"{start_date}T00:00:00+05:30"
-    end = f"{end_date}T23:59:59+05:30"
+    start = f"{start_date}T00:00:00{UTC_OFFSET}"
+    end = f"{end_date}T23:59:59{UTC_OFFSET}"
     
-    events_result = service.events().list(
+    events_result = _execute(service.events().list(
         calendarId='primary',
         timeMin=start,
         timeMax=end,
         singleEvents=True,
         orderBy='startTime'
-    ).execute()
+    ))
     return events_result.get('items', [])
 
+class SyncTokenExpired(Exception):
+    """Raised when Google rejects a sync token (410 Gone) and a full resync is needed."""
+
+def sync_events(sync_token: str = None):
+    """
+    Fetch calendar changes since sync_token, or every event when it is None.
+    Incremental results include cancelled events so deletions can be mirrored.
+    Args:
+        sync_token (str, optional): nextSyncToken from a previous sync
+    Returns:
+        tuple: (list of changed event dicts, next sync token)
+    Raises:
+        SyncTokenExpired: If the sync token is no longer valid
+    """
+    from googleapiclient.errors import HttpError
+
+    service = get_service()
+    params = {'calendarId': 'primary', 'singleEvents': True, 'maxResults': 2500}
+    if sync_token:
+        params['syncToken'] = sync_token
+
+    events = []
+    page_token = None
+    while True:
+        try:
+            result = _execute(service.events().list(pageToken=page_token, **params))
+        except HttpError as e:
+            if e.resp.status == 410:
+                raise SyncTokenExpired("Calendar sync token expired") from e
+            raise
+        events.extend(result.get('items', []))
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            return events, result.get('nextSyncToken')
+
 def delete_event(event_id: str):
     service = get_service()
-    service.events().delete(calendarId='primary', eventId=event_id).execute()
+    _execute(service.events().delete(calendarId='primary', eventId=event_id))
 
 def update_event(event_id, **kwargs):
+    """
+    Patch only the given fields of an event in a single request.
+    Args:
+        event_id (str): Event ID
+        kwargs: Any of UPDATABLE_FIELDS, plus start_iso and end_iso to reschedule
+    """
     service = get_service()
-    event = service.events().get(calendarId='primary', eventId=event_id).execute()
-    for key, value in kwargs.items():
-        if key in ['summary', 'location', 'description']:
-            event[key] = value
-    updated_event = service.events().update(calendarId='primary', eventId=event_id, body=event).execute()
+    updated_event = _execute(service.events().patch(
+        calendarId='primary', eventId=event_id, body=_patch_body(kwargs)))
     return updated_event
+
+def _batch_request(service, operation):
+    """Build the API request for one batch operation."""
+    op = operation['op']
+    if op == 'create':
+        body = _event_body(operation['title'], operation['start_iso'], operation['end_iso'],
+                           operation.get('location'), operation.get('description'))
+        return service.events().insert(calendarId='primary', body=body)
+    if op == 'patch':
+        fields = {key: value for key, value in operation.items() if key not in ('op', 'event_id')}
+        return service.events().patch(calendarId='primary', eventId=operation['event_id'],
+                                      body=_patch_body(fields))
+    if op == 'delete':
+        return service.events().delete(calendarId='primary', eventId=operation['event_id'])
+    raise ValueError(f"Unknown batch operation: {op}")
+
+def batch_mutate(operations):
+    """
+    Apply many event creates, patches and deletes through Google's batch endpoint,
+    packing up to BATCH_LIMIT operations into each HTTP round trip.
+    Args:
+        operations (list): Operation dicts, each with an 'op' key:
+            {'op': 'create', 'title', 'start_iso', 'end_iso', 'location'?, 'description'?}
+            {'op': 'patch', 'event_id', plus any of UPDATABLE_FIELDS, 'start_iso', 'end_iso'}
+            {'op': 'delete', 'event_id'}
+    Returns:
+        list: One {'ok': bool, 'result' or 'error'} dict per operation, in input order
+    """
+    service = get_service()
+    results = [None] * len(operations)
+
+    def callback(request_id, response, exception):
+        if exception is not None:
+            results[int(request_id)] = {'ok': False, 'error': str(exception)}
+        else:
+            results[int(request_id)] = {'ok': True, 'result': response}
+
+    for offset in range(0, len(operations), BATCH_LIMIT):
+        batch = service.new_batch_http_request(callback=callback)
+        added = 0
+        for index in range(offset, min(offset + BATCH_LIMIT, len(operations))):
+            try:
+                batch.add(_batch_request(service, operations[index]), request_id=str(index))
+                added += 1
+            except (KeyError, ValueError) as e:
+                results[index] = {'ok': False, 'error': f"Invalid operation: {str(e)}"}
+        # Google counts every call in a batch against the quota
+        governed(GOOGLE_CALENDAR, lambda: batch.execute(http=_authorized_http()),
+                 requests=added, idempotent=False)
+    return results
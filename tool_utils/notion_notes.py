@@ -1,13 +1,24 @@
-from notion_client import Client
 from dotenv import load_dotenv
 from datetime import datetime
 import os
 
+from .ratelimit import NOTION, governed
+
 load_dotenv()
 
-notion = Client(auth=os.getenv("NOTION_TOKEN"))
 DB_ID = os.getenv("NOTION_DATABASE_ID")
 
+# Created on first use so importing this module does not load notion_client
+_notion = None
+
+def get_client():
+    """Return the shared Notion client, creating it on first use."""
+    global _notion
+    if _notion is None:
+        from notion_client import Client
+        _notion = Client(auth=os.getenv("NOTION_TOKEN"))
+    return _notion
+
 def create_note(content: str, title: str = "Untitled", tags: list = []):
     date = datetime.now().date().isoformat()
     
@@ -20,34 +31,76 @@ def create_note(content: str, title: str = "Untitled", tags: list = []):
     if date:
         props["Date"] = {"date": {"start": date}}
 
-    notion.pages.create(parent={"database_id": DB_ID}, properties=props)
+    governed(NOTION, lambda: get_client().pages.create(parent={"database_id": DB_ID}, properties=props),
+             idempotent=False)
+
+# Notion returns at most 100 results per database query
+MAX_PAGE_SIZE = 100
+
+def _parse_note(page):
+    props = page["properties"]
+    return {
+        "id": page["id"],
+        "title": props["Title"]["title"][0]["plain_text"] if props["Title"]["title"] else "Untitled",
+        "content": props["Content"]["rich_text"][0]["plain_text"] if props["Content"]["rich_text"] else "",
+        "date": ((props.get("Date") or {}).get("date") or {}).get("start"),
+        "last_edited": page.get("last_edited_time")
+    }
 
-def get_notes(from_date: str = None):
-    filter_conditions = {}
+def iter_notes(from_date: str = None, page_size: int = MAX_PAGE_SIZE, limit: int = None,
+               edited_since: str = None):
+    """
+    Lazily stream notes, fetching one Notion page of results at a time.
+    Args:
+        from_date (str, optional): Only notes dated on or after 'YYYY-MM-DD'
+        page_size (int): Results requested per query (at most 100)
+        limit (int, optional): Stop after this many notes
+        edited_since (str, optional): Only notes last edited at or after this ISO timestamp
+    Yields:
+        dict: Note with id, title, content, date and last_edited
+    """
+    if limit is not None and limit <= 0:
+        return
+    query = {"database_id": DB_ID, "page_size": min(page_size, MAX_PAGE_SIZE)}
+    filters = []
     if from_date:
-        filter_conditions = {
-            "filter": {
-                "property": "Date",
-                "date": {
-                    "on_or_after": from_date
-                }
+        filters.append({
+            "property": "Date",
+            "date": {
+                "on_or_after": from_date
+            }
+        })
+    if edited_since:
+        filters.append({
+            "timestamp": "last_edited_time",
+            "last_edited_time": {
+                "on_or_after": edited_since
             }
-        }
-    
-    results = notion.databases.query(database_id=DB_ID, **filter_conditions)["results"]
-    notes = []
-    for page in results:
-        props = page["properties"]
-        notes.append({
-            "id": page["id"],
-            "title": props["Title"]["title"][0]["plain_text"] if props["Title"]["title"] else "Untitled",
-            "content": props["Content"]["rich_text"][0]["plain_text"] if props["Content"]["rich_text"] else "",
-            "date": props.get("Date", {}).get("date", {}).get("start", None)
         })
-    return notes
+    if len(filters) == 1:
+        query["filter"] = filters[0]
+    elif filters:
+        query["filter"] = {"and": filters}
+
+    count = 0
+    while True:
+        if limit is not None:
+            query["page_size"] = min(query["page_size"], limit - count)
+        response = governed(NOTION, lambda: get_client().databases.query(**query))
+        for page in response["results"]:
+            yield _parse_note(page)
+            count += 1
+            if limit is not None and count >= limit:
+                return
+        if not response.get("has_more") or not response.get("next_cursor"):
+            return
+        query["start_cursor"] = response["next_cursor"]
+
+def get_notes(from_date: str = None, limit: int = None):
+    return list(iter_notes(from_date, limit=limit))
 
 def delete_note(note_id):
-    notion.blocks.delete(note_id)
+    governed(NOTION, lambda: get_client().blocks.delete(note_id))
 
 def update_note(note_id, new_content=None, new_title=None):
     updates = {}
@@ -58,4 +111,4 @@ def update_note(note_id, new_content=None, new_title=None):
     today = datetime.now().date().isoformat()
     if today:
         updates["Date"] = {"date": {"start": today}}
-    notion.pages.update(page_id=note_id, properties=updates)
+    governed(NOTION, lambda: get_client().pages.update(page_id=note_id, properties=updates))
@@ -0,0 +1,322 @@
+"""
+ratelimit.py
+Shared governor for outbound API requests.
+Every provider gets a token bucket sized to its published rate limit, so
+bursts of calls are spread out client-side instead of being throttled by the
+server. Calls rejected with 429 or a transient 5xx are retried with jittered
+exponential backoff, waiting at least as long as the server's Retry-After.
+"""
+
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Provider names
+GROQ = "groq"
+NOTION = "notion"
+GOOGLE_CALENDAR = "google_calendar"
+OPENWEATHER = "openweather"
+
+# Responses worth retrying. 429 means the request was not processed; a 5xx
+# may have been, so non-idempotent calls only retry on 429.
+RATE_LIMITED = 429
+TRANSIENT_STATUSES = frozenset({500, 502, 503, 504})
+RETRYABLE_STATUSES = TRANSIENT_STATUSES | {RATE_LIMITED}
+
+# Retries after the first attempt
+MAX_RETRIES = 3
+# Backoff before retry n is uniform in [0, min(MAX_DELAY, BASE_DELAY * 2 ** n)]
+BASE_DELAY = 0.5
+MAX_DELAY = 20.0
+# A Retry-After longer than this is not waited out; the error is raised instead
+MAX_RETRY_AFTER = 60.0
+
+
+@dataclass(frozen=True)
+class Limit:
+    """Published rate limit of a provider."""
+    requests_per_second: float
+    burst: float
+    tokens_per_minute: Optional[float] = None
+
+
+LIMITS: Dict[str, Limit] = {
+    # Free-tier defaults; paid plans can raise them through the environment
+    GROQ: Limit(float(os.environ.get("GROQ_RPM", 30)) / 60, burst=5,
+                tokens_per_minute=float(os.environ.get("GROQ_TPM", 6000))),
+    # Notion averages three requests per second per integration
+    NOTION: Limit(3, burst=3),
+    # Calendar's default per-user quota is 600 requests a minute
+    GOOGLE_CALENDAR: Limit(10, burst=10),
+    # OpenWeather's free plan allows 60 calls a minute
+    OPENWEATHER: Limit(1, burst=5),
+}
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations instead of blocking.
+    reserve() takes tokens immediately, letting the balance go negative, and
+    returns how long the caller must wait before using them. Callers therefore
+    queue up in arrival order, and the same bucket serves threads and
+    coroutines alike.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            rate (float): Tokens added per second
+            capacity (float): Most tokens the bucket holds, i.e. the burst size
+            clock (callable): Monotonic time source
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _fill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens from the bucket.
+        Args:
+            tokens (float): Tokens needed; more than the capacity is reserved in full
+                and waits for the shortfall to refill, e.g. a large batch
+        Returns:
+            float: Seconds to wait before the reservation may be used
+        """
+        with self._lock:
+            self._fill()
+            self._tokens -= tokens
+            return max(-self._tokens / self.rate, 0.0)
+
+    def refund(self, tokens: float) -> None:
+        """Return reserved tokens that turned out not to be needed."""
+        with self._lock:
+            self._fill()
+            self._tokens = min(self.capacity, self._tokens + tokens)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for at least seconds, e.g. after a 429."""
+        with self._lock:
+            self._fill()
+            # The next single-token reservation becomes due exactly seconds from now
+            self._tokens = min(self._tokens, 1.0 - seconds * self.rate)
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    """HTTP status of an error raised by the Groq, Notion, Google or requests clients."""
+    for value in (getattr(error, "status_code", None), getattr(error, "status", None)):
+        if isinstance(value, int):
+            return value
+    for response in (getattr(error, "response", None), getattr(error, "resp", None)):
+        for value in (getattr(response, "status_code", None), getattr(response, "status", None)):
+            if isinstance(value, int):
+                return value
+    return None
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait, from a Retry-After header on the error."""
+    for holder in (error, getattr(error, "response", None), getattr(error, "resp", None)):
+        headers = getattr(holder, "headers", None)
+        if headers is None and isinstance(holder, dict):
+            # httplib2 responses are themselves the header mapping
+            headers = holder
+        if not headers:
+            continue
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        if value is None:
+            continue
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            continue
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    return None
+
+
+class Governor:
+    """
+    Throttle and retry the outbound calls of one provider.
+    Each call reserves one request from the request bucket and, for providers
+    with a token limit, its estimated tokens from the token bucket, then
+    sleeps until both reservations are due.
+    """
+
+    def __init__(self, name: str, limit: Limit, max_retries: int = MAX_RETRIES,
+                 base_delay: float = BASE_DELAY, max_delay: float = MAX_DELAY,
+                 max_retry_after: float = MAX_RETRY_AFTER,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep,
+                 jitter: Callable[[], float] = random.random):
+        """
+        Args:
+            name (str): Provider name used in logs and stats
+            limit (Limit): Rate limit to stay under
+            max_retries (int): Retries after the first attempt
+            base_delay (float): Backoff before the first retry, before jitter
+            max_delay (float): Longest backoff, before jitter
+            max_retry_after (float): Longest Retry-After that is waited out
+            clock (callable): Monotonic time source
+            sleep (callable): Blocking sleep, replaceable in tests
+            jitter (callable): Returns a float in [0, 1)
+        """
+        self.name = name
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.requests = TokenBucket(limit.requests_per_second, limit.burst, clock)
+        self.tokens = (TokenBucket(limit.tokens_per_minute / 60, limit.tokens_per_minute, clock)
+                       if limit.tokens_per_minute else None)
+        self._sleep = sleep
+        self._jitter = jitter
+        self._stats = {"calls": 0, "throttled": 0, "throttle_seconds": 0.0,
+                       "rate_limited": 0, "retries": 0, "failures": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, **increments: float) -> None:
+        with self._lock:
+            for key, value in increments.items():
+                self._stats[key] += value
+
+    def _reserve(self, requests: int, tokens: float) -> float:
+        wait = self.requests.reserve(requests)
+        if self.tokens is not None and tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        if wait > 0:
+            self._count(throttled=1, throttle_seconds=wait)
+            logger.debug(f"Throttling {self.name} call for {wait:.2f}s")
+        return wait
+
+    def _backoff(self, error: Exception, attempt: int, idempotent: bool) -> Optional[float]:
+        """Seconds to wait before retrying after error, or None if it should be raised."""
+        status = status_code(error)
+        if status == RATE_LIMITED:
+            self._count(rate_limited=1)
+        retryable = status == RATE_LIMITED or (idempotent and status in TRANSIENT_STATUSES)
+        if not retryable or attempt >= self.max_retries:
+            self._count(failures=1)
+            return None
+        delay = self._jitter() * min(self.max_delay, self.base_delay * 2 ** attempt)
+        server_delay = retry_after(error)
+        if server_delay is not None:
+            if server_delay > self.max_retry_after:
+                self._count(failures=1)
+                return None
+            delay += server_delay
+        if status == RATE_LIMITED:
+            # Everyone else sharing the quota backs off too
+            self.requests.pause(delay)
+        self._count(retries=1)
+        logger.warning(f"{self.name} request failed with {status}; retry {attempt + 1} "
+                       f"of {self.max_retries} in {delay:.2f}s")
+        return delay
+
+    def call(self, func: Callable[[], T], requests: int = 1, tokens: float = 0,
+             idempotent: bool = True) -> T:
+        """
+        Run func under the provider's rate limit, retrying rate-limited and transient failures.
+        Args:
+            func (callable): Makes the request; called once per attempt
+            requests (int): Requests the call counts as, e.g. the size of a batch
+            tokens (float): Estimated tokens the call consumes
+            idempotent (bool): Whether a 5xx may safely be retried
+        Returns:
+            The result of func
+        """
+        self._count(calls=1)
+        attempt = 0
+        while True:
+            wait = self._reserve(requests, tokens)
+            if wait > 0:
+                self._sleep(wait)
+            try:
+                return func()
+            except Exception as e:
+                delay = self._backoff(e, attempt, idempotent)
+                if delay is None:
+                    raise
+            # The rejected attempt used no quota; the retry reserves it again
+            self.refund_tokens(tokens)
+            self._sleep(delay)
+            attempt += 1
+
+    async def acall(self, func: Callable[[], Awaitable[T]], requests: int = 1, tokens: float = 0,
+                    idempotent: bool = True) -> T:
+        """Async variant of call(); func returns an awaitable and waits do not block the loop."""
+        import asyncio
+        self._count(calls=1)
+        attempt = 0
+        while True:
+            wait = self._reserve(requests, tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                return await func()
+            except Exception as e:
+                delay = self._backoff(e, attempt, idempotent)
+                if delay is None:
+                    raise
+            # The rejected attempt used no quota; the retry reserves it again
+            self.refund_tokens(tokens)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def refund_tokens(self, tokens: float) -> None:
+        """Give back tokens reserved beyond what a call actually used."""
+        if self.tokens is not None and tokens > 0:
+            self.tokens.refund(tokens)
+
+    def stats(self) -> Dict[str, float]:
+        """Call, throttle, 429 and retry counters."""
+        with self._lock:
+            return dict(self._stats)
+
+
+_governors: Dict[str, Governor] = {}
+_governors_lock = threading.Lock()
+
+def get_governor(provider: str) -> Governor:
+    """Return the process-wide governor for a provider in LIMITS."""
+    governor = _governors.get(provider)
+    if governor is None:
+        with _governors_lock:
+            governor = _governors.get(provider)
+            if governor is None:
+                governor = _governors[provider] = Governor(provider, LIMITS[provider])
+    return governor
+
+def governed(provider: str, func: Callable[[], T], **kwargs: Any) -> T:
+    """Shorthand for get_governor(provider).call(func, **kwargs)."""
+    return get_governor(provider).call(func, **kwargs)
+
+def rate_limit_stats() -> Dict[str, Dict[str, float]]:
+    """Return throttling and retry counters for every provider called so far."""
+    with _governors_lock:
+        governors = list(_governors.values())
+    return {governor.name: governor.stats() for governor in governors}
@@ -1,71 +1,210 @@
 import logging
 import os
-import requests
+import threading
+import time
 from dotenv import load_dotenv
 
+from .ratelimit import OPENWEATHER, RETRYABLE_STATUSES, governed
+
 load_dotenv()
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 API_KEY = os.getenv("OPENWEATHER_API_KEY")
+API_URL = 'http://api.openweathermap.org/data/2.5/weather'
+
+# (connect, read) timeouts in seconds
+REQUEST_TIMEOUT = (3.05, 10)
+# Weather is served from cache for CACHE_TTL seconds, then served stale for
+# up to STALE_TTL more seconds while a background refresh runs.
+CACHE_TTL = 10 * 60
+STALE_TTL = 60 * 60
+
+UNIT_LABELS = {
+    "metric": ("°C", "m/s"),
+    "imperial": ("°F", "mph"),
+    "standard": ("K", "m/s"),
+}
+
+class WeatherServiceError(Exception):
+    """Raised when OpenWeather answers with an error payload."""
+
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        # HTTP status of the answer, e.g. 404 for an unknown city
+        self.status_code = status_code
+
+_session = None
+_session_lock = threading.Lock()
+
+# (city, units) -> (fetched_at, payload) and (city, units) -> (fetched_at, text)
+_data_cache = {}
+_text_cache = {}
+_refreshing = set()
+_cache_lock = threading.Lock()
+
+def _get_session():
+    """Return the shared keep-alive requests.Session for OpenWeather, created on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                session.mount('http://', HTTPAdapter(pool_connections=2, pool_maxsize=8))
+                session.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=8))
+                _session = session
+    return _session
+
+def _get(city: str, units: str):
+    response = _get_session().get(
+        API_URL,
+        params={'q': city, 'appid': API_KEY, 'units': units},
+        timeout=REQUEST_TIMEOUT
+    )
+    if response.status_code in RETRYABLE_STATUSES:
+        # Raised as HTTPError so the governor can back off and retry
+        response.raise_for_status()
+    return response
+
+def _fetch(city: str, units: str) -> dict:
+    response = governed(OPENWEATHER, lambda: _get(city, units))
+    data = response.json()
+    if response.status_code != 200 or 'cod' in data and data['cod'] != 200:
+        status = response.status_code if response.status_code != 200 else data.get('cod')
+        raise WeatherServiceError(data.get('message', 'Unknown error'),
+                                  int(status) if str(status).isdigit() else None)
+    return data
+
+def _store(key, data) -> float:
+    fetched_at = time.monotonic()
+    with _cache_lock:
+        _data_cache[key] = (fetched_at, data)
+    return fetched_at
+
+def _refresh_in_background(key, city: str, units: str) -> None:
+    with _cache_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def refresh():
+        try:
+            _store(key, _fetch(city, units))
+        except Exception as e:
+            logger.warning(f"Background weather refresh for {city} failed: {e}")
+        finally:
+            with _cache_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=refresh, name="weather-refresh", daemon=True).start()
+
+def _cached_data(city: str, units: str):
+    """Return (key, fetched_at, payload), fetching only on a miss or a hard expiry."""
+    key = (city.strip().lower(), units)
+    with _cache_lock:
+        entry = _data_cache.get(key)
+    if entry is not None:
+        age = time.monotonic() - entry[0]
+        if age < CACHE_TTL:
+            return key, entry[0], entry[1]
+        if age < CACHE_TTL + STALE_TTL:
+            _refresh_in_background(key, city, units)
+            return key, entry[0], entry[1]
+    data = _fetch(city, units)
+    return key, _store(key, data), data
+
+def is_cached(city: str = "Delhi", units: str = "metric") -> bool:
+    """Whether get_weather can answer for a city from the cache, without a request."""
+    with _cache_lock:
+        entry = _data_cache.get((city.strip().lower(), units))
+    return entry is not None and time.monotonic() - entry[0] < CACHE_TTL + STALE_TTL
+
+def get_weather_data(city: str = "Delhi", units: str = "metric") -> dict:
+    """Get the raw OpenWeather payload for a city, served from the TTL cache.
 
-def get_weather(city: str = "Delhi", units: str = "metric") -> dict:
-    """Get weather information for a city.
-    
     Args:
         city (str): City name
         units (str): Units (metric/imperial)
-        
+
     Returns:
-        dict: Weather information or error message
-        
+        dict: OpenWeather current weather payload
+
     Raises:
         ValueError: If API key is missing
-        requests.RequestException: If API call fails
+        WeatherServiceError: If OpenWeather returns an error
+        requests.RequestException: If API call fails or times out
     """
     if not API_KEY:
         logger.error("OpenWeather API key not found in environment variables")
         raise ValueError("OpenWeather API key not found. Please set OPENWEATHER_API_KEY in .env")
+    return _cached_data(city, units)[2]
 
-    try:
-        url = f'http://api.openweathermap.org/data/2.5/weather?q={city}&appid={API_KEY}&units={units}'
-        response = requests.get(url)
-        data = response.json()
-        
-        if response.status_code != 200 or 'cod' in data and data['cod'] != 200:
-            error_msg = data.get('message', 'Unknown error')
-            logger.error(f"OpenWeather API error: {error_msg}")
-            return f"Weather service error: {error_msg}"
-        
-        # Extract weather information with safe get operations
-        main_data = data.get("main", {})
-        weather_data = data.get("weather", [{}])[0]
-        temp = main_data.get("temp", "N/A")
-        feels_like = main_data.get("feels_like", "N/A")
-        humidity = main_data.get("humidity", "N/A")
-        pressure = main_data.get("pressure", "N/A")
-        desc = weather_data.get("description", "N/A")
-        city_name = data.get("name", city)
-        wind = data.get("wind", {})
-        wind_speed = wind.get("speed", "N/A")
-        visibility = data.get("visibility", "N/A")
-        
-        # Format the weather information
-        weather_info = f"""
+def format_weather(data: dict, city: str, units: str = "metric") -> str:
+    """Format an OpenWeather payload for display."""
+    temp_unit, speed_unit = UNIT_LABELS.get(units, UNIT_LABELS["metric"])
+
+    # Extract weather information with safe get operations
+    main_data = data.get("main", {})
+    weather_data = data.get("weather", [{}])[0]
+    temp = main_data.get("temp", "N/A")
+    feels_like = main_data.get("feels_like", "N/A")
+    humidity = main_data.get("humidity", "N/A")
+    pressure = main_data.get("pressure", "N/A")
+    desc = weather_data.get("description", "N/A")
+    city_name = data.get("name", city)
+    wind = data.get("wind", {})
+    wind_speed = wind.get("speed", "N/A")
+    visibility = data.get("visibility", "N/A")
+
+    # Format the weather information
+    return f"""
 🌍 Weather in {city_name}
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-🌡  Temperature: {temp}°C
-🔥 Feels like: {feels_like}°C
+🌡  Temperature: {temp}{temp_unit}
+🔥 Feels like: {feels_like}{temp_unit}
 💧 Humidity: {humidity}%
-🌪  Wind Speed: {wind_speed} m/s
+🌪  Wind Speed: {wind_speed} {speed_unit}
 👁  Visibility: {visibility} meters
 🌤  Conditions: {desc.title() if desc != 'N/A' else desc}
 📊 Pressure: {pressure} hPa
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 """
+
+def get_weather(city: str = "Delhi", units: str = "metric") -> dict:
+    """Get weather information for a city.
+
+    Args:
+        city (str): City name
+        units (str): Units (metric/imperial)
+
+    Returns:
+        dict: Weather information or error message
+
+    Raises:
+        ValueError: If API key is missing
+        requests.RequestException: If API call fails
+    """
+    if not API_KEY:
+        logger.error("OpenWeather API key not found in environment variables")
+        raise ValueError("OpenWeather API key not found. Please set OPENWEATHER_API_KEY in .env")
+
+    try:
+        key, fetched_at, data = _cached_data(city, units)
+
+        # The formatted text is cached per payload, separately from the payload itself
+        with _cache_lock:
+            cached_text = _text_cache.get(key)
+        if cached_text is not None and cached_text[0] == fetched_at:
+            return cached_text[1]
+        weather_info = format_weather(data, city, units)
+        with _cache_lock:
+            _text_cache[key] = (fetched_at, weather_info)
         return weather_info
-    except requests.exceptions.HTTPError as err:
-        return f"Weather API error: {err}"
+    except WeatherServiceError as err:
+        logger.error(f"OpenWeather API error: {err}")
+        return f"Weather service error: {err}"
     except Exception as e:
         return f"Failed to fetch weather: {e}"